@@ -3,14 +3,14 @@
 {{- $policyScope := index . 1 -}}
 
 {{- if $policyScope.create -}}
-{{- $apiVersion := include "generic-api-service.backend-tls-policy-api-version" $globalScope -}}
+{{- include "generic-api-service.context" $globalScope -}}
+{{- $context := $globalScope.genericApiServiceContext -}}
 {{-
   $targetRefs := $policyScope.targetRefs |
     default nil |
     required "A valid .targetRefs mapping is required."
 -}}
-{{- $serviceName := include "generic-api-service.service-name" $globalScope -}}
-apiVersion: {{ $apiVersion }}
+apiVersion: {{ $context.backendTlsPolicyApiVersion }}
 kind: BackendTLSPolicy
 metadata:
   {{- with $policyScope.annotations }}
@@ -18,14 +18,14 @@ metadata:
     {{- toYaml . | nindent 4 }}
   {{- end }}
   labels:
-    {{- include "generic-api-service.labels" $globalScope | nindent 4 }}
-  name: {{ $policyScope.name | default (include "generic-api-service.full-name" $globalScope) }}
+    {{- $context.labels | nindent 4 }}
+  name: {{ $policyScope.name | default $context.fullName }}
 spec:
   targetRefs:
   {{- range $targetRefs }}
   - group: {{ .group | default "" | quote }}
     kind: {{ .kind | default "Service" }}
-    name: {{ .name | default $serviceName }}
+    name: {{ .name | default $context.serviceName }}
     {{- with .sectionName }}
     sectionName: {{ . }}
     {{- end }}
@@ -3,14 +3,14 @@
 {{- $policyScope := index . 1 -}}
 
 {{- if $policyScope.create -}}
-{{- $apiVersion := include "generic-api-service.backend-traffic-policy-api-version" $globalScope -}}
+{{- include "generic-api-service.context" $globalScope -}}
+{{- $context := $globalScope.genericApiServiceContext -}}
 {{-
   $targetRefs := $policyScope.targetRefs |
     default nil |
     required "A valid .targetRefs mapping is required."
 -}}
-{{- $fullName := include "generic-api-service.full-name" $globalScope -}}
-apiVersion: {{ $apiVersion }}
+apiVersion: {{ $context.backendTrafficPolicyApiVersion }}
 kind: BackendTrafficPolicy
 metadata:
   {{- with $policyScope.annotations }}
@@ -18,14 +18,14 @@ metadata:
     {{- toYaml . | nindent 4 }}
   {{- end }}
   labels:
-    {{- include "generic-api-service.labels" $globalScope | nindent 4 }}
-  name: {{ $policyScope.name | default $fullName }}
+    {{- $context.labels | nindent 4 }}
+  name: {{ $policyScope.name | default $context.fullName }}
 spec:
   targetRefs:
   {{- range $targetRefs }}
   - group: {{ .group | default "gateway.networking.k8s.io" | quote }}
     kind: {{ .kind | default "HTTPRoute" }}
-    name: {{ .name | default $fullName }}
+    name: {{ .name | default $context.fullName }}
     {{- with .sectionName }}
     sectionName: {{ . }}
     {{- end }}
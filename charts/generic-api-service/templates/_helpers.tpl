@@ -68,11 +68,13 @@ Create the name of the service account to use.
 
 {{/*
 Retrieve the namespace name that should be used.
+
+Note that dig only accepts a plain map, which .Values.AsMap returns without
+copying the values, unlike the .Values | merge (dict) idiom.
 */}}
 {{- define "generic-api-service.namespace-name" -}}
 {{-
-  .Values |
-    merge (dict) |
+  .Values.AsMap |
     dig "namespace" "name" nil |
     default (include "generic-api-service.full-name" .)
 -}}
@@ -83,8 +85,7 @@ Retrieve the name that should be used for the service.
 */}}
 {{- define "generic-api-service.service-name" -}}
 {{-
-  .Values |
-    merge (dict) |
+  .Values.AsMap |
     dig "service" "name" nil |
     default (include "generic-api-service.full-name" .) |
     required "A valid .Values.service.name is required"
@@ -96,13 +97,40 @@ Resolve the apiVersion that should be used for Gateway API HTTPRoute resources.
 */}}
 {{- define "generic-api-service.http-route-api-version" -}}
 {{- $apiVersion := "gateway.networking.k8s.io/v1" -}}
-{{- $globalApiVersion := dig "global" "gatewayApi" "apiVersion" nil (.Values | merge (dict)) -}}
+{{- $globalApiVersion := dig "global" "gatewayApi" "apiVersion" nil .Values.AsMap -}}
 {{- if ne $globalApiVersion nil -}}
 {{- $apiVersion = $globalApiVersion -}}
 {{- end }}
 {{- print $apiVersion -}}
 {{- end -}}
 
+{{/*
+Compute the values shared by every resource template once per render: the
+full name, the common labels, the service name, the apiVersion of each Gateway
+API kind and a map from each port name to its servicePort. Helm shares the root
+scope between the templates of a chart, so the result is kept there, as
+.genericApiServiceContext, and later includes return immediately.
+*/}}
+{{- define "generic-api-service.context" -}}
+{{- if not (hasKey . "genericApiServiceContext") -}}
+{{- $servicePorts := dict -}}
+{{- range .Values.ports -}}
+{{- $_ := set $servicePorts .name .servicePort -}}
+{{- end -}}
+{{-
+  $_ := set . "genericApiServiceContext" (dict
+    "backendTlsPolicyApiVersion" (include "generic-api-service.backend-tls-policy-api-version" .)
+    "backendTrafficPolicyApiVersion" (include "generic-api-service.backend-traffic-policy-api-version" .)
+    "fullName" (include "generic-api-service.full-name" .)
+    "httpRouteApiVersion" (include "generic-api-service.http-route-api-version" .)
+    "labels" (include "generic-api-service.labels" .)
+    "serviceName" (include "generic-api-service.service-name" .)
+    "servicePorts" $servicePorts
+  )
+-}}
+{{- end -}}
+{{- end -}}
+
 {{/*
 Resolve a service port number from a port name by looking it up in
 .Values.ports. Accepts a list of [$globalScope, $portName].
@@ -110,12 +138,8 @@ Resolve a service port number from a port name by looking it up in
 {{- define "generic-api-service.service-port-number" -}}
 {{- $globalScope := index . 0 -}}
 {{- $portName := index . 1 | required "A valid port name is required to resolve a service port number." -}}
-{{- $servicePort := "" -}}
-{{- range $globalScope.Values.ports -}}
-{{- if eq .name $portName -}}
-{{- $servicePort = .servicePort -}}
-{{- end -}}
-{{- end -}}
+{{- include "generic-api-service.context" $globalScope -}}
+{{- $servicePort := get $globalScope.genericApiServiceContext.servicePorts $portName -}}
 {{- if eq ($servicePort | toString) "" -}}
 {{- fail (printf "Could not resolve a service port for port name %q." $portName) -}}
 {{- end -}}
@@ -128,7 +152,7 @@ resources.
 */}}
 {{- define "generic-api-service.backend-tls-policy-api-version" -}}
 {{- $apiVersion := "gateway.networking.k8s.io/v1alpha3" -}}
-{{- $globalApiVersion := dig "global" "gatewayApi" "backendTlsPolicyApiVersion" nil (.Values | merge (dict)) -}}
+{{- $globalApiVersion := dig "global" "gatewayApi" "backendTlsPolicyApiVersion" nil .Values.AsMap -}}
 {{- if ne $globalApiVersion nil -}}
 {{- $apiVersion = $globalApiVersion -}}
 {{- end }}
@@ -141,9 +165,86 @@ BackendTrafficPolicy resources.
 */}}
 {{- define "generic-api-service.backend-traffic-policy-api-version" -}}
 {{- $apiVersion := "gateway.envoyproxy.io/v1alpha1" -}}
-{{- $globalApiVersion := dig "global" "gatewayApi" "backendTrafficPolicyApiVersion" nil (.Values | merge (dict)) -}}
+{{- $globalApiVersion := dig "global" "gatewayApi" "backendTrafficPolicyApiVersion" nil .Values.AsMap -}}
 {{- if ne $globalApiVersion nil -}}
 {{- $apiVersion = $globalApiVersion -}}
 {{- end }}
 {{- print $apiVersion -}}
 {{- end -}}
+
+{{/*
+Render the pod's topologySpreadConstraints, given a map of them, as a list.
+Accepts a list of [$globalScope, $constraints]. A preset of zone or hostname
+fills in the topologyKey, maxSkew and whenUnsatisfiable of its constraint, and
+constraints that omit them get a labelSelector matching the selector labels and
+matchLabelKeys of [pod-template-hash], so only pods of the same rollout count.
+*/}}
+{{- define "generic-api-service.topology-spread-constraints" -}}
+{{- $globalScope := index . 0 -}}
+{{- $presetTopologyKeys := dict "hostname" "kubernetes.io/hostname" "zone" "topology.kubernetes.io/zone" -}}
+{{- $constraints := list -}}
+{{- range $id, $constraintValues := index . 1 -}}
+{{- if $constraintValues -}}
+{{- /* omit copies the values, so setting defaults below leaves them untouched. */ -}}
+{{- $constraint := omit $constraintValues "preset" -}}
+{{- with $constraintValues.preset -}}
+{{-
+  $topologyKey := get $presetTopologyKeys . |
+    required (printf "Unknown pod.topologySpreadConstraints.%s.preset %q, expected hostname or zone." $id .)
+-}}
+{{-
+  $constraint = merge $constraint (dict
+    "maxSkew" 1
+    "topologyKey" $topologyKey
+    "whenUnsatisfiable" "ScheduleAnyway"
+  )
+-}}
+{{- end -}}
+{{- if not (hasKey $constraint "labelSelector") -}}
+{{- $selectorLabels := include "generic-api-service.selector-labels" $globalScope | fromYaml -}}
+{{- $_ := set $constraint "labelSelector" (dict "matchLabels" $selectorLabels) -}}
+{{- end -}}
+{{- if not (hasKey $constraint "matchLabelKeys") -}}
+{{- $_ := set $constraint "matchLabelKeys" (list "pod-template-hash") -}}
+{{- end -}}
+{{- $constraints = append $constraints $constraint -}}
+{{- end -}}
+{{- end -}}
+{{- toYaml $constraints -}}
+{{- end -}}
+
+{{/*
+Render the pod's affinity: pod.affinity plus, when pod.antiAffinityPreset is
+soft or hard, a podAntiAffinity term matching the selector labels, appended to
+any terms pod.affinity already has. Accepts a list of [$globalScope,
+$podValues] and renders nothing when there is no affinity.
+*/}}
+{{- define "generic-api-service.affinity" -}}
+{{- $globalScope := index . 0 -}}
+{{- $podValues := index . 1 -}}
+{{- /* deepCopy so appending the preset's term leaves the values untouched. */ -}}
+{{- $affinity := $podValues.affinity | default dict | deepCopy -}}
+{{- with $podValues.antiAffinityPreset -}}
+{{- $selectorLabels := include "generic-api-service.selector-labels" $globalScope | fromYaml -}}
+{{-
+  $term := dict
+    "labelSelector" (dict "matchLabels" $selectorLabels)
+    "topologyKey" ($podValues.antiAffinityTopologyKey | default "kubernetes.io/hostname")
+-}}
+{{- $podAntiAffinity := get $affinity "podAntiAffinity" | default dict -}}
+{{- if eq . "hard" -}}
+{{- $terms := get $podAntiAffinity "requiredDuringSchedulingIgnoredDuringExecution" | default list -}}
+{{- $_ := set $podAntiAffinity "requiredDuringSchedulingIgnoredDuringExecution" (append $terms $term) -}}
+{{- else if eq . "soft" -}}
+{{- $terms := get $podAntiAffinity "preferredDuringSchedulingIgnoredDuringExecution" | default list -}}
+{{- $weightedTerm := dict "podAffinityTerm" $term "weight" 100 -}}
+{{- $_ := set $podAntiAffinity "preferredDuringSchedulingIgnoredDuringExecution" (append $terms $weightedTerm) -}}
+{{- else -}}
+{{- fail (printf "Unknown pod.antiAffinityPreset %q, expected soft or hard." .) -}}
+{{- end -}}
+{{- $_ := set $affinity "podAntiAffinity" $podAntiAffinity -}}
+{{- end -}}
+{{- with $affinity -}}
+{{- toYaml . -}}
+{{- end -}}
+{{- end -}}
@@ -3,14 +3,14 @@
 {{- $routeScope := index . 1 -}}
 
 {{- if $routeScope.create -}}
-{{- $httpRouteApiVersion := include "generic-api-service.http-route-api-version" $globalScope -}}
+{{- include "generic-api-service.context" $globalScope -}}
+{{- $context := $globalScope.genericApiServiceContext -}}
 {{-
   $parentRefs := $routeScope.parentRefs |
     default nil |
     required "A valid .parentRefs mapping is required."
 -}}
-{{- $serviceName := include "generic-api-service.service-name" $globalScope -}}
-apiVersion: {{ $httpRouteApiVersion }}
+apiVersion: {{ $context.httpRouteApiVersion }}
 kind: HTTPRoute
 metadata:
   {{- with $routeScope.annotations }}
@@ -18,8 +18,8 @@ metadata:
     {{- toYaml . | nindent 4 }}
   {{- end }}
   labels:
-    {{- include "generic-api-service.labels" $globalScope | nindent 4 }}
-  name: {{ $routeScope.name | default (include "generic-api-service.full-name" $globalScope) }}
+    {{- $context.labels | nindent 4 }}
+  name: {{ $routeScope.name | default $context.fullName }}
 spec:
   parentRefs:
   {{- range $parentRefs }}
@@ -51,7 +51,7 @@ spec:
     {{- range .backendRefs }}
     - group: {{ .group | default "" | quote }}
       kind: {{ .kind | default "Service" }}
-      name: {{ .name | default $serviceName }}
+      name: {{ .name | default $context.serviceName }}
       port: {{ include "generic-api-service.service-port-number" (list $globalScope .portName) }}
       weight: {{ if hasKey . "weight" }}{{ .weight }}{{ else }}1{{ end }}
     {{- end }}
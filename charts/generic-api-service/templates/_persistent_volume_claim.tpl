@@ -4,7 +4,8 @@
 {{- $pvcScope := index . 2 -}}
 
 {{- if $pvcScope.create -}}
-{{- $fullName := include "generic-api-service.full-name" $globalScope -}}
+{{- include "generic-api-service.context" $globalScope -}}
+{{- $context := $globalScope.genericApiServiceContext -}}
 apiVersion: v1
 kind: PersistentVolumeClaim
 metadata:
@@ -13,8 +14,8 @@ metadata:
     {{- toYaml . | nindent 4 }}
   {{- end }}
   labels:
-    {{- include "generic-api-service.labels" $globalScope | nindent 4 }}
-  name: {{ $pvcScope.name | default (printf "%s-%s" $fullName $id) }}
+    {{- $context.labels | nindent 4 }}
+  name: {{ $pvcScope.name | default (printf "%s-%s" $context.fullName $id) }}
 spec:
   {{- $pvcScope.spec | default dict | toYaml | nindent 2 }}
 {{- end }}
@@ -0,0 +1,17 @@
+from helm_charts_dev.helm_runner import HelmRunner
+from helm_charts_dev.manifests import Manifests, load_yaml
+from helm_charts_dev.render_cache import RenderCache
+from helm_charts_dev.render_pool import RenderPool
+from helm_charts_dev.types import RenderRequest, Values
+from helm_charts_dev.values_schema import ValuesSchemaError
+
+__all__ = [
+    "HelmRunner",
+    "Manifests",
+    "RenderCache",
+    "RenderPool",
+    "RenderRequest",
+    "Values",
+    "ValuesSchemaError",
+    "load_yaml",
+]
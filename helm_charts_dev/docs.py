@@ -0,0 +1,460 @@
+"""
+Generate chart READMEs from README.md.gotmpl, Chart.yaml, values.yaml and
+values.schema.json the way helm-docs (run with --document-dependency-values) does,
+without docker or network access.
+
+Values are documented by `# --` comments directly above their keys, optionally
+prefixed with a `(type)` and followed by continuation lines and an
+`@default -- <text>` line. A value without a comment falls back to the description
+in values.schema.json. Only the parts of the Go template language that READMEs use
+are supported: `{{ template "chart.<name>" . }}` of helm-docs' built-in templates,
+`{{ .<Field> }}` of Chart.yaml fields and comments.
+
+Usage: python -m helm_charts_dev.docs [--check] [DIRECTORY ...]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import yaml
+
+README_FILE_NAME = "README.md"
+TEMPLATE_FILE_NAME = "README.md.gotmpl"
+
+_IGNORED_DIRECTORIES = {".git", "__pycache__", "node_modules", "venv"}
+
+# The comment formats understood by helm-docs.
+_DEFAULT_PATTERN = re.compile(r"^\s*# @default -- (.*)$")
+_DESCRIPTION_PATTERN = re.compile(r"^\s*#\s*(.*)\s+--\s*(.*)$")
+_CONTINUATION_PATTERN = re.compile(r"^\s*#(\s?)(.*)$")
+_IGNORED_TAG_PATTERN = re.compile(r"^\s*#\s+@(notationType|section)\s+--\s+(.*)$")
+_RAW_PATTERN = re.compile(r"^\s*#\s+@raw")
+_TYPE_PATTERN = re.compile(r"^\((.*?)\)\s*(.*)$")
+
+_ACTION_PATTERN = re.compile(r"{{(-?)\s*(.*?)\s*(-?)}}", re.DOTALL)
+_FIELD_PATTERN = re.compile(r"^\.(?P<field>[A-Za-z]+)$")
+_TEMPLATE_PATTERN = re.compile(r'^template\s+"(?P<name>[^"]+)"\s+\.$')
+
+
+@dataclass
+class ValueDescription:
+    default: str = ""
+    description: str = ""
+    # Descriptions from values.schema.json only fill in the description of values
+    # that are documented anyway, they don't change which values are documented.
+    from_schema: bool = False
+    type: str = ""
+
+
+@dataclass
+class ValueRow:
+    key: str
+    type: str
+    default: str
+    description: str
+
+
+def generate_readme(directory: Path) -> str:
+    """
+    Render the README.md.gotmpl in the given directory. The directory needn't be a
+    chart; Chart.yaml and values.yaml are optional.
+    """
+    chart_yaml = _load_yaml_file(directory.joinpath("Chart.yaml"))
+    template = directory.joinpath(TEMPLATE_FILE_NAME).read_text(encoding="utf-8")
+    readme = _render_template(template, chart_yaml, lambda: value_rows(directory))
+    # helm-docs' final markdown formatting.
+    return re.sub(r"\n{3,}", "\n\n", readme.replace(" \n", "\n"))
+
+
+def value_rows(chart_path: Path) -> List[ValueRow]:
+    """
+    The rows of the values table of the chart, including the values of dependencies
+    vendored as directories under charts/, sorted by key.
+    """
+    rows = {row.key: row for row in _chart_value_rows(chart_path)}
+    chart_yaml = _load_yaml_file(chart_path.joinpath("Chart.yaml"))
+    for dependency in chart_yaml.get("dependencies") or []:
+        dependency_path = chart_path.joinpath("charts", dependency["name"])
+        if not dependency_path.joinpath("Chart.yaml").is_file():
+            continue
+        prefix = dependency.get("alias") or dependency["name"]
+        for row in value_rows(dependency_path):
+            row.key = f"{prefix}.{row.key}"
+            rows.setdefault(row.key, row)
+    return sorted(rows.values(), key=lambda row: row.key)
+
+
+def template_directories(root: Path) -> Iterator[Path]:
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(set(dir_names) - _IGNORED_DIRECTORIES)
+        if TEMPLATE_FILE_NAME in file_names:
+            yield Path(dir_path)
+
+
+def update_readmes(directories: Sequence[Path], check: bool = False) -> List[Path]:
+    """
+    Regenerate the README of each of the given directories, only writing those whose
+    content changed, and return the paths of the changed READMEs. With check, no
+    README is written.
+    """
+    changed_paths = []
+    for directory in directories:
+        readme_path = directory.joinpath(README_FILE_NAME)
+        readme = generate_readme(directory)
+        try:
+            if readme_path.read_text(encoding="utf-8") == readme:
+                continue
+        except FileNotFoundError:
+            pass
+        changed_paths.append(readme_path)
+        if not check:
+            readme_path.write_text(readme, encoding="utf-8")
+    return changed_paths
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m helm_charts_dev.docs",
+        description="Generate READMEs from README.md.gotmpl files.",
+    )
+    parser.add_argument(
+        "directories",
+        help=(
+            "The directories holding a README.md.gotmpl. Defaults to every such"
+            " directory under the current directory."
+        ),
+        metavar="DIRECTORY",
+        nargs="*",
+        type=Path,
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Don't write READMEs, fail if any is out of date instead.",
+    )
+    args = parser.parse_args(argv)
+
+    directories = args.directories or list(template_directories(Path.cwd()))
+    changed_paths = update_readmes(directories, check=args.check)
+    for changed_path in changed_paths:
+        if args.check:
+            print(f"{changed_path} is out of date", file=sys.stderr)
+        else:
+            print(f"Updated {changed_path}")
+    return 1 if args.check and changed_paths else 0
+
+
+def _chart_value_rows(chart_path: Path) -> List[ValueRow]:
+    values_path = chart_path.joinpath("values.yaml")
+    if not values_path.is_file():
+        return []
+    values_lines = values_path.read_text(encoding="utf-8").splitlines()
+    loader = yaml.SafeLoader("\n".join(values_lines))
+    try:
+        root = loader.get_single_node()
+        if not isinstance(root, yaml.MappingNode):
+            return []
+        schema = _load_json_file(chart_path.joinpath("values.schema.json"))
+        descriptions = dict(_node_descriptions(root, "", values_lines, schema))
+        return _object_rows(root, "", descriptions, loader, document_leaves=True)
+    finally:
+        loader.dispose()
+
+
+def _node_descriptions(
+    node: yaml.Node,
+    prefix: str,
+    values_lines: List[str],
+    schema: Dict[str, Any],
+) -> Iterator[Tuple[str, ValueDescription]]:
+    children: List[Tuple[str, yaml.Node, yaml.Node, Dict[str, Any]]] = []
+    if isinstance(node, yaml.MappingNode):
+        properties = schema.get("properties") or {}
+        for key_node, value_node in node.value:
+            children.append(
+                (
+                    _object_key(prefix, key_node.value),
+                    key_node,
+                    value_node,
+                    properties.get(key_node.value) or {},
+                )
+            )
+    elif isinstance(node, yaml.SequenceNode):
+        items = schema.get("items")
+        for index, item_node in enumerate(node.value):
+            children.append(
+                (
+                    f"{prefix}[{index}]",
+                    item_node,
+                    item_node,
+                    items if isinstance(items, dict) else {},
+                )
+            )
+
+    for key, comment_node, value_node, child_schema in children:
+        description = _comment_description(
+            _head_comment(values_lines, comment_node.start_mark.line)
+        )
+        if description is None and child_schema.get("description"):
+            description = ValueDescription(
+                description=child_schema["description"],
+                from_schema=True,
+            )
+        if description is not None:
+            yield key, description
+        yield from _node_descriptions(value_node, key, values_lines, child_schema)
+
+
+def _head_comment(values_lines: List[str], line_index: int) -> List[str]:
+    """
+    The block of comment lines directly above the given line, without indentation.
+    """
+    start_index = line_index
+    while start_index > 0 and values_lines[start_index - 1].lstrip().startswith("#"):
+        start_index -= 1
+    return [line.lstrip() for line in values_lines[start_index:line_index]]
+
+
+def _comment_description(comment_lines: List[str]) -> Optional[ValueDescription]:
+    if not any(line.startswith("# --") for line in comment_lines):
+        return None
+    # Like helm-docs, only consider the last group of lines starting with `# --`.
+    start_index = max(
+        index for index, line in enumerate(comment_lines) if line.startswith("# --")
+    )
+    comment_lines = comment_lines[start_index:]
+    match = _DESCRIPTION_PATTERN.match(comment_lines[0])
+    if match is None or match[1]:
+        # Comments naming the key they document, e.g. `# key -- description`, aren't
+        # supported.
+        return None
+
+    value_description = ValueDescription(description=match[2])
+    type_match = _TYPE_PATTERN.match(value_description.description)
+    if type_match and type_match[1]:
+        value_description.type = type_match[1]
+        value_description.description = type_match[2]
+
+    raw = False
+    for line in comment_lines[1:]:
+        if not raw and _RAW_PATTERN.match(line):
+            raw = True
+            continue
+        default_match = _DEFAULT_PATTERN.match(line)
+        if default_match:
+            value_description.default = default_match[1]
+            continue
+        if _IGNORED_TAG_PATTERN.match(line):
+            continue
+        continuation_match = _CONTINUATION_PATTERN.match(line)
+        if continuation_match:
+            separator = "\n" if raw else " "
+            value_description.description += separator + continuation_match[2]
+    return value_description
+
+
+def _object_rows(
+    node: yaml.MappingNode,
+    prefix: str,
+    descriptions: Dict[str, ValueDescription],
+    loader: yaml.SafeLoader,
+    document_leaves: bool,
+) -> List[ValueRow]:
+    rows = []
+    for key_node, value_node in node.value:
+        rows += _field_rows(
+            value_node,
+            _object_key(prefix, key_node.value),
+            descriptions,
+            loader,
+            document_leaves,
+        )
+    return rows
+
+
+def _field_rows(
+    node: yaml.Node,
+    key: str,
+    descriptions: Dict[str, ValueDescription],
+    loader: yaml.SafeLoader,
+    document_leaves: bool,
+) -> List[ValueRow]:
+    description = descriptions.get(key)
+    documented = description is not None and not description.from_schema
+    if isinstance(node, (yaml.MappingNode, yaml.SequenceNode)) and node.value:
+        rows = []
+        # A documented collection is documented as a whole, so values nested in it
+        # are only documented when they have their own description.
+        if description is not None and documented:
+            rows.append(_value_row(key, node, description, loader))
+            document_leaves = False
+        if isinstance(node, yaml.MappingNode):
+            return rows + _object_rows(node, key, descriptions, loader, document_leaves)
+        for index, item_node in enumerate(node.value):
+            rows += _field_rows(
+                item_node,
+                f"{key}[{index}]",
+                descriptions,
+                loader,
+                document_leaves,
+            )
+        return rows
+
+    if not documented and not document_leaves:
+        return []
+    return [_value_row(key, node, description or ValueDescription(), loader)]
+
+
+def _value_row(
+    key: str,
+    node: yaml.Node,
+    description: ValueDescription,
+    loader: yaml.SafeLoader,
+) -> ValueRow:
+    value = loader.construct_object(node, deep=True)
+    return ValueRow(
+        key=key,
+        type=description.type or _type_name(value),
+        default=description.default or f"`{_go_json(value)}`",
+        description=description.description,
+    )
+
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "list"
+    return "string"
+
+
+def _go_json(value: Any) -> str:
+    """
+    Encode the value as JSON the way Go's encoding/json does: compactly, with sorted
+    keys, integral floats without a fraction and HTML characters escaped.
+    """
+    if value is None:
+        return "nil"
+    encoded = json.dumps(
+        _jsonable(value),
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    for character, escaped in [("&", "\\u0026"), ("<", "\\u003c"), (">", "\\u003e")]:
+        encoded = encoded.replace(character, escaped)
+    return encoded
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e21:
+        return int(value)
+    if not isinstance(value, (bool, float, int, str)) and value is not None:
+        # e.g. dates and timestamps.
+        return str(value)
+    return value
+
+
+def _object_key(prefix: str, key: str) -> str:
+    if "." in key or " " in key:
+        key = f'"{key}"'
+    return f"{prefix}.{key}" if prefix else key
+
+
+def _render_template(
+    template: str,
+    chart_yaml: Dict[str, Any],
+    rows: Callable[[], List[ValueRow]],
+) -> str:
+    fields = {
+        "".join(key[:1].upper() + key[1:]): value for key, value in chart_yaml.items()
+    }
+
+    def values_table() -> str:
+        return (
+            "| Key | Type | Default | Description |\n"
+            "|-----|------|---------|-------------|\n"
+            + "".join(
+                f"| {row.key} | {row.type} | {row.default} | {row.description} |\n"
+                for row in rows()
+            )
+        )
+
+    def values_section() -> str:
+        return f"## Values\n\n{values_table()}" if rows() else ""
+
+    named_templates: Dict[str, Callable[[], str]] = {
+        "chart.appVersion": lambda: str(fields.get("AppVersion") or ""),
+        "chart.description": lambda: str(fields.get("Description") or ""),
+        "chart.header": lambda: f"# {fields.get('Name') or ''}\n",
+        "chart.homepage": lambda: (
+            f"**Homepage:** <{fields['Home']}>" if fields.get("Home") else ""
+        ),
+        "chart.name": lambda: str(fields.get("Name") or ""),
+        "chart.type": lambda: str(fields.get("Type") or ""),
+        "chart.valuesHeader": lambda: "## Values",
+        "chart.valuesSection": values_section,
+        "chart.valuesTable": values_table,
+        "chart.version": lambda: str(fields.get("Version") or ""),
+    }
+
+    output = []
+    position = 0
+    for match in _ACTION_PATTERN.finditer(template):
+        text = template[position : match.start()]
+        output.append(text.rstrip() if match[1] else text)
+        position = match.end()
+        if match[3]:
+            position += len(template[position:]) - len(template[position:].lstrip())
+
+        action = match[2]
+        template_match = _TEMPLATE_PATTERN.match(action)
+        field_match = _FIELD_PATTERN.match(action)
+        if action.startswith("/*") and action.endswith("*/"):
+            continue
+        if template_match and template_match["name"] in named_templates:
+            output.append(named_templates[template_match["name"]]())
+        elif field_match:
+            output.append(str(fields.get(field_match["field"]) or ""))
+        else:
+            raise ValueError(f"Unsupported template action: {match[0]}")
+    output.append(template[position:])
+    return "".join(output)
+
+
+def _load_json_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            loaded = json.load(file)
+    except FileNotFoundError:
+        return {}
+    return loaded if isinstance(loaded, dict) else {}
+
+
+def _load_yaml_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            loaded = yaml.safe_load(file)
+    except FileNotFoundError:
+        return {}
+    return loaded if isinstance(loaded, dict) else {}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,617 @@
+import hashlib
+import json
+import re
+from os import path
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory, gettempdir
+from threading import Lock, get_ident, local
+from time import perf_counter
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Set, cast
+
+from filelock import FileLock
+from pytest_helm_templates import HelmRunner as BaseHelmRunner
+from pytest_helm_templates.commands import TemplateCommand
+
+from helm_charts_dev.manifests import Manifests
+from helm_charts_dev.render_cache import RenderCache, chart_digest, file_digest
+from helm_charts_dev.render_pool import RenderPool
+from helm_charts_dev.render_profile import RenderProfiler, RenderSample
+from helm_charts_dev.template_graph import (
+    TemplateGraph,
+    referenced_templates,
+    template_graph,
+)
+from helm_charts_dev.types import RenderRequest, Values
+from helm_charts_dev.umbrella import (
+    batch_aliases,
+    split_umbrella_output,
+    umbrella_chart,
+    umbrella_values,
+)
+from helm_charts_dev.values_schema import validate_values
+
+# Helm refuses to render a --show-only template that renders nothing.
+_EMPTY_TEMPLATE_PATTERN = re.compile(r"could not find template (?P<template>\S+) in")
+
+# Called with the resolved path of the chart of every render and the template files
+# (or, for adhoc templates, the named templates) it rendered, or None if it rendered
+# every template of the chart.
+RenderListener = Callable[[Path, Optional[Set[str]]], None]
+
+_render_listeners: List[RenderListener] = []
+
+
+def add_render_listener(listener: RenderListener) -> None:
+    """
+    Register a function to be told about every render of every HelmRunner, whether
+    or not it is served from a render cache.
+    """
+    _render_listeners.append(listener)
+
+
+def remove_render_listener(listener: RenderListener) -> None:
+    _render_listeners.remove(listener)
+
+
+_render_profilers: List[RenderProfiler] = []
+
+
+def add_render_profiler(profiler: RenderProfiler) -> None:
+    """
+    Register a profiler to be given a sample of the cost of every render of every
+    HelmRunner.
+    """
+    _render_profilers.append(profiler)
+
+
+def remove_render_profiler(profiler: RenderProfiler) -> None:
+    _render_profilers.remove(profiler)
+
+
+class HelmRunner(BaseHelmRunner):
+    """
+    A HelmRunner that can consult a RenderCache before invoking `helm template`, so
+    renders of an unchanged chart with the same release name and values are only
+    paid for once, and that can render batches of requests concurrently on a pool
+    of render workers.
+
+    It is also safe to share the charts directory with other runners, in other
+    threads or processes (e.g. pytest-xdist workers): dependency updates are
+    serialized by a file lock and adhoc templates are written to a private scratch
+    copy of the chart rather than to the chart itself.
+
+    Unless created without schema_validation, values are validated against the
+    values.schema.json of local charts before helm is invoked, so invalid values fail
+    with helm's error message without paying for a helm process.
+    """
+
+    def __init__(
+        self,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        render_cache: Optional[RenderCache] = None,
+        render_workers: int = 0,
+        schema_validation: bool = True,
+    ) -> None:
+        super().__init__(cwd=cwd, env=env)
+        self.render_cache = render_cache
+        self.schema_validation = schema_validation
+        self._helm_version: Optional[str] = None
+        # The sample of the render each thread last made, if it is being profiled.
+        self._profile = local()
+        self._scratch_dir: Optional[TemporaryDirectory] = None
+        self._scratch_lock = Lock()
+        self._render_pool = (
+            RenderPool(
+                render=self.render,
+                warm_up=self._warm_up,
+                workers=render_workers,
+            )
+            if render_workers > 0
+            else None
+        )
+
+    def close(self) -> None:
+        if self._render_pool is not None:
+            self._render_pool.close()
+        if self._scratch_dir is not None:
+            self._scratch_dir.cleanup()
+            self._scratch_dir = None
+
+    @property
+    def helm_version(self) -> str:
+        if self._helm_version is None:
+            self._helm_version = self._run(["helm", "version", "--short"]).strip()
+        return self._helm_version
+
+    def adhoc_template(
+        self,
+        chart: str,
+        content: str,
+        name: str,
+        api_versions: Optional[List[str]] = None,
+        dry_run: Optional[str] = None,
+        include_crds: Optional[bool] = None,
+        is_upgrade: Optional[bool] = None,
+        kube_version: Optional[str] = None,
+        namespace: Optional[str] = None,
+        repo: Optional[str] = None,
+        skip_tests: Optional[bool] = None,
+        values: Optional[Values] = None,
+        version: Optional[str] = None,
+    ) -> Dict:
+        chart_path = self._chart_path(chart)
+        if not path.exists(chart_path):
+            raise ValueError(
+                "Adhoc templates can only be rendered for local charts. Could"
+                f" not find local chart `{chart}` ({str(chart_path)})"
+            )
+
+        options: Dict[str, Any] = {
+            "api_versions": api_versions,
+            "dry_run": dry_run,
+            "include_crds": include_crds,
+            "is_upgrade": is_upgrade,
+            "kube_version": kube_version,
+            "name": name,
+            "namespace": namespace,
+            "repo": repo,
+            "skip_tests": skip_tests,
+            "version": version,
+        }
+
+        def run_adhoc_template() -> str:
+            scratch_chart_path = self._scratch_chart_path(chart)
+            with NamedTemporaryFile(
+                dir=scratch_chart_path.joinpath("templates"),
+                encoding="utf-8",
+                mode="w",
+            ) as temp_file:
+                temp_file.write(content)
+                temp_file.flush()
+                show_only = [f"templates/{path.basename(temp_file.name)}"]
+                return self._run_template(
+                    chart=str(scratch_chart_path),
+                    options=options | {"show_only": show_only},
+                    values=values,
+                )
+
+        templates_yaml = self._render(
+            chart=chart,
+            options=options,
+            values=values,
+            run=run_adhoc_template,
+            adhoc_content=content,
+        )
+        manifests = self.load_manifests(templates_yaml)
+        return manifests[0]
+
+    def dependency_update_if_missing(self, chart: str) -> None:
+        """
+        Like the base implementation, but holds a lock on the chart for the duration,
+        so only the first of several concurrent processes updates the dependencies
+        and the others find them already in place.
+        """
+        chart_path = self._chart_path(chart).resolve()
+        chart_path_digest = hashlib.sha256(str(chart_path).encode("utf-8")).hexdigest()
+        lock_path = Path(gettempdir()).joinpath(
+            f"helm-dependency-update-{chart_path_digest[:16]}.lock"
+        )
+        with FileLock(lock_path):
+            super().dependency_update_if_missing(chart=chart)
+
+    def render(self, request: RenderRequest) -> List[Dict]:
+        return self.template(
+            chart=request.chart,
+            name=request.name,
+            namespace=request.namespace,
+            show_only=request.show_only,
+            values=request.values,
+        )
+
+    def render_templates(
+        self,
+        chart: str,
+        name: str,
+        kinds: Optional[Sequence[str]] = None,
+        namespace: Optional[str] = None,
+        templates: Optional[Sequence[str]] = None,
+        values: Optional[Values] = None,
+    ) -> List[Dict]:
+        """
+        Render only the given template files of a local chart, plus any that can
+        render a resource of one of the given kinds, so helm doesn't spend time on
+        (and Python doesn't parse) templates the caller will discard. When kinds are
+        given, only manifests of those kinds are returned.
+
+        Templates that render nothing are skipped rather than failing the render, so
+        asking for a kind the values don't enable returns an empty list.
+        """
+        show_only = list(dict.fromkeys(templates or []))
+        if kinds:
+            for template in self.template_graph(chart).templates_for_kinds(kinds):
+                if template not in show_only:
+                    show_only.append(template)
+        if not show_only:
+            raise ValueError("At least one template or kind must be given")
+
+        while show_only:
+            try:
+                templates_yaml = self.template_output(
+                    chart=chart,
+                    name=name,
+                    namespace=namespace,
+                    show_only=show_only,
+                    values=values,
+                )
+                break
+            except RuntimeError as error:
+                empty_template = _EMPTY_TEMPLATE_PATTERN.search(str(error))
+                if not empty_template or empty_template["template"] not in show_only:
+                    raise
+                # Helm only reports the first empty template, so retry without it.
+                show_only.remove(empty_template["template"])
+        else:
+            return []
+
+        parse_start = perf_counter()
+        manifests = Manifests(templates_yaml)
+        rendered = []
+        for index in range(len(manifests)):
+            # Documents of other kinds can be skipped without being parsed.
+            kind = manifests.kind(index)
+            if kinds and kind is not None and kind not in kinds:
+                continue
+            manifest = manifests[index]
+            if manifest is not None and (not kinds or manifest.get("kind") in kinds):
+                rendered.append(manifest)
+        self._profile_parse(perf_counter() - parse_start)
+        return rendered
+
+    def template(
+        self,
+        chart: str,
+        name: str,
+        api_versions: Optional[List[str]] = None,
+        dry_run: Optional[str] = None,
+        include_crds: Optional[bool] = None,
+        is_upgrade: Optional[bool] = None,
+        kube_version: Optional[str] = None,
+        namespace: Optional[str] = None,
+        repo: Optional[str] = None,
+        show_only: Optional[List[str]] = None,
+        skip_tests: Optional[bool] = None,
+        values: Optional[Values] = None,
+        version: Optional[str] = None,
+    ) -> List[Dict]:
+        templates_yaml = self.template_output(
+            api_versions=api_versions,
+            chart=chart,
+            dry_run=dry_run,
+            include_crds=include_crds,
+            is_upgrade=is_upgrade,
+            kube_version=kube_version,
+            name=name,
+            namespace=namespace,
+            repo=repo,
+            show_only=show_only,
+            skip_tests=skip_tests,
+            values=values,
+            version=version,
+        )
+        return self.load_manifests(templates_yaml)
+
+    def template_output(
+        self,
+        chart: str,
+        name: str,
+        api_versions: Optional[List[str]] = None,
+        dry_run: Optional[str] = None,
+        include_crds: Optional[bool] = None,
+        is_upgrade: Optional[bool] = None,
+        kube_version: Optional[str] = None,
+        namespace: Optional[str] = None,
+        repo: Optional[str] = None,
+        show_only: Optional[List[str]] = None,
+        skip_tests: Optional[bool] = None,
+        values: Optional[Values] = None,
+        version: Optional[str] = None,
+    ) -> str:
+        """
+        Like template, but returns the raw, multi-document YAML output of helm.
+        """
+        options: Dict[str, Any] = {
+            "api_versions": api_versions,
+            "dry_run": dry_run,
+            "include_crds": include_crds,
+            "is_upgrade": is_upgrade,
+            "kube_version": kube_version,
+            "name": name,
+            "namespace": namespace,
+            "repo": repo,
+            "show_only": show_only,
+            "skip_tests": skip_tests,
+            "version": version,
+        }
+        return self._render(
+            chart=chart,
+            options=options,
+            values=values,
+            run=lambda: self._run_template(
+                chart=chart,
+                options=options,
+                values=values,
+            ),
+        )
+
+    def template_batch(
+        self,
+        chart: str,
+        name: str,
+        values: Sequence[Optional[Values]],
+        namespace: Optional[str] = None,
+        show_only: Optional[List[str]] = None,
+    ) -> List[List[Dict]]:
+        """
+        Render a local chart once per set of values, but in a single helm process, by
+        declaring the chart as an aliased dependency of a throwaway umbrella chart once
+        per set of values. Returns the manifests of each set in the same order as the
+        given values.
+
+        Every set is rendered with the same release name and namespace, and since
+        helm renames aliased charts, `.Chart.Name` is an alias in batch renders.
+        """
+        aliases = batch_aliases(len(values))
+        with umbrella_chart(self._chart_path(chart), aliases) as umbrella_path:
+            templates_yaml = self.template_output(
+                chart=str(umbrella_path),
+                name=name,
+                namespace=namespace,
+                values=umbrella_values(aliases, values, cwd=self.cwd),
+            )
+
+        self._notify_render_listeners(chart=chart, templates=show_only)
+        documents_by_alias = split_umbrella_output(templates_yaml)
+        return [
+            [
+                manifest
+                for template_path, document in documents_by_alias.get(alias, [])
+                if not show_only or template_path in show_only
+                for manifest in self.load_manifests(document)
+            ]
+            for alias in aliases
+        ]
+
+    def template_graph(self, chart: str) -> TemplateGraph:
+        return template_graph(self._chart_path(chart))
+
+    def template_many(self, requests: Sequence[RenderRequest]) -> List[List[Dict]]:
+        """
+        Render each of the given requests, returning their manifests in the same
+        order as the requests. Requests are rendered concurrently when the runner was
+        created with render workers.
+        """
+        if self._render_pool is None:
+            return [self.render(request) for request in requests]
+        return self._render_pool.map(requests)
+
+    def load_manifests(self, templates_yaml: str) -> List[Dict]:
+        parse_start = perf_counter()
+        manifests = list(Manifests(templates_yaml))
+        self._profile_parse(perf_counter() - parse_start)
+        return cast(List[Dict], manifests)
+
+    def _chart_path(self, chart: str) -> Path:
+        return Path(chart) if not self.cwd else Path(self.cwd).joinpath(chart)
+
+    def _render(
+        self,
+        chart: str,
+        options: Dict[str, Any],
+        values: Optional[Values],
+        run: Callable[[], str],
+        adhoc_content: Optional[str] = None,
+    ) -> str:
+        self._notify_render_listeners(
+            chart=chart,
+            templates=(
+                options.get("show_only")
+                if adhoc_content is None
+                else referenced_templates(adhoc_content)
+            ),
+        )
+        sample = RenderSample(chart=chart) if _render_profilers else None
+        self._profile.sample = sample
+        start = perf_counter()
+        try:
+            templates_yaml = self._render_cached(
+                chart=chart,
+                options=options,
+                values=values,
+                run=run,
+                adhoc_content=adhoc_content,
+            )
+        except Exception:
+            if sample is not None:
+                sample.failed = True
+            raise
+        else:
+            if sample is not None:
+                sample.output_bytes = len(templates_yaml.encode("utf-8"))
+        finally:
+            if sample is not None:
+                sample.wall_seconds = perf_counter() - start
+                for profiler in list(_render_profilers):
+                    profiler.add(sample)
+        return templates_yaml
+
+    def _render_cached(
+        self,
+        chart: str,
+        options: Dict[str, Any],
+        values: Optional[Values],
+        run: Callable[[], str],
+        adhoc_content: Optional[str],
+    ) -> str:
+        sample: Optional[RenderSample] = self._profile.sample
+        cache_key = self._render_cache_key(
+            adhoc_content=adhoc_content,
+            chart=chart,
+            options=options,
+            values=values,
+        )
+        if self.render_cache is None or cache_key is None:
+            self._validate_values(chart=chart, options=options, values=values)
+            return run()
+
+        cached_templates_yaml = self.render_cache.get(cache_key)
+        if sample is not None:
+            sample.cache = "miss" if cached_templates_yaml is None else "hit"
+        if cached_templates_yaml is not None:
+            return cached_templates_yaml
+
+        self._validate_values(chart=chart, options=options, values=values)
+        templates_yaml = run()
+        self.render_cache.put(cache_key, templates_yaml)
+        return templates_yaml
+
+    def _profile_parse(self, parse_seconds: float) -> None:
+        # Output is parsed by the thread that rendered it, right after rendering.
+        sample: Optional[RenderSample] = getattr(self._profile, "sample", None)
+        if sample is not None:
+            sample.parse_seconds += parse_seconds
+
+    def _notify_render_listeners(
+        self,
+        chart: str,
+        templates: Optional[Sequence[str] | Set[str]],
+    ) -> None:
+        if not _render_listeners:
+            return
+        chart_path = self._chart_path(chart).resolve()
+        for listener in list(_render_listeners):
+            listener(chart_path, set(templates) if templates else None)
+
+    def _render_cache_key(
+        self,
+        chart: str,
+        options: Dict[str, Any],
+        values: Optional[Values],
+        adhoc_content: Optional[str] = None,
+    ) -> Optional[str]:
+        chart_path = self._chart_path(chart)
+        # Only local charts can be content addressed.
+        if self.render_cache is None or options["repo"] or not chart_path.is_dir():
+            return None
+
+        canonical_values = []
+        for values_instance in values or []:
+            if isinstance(values_instance, str):
+                values_path = Path(self.cwd or ".").joinpath(values_instance)
+                canonical_values.append(f"file:{file_digest(values_path)}")
+            else:
+                canonical_values.append(
+                    json.dumps(values_instance, default=str, sort_keys=True)
+                )
+
+        return self.render_cache.key(
+            self.helm_version,
+            chart_digest(chart_path),
+            json.dumps(options, sort_keys=True),
+            json.dumps(canonical_values),
+            json.dumps(self.env, sort_keys=True),
+            adhoc_content or "",
+        )
+
+    def _run_template(
+        self,
+        chart: str,
+        options: Dict[str, Any],
+        values: Optional[Values],
+    ) -> str:
+        _values = []
+        temp_files: List[IO] = []
+        try:
+            for values_instance in values or []:
+                if isinstance(values_instance, str):
+                    _values.append(values_instance)
+                else:
+                    temp_file_path, temp_file = self._reify_values(values_instance)
+                    _values.append(temp_file_path)
+                    temp_files.append(temp_file)
+            helm_arguments = TemplateCommand.helm_arguments(
+                chart=str(self._chart_path(chart)),
+                values=_values,
+                **options,
+            )
+            sample: Optional[RenderSample] = getattr(self._profile, "sample", None)
+            if sample is not None:
+                sample.command = helm_arguments
+            return self._run(helm_arguments)
+        finally:
+            for temp_file in temp_files:
+                temp_file.close()
+
+    def _scratch_chart_path(self, chart: str) -> Path:
+        """
+        Return a private copy of the given local chart that adhoc templates can be
+        written to without them being picked up by renders of the real chart, nor by
+        concurrent adhoc renders, since each thread gets a copy of its own. The
+        copy is made of symlinks to the real chart, except for its templates
+        directory, which is a real directory of symlinks to each of the real
+        templates. The templates are re-synced on every call, so the copy follows
+        templates being added or removed.
+        """
+        chart_path = self._chart_path(chart).resolve()
+        with self._scratch_lock:
+            if self._scratch_dir is None:
+                self._scratch_dir = TemporaryDirectory(prefix="helm-scratch-")
+            scratch_chart_path = Path(self._scratch_dir.name).joinpath(
+                hashlib.sha256(str(chart_path).encode("utf-8")).hexdigest()[:16],
+                str(get_ident()),
+                chart_path.name,
+            )
+            scratch_templates_path = scratch_chart_path.joinpath("templates")
+            if not scratch_chart_path.exists():
+                scratch_templates_path.mkdir(parents=True)
+                for entry_path in chart_path.iterdir():
+                    if entry_path.name != "templates":
+                        scratch_chart_path.joinpath(entry_path.name).symlink_to(
+                            entry_path
+                        )
+
+            templates_path = chart_path.joinpath("templates")
+            template_names = {entry.name for entry in templates_path.iterdir()}
+            for scratch_entry_path in scratch_templates_path.iterdir():
+                if (
+                    scratch_entry_path.is_symlink()
+                    and scratch_entry_path.name not in template_names
+                ):
+                    scratch_entry_path.unlink()
+            for template_name in template_names:
+                scratch_entry_path = scratch_templates_path.joinpath(template_name)
+                if not scratch_entry_path.is_symlink():
+                    scratch_entry_path.symlink_to(
+                        templates_path.joinpath(template_name)
+                    )
+        return scratch_chart_path
+
+    def _validate_values(
+        self,
+        chart: str,
+        options: Dict[str, Any],
+        values: Optional[Values],
+    ) -> None:
+        # Only local charts can be validated before helm is invoked.
+        chart_path = self._chart_path(chart)
+        if self.schema_validation and not options["repo"] and chart_path.is_dir():
+            validate_values(chart_path, values, cwd=self.cwd)
+
+    def _warm_up(self) -> None:
+        # Resolving the helm version runs the helm binary once, so the first real
+        # render doesn't also pay for paging it in.
+        self.helm_version
+        if self.cwd:
+            for chart_path in Path(self.cwd).iterdir():
+                if chart_path.joinpath("Chart.yaml").is_file():
+                    chart_digest(chart_path)
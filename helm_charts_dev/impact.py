@@ -0,0 +1,213 @@
+"""
+Test impact analysis: records which template files and named templates of which
+charts each test module renders, so that after a change only the test modules that
+could be affected by it need to run again.
+
+A module's record is only kept while every one of its tests passes. A module is
+affected by a change when it has no record, when the module itself or any other
+Python file under the rootdir changed, when a file of a chart it renders that isn't
+a template changed (e.g. values.yaml or Chart.yaml), when a template file of such a
+chart was added or removed, or when a template file it renders, or one defining a
+named template it (transitively) includes, changed.
+
+Modules that render no chart under the rootdir may still read chart files directly,
+e.g. values.yaml through the chart_values fixture or a README through
+helm_charts_dev.docs, which renders don't reveal. Such modules depend on every file
+of every chart under the rootdir, and on the set of charts itself.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from helm_charts_dev.render_cache import file_digest
+from helm_charts_dev.template_graph import template_graph
+
+# Recorded for a chart when a module rendered every one of its templates.
+ALL_TEMPLATES = "*"
+
+_IGNORED_DIRECTORIES = {"__pycache__", "build", "dist", "node_modules", "venv"}
+
+ModuleRecord = Dict[str, Any]
+
+
+class ImpactRecorder:
+    """
+    Collects, per test module, the templates of each chart rendered while the module
+    was running. Register its record method as a render listener of HelmRunner.
+    Renders of charts outside of the root directory, e.g. of charts created by a
+    test, aren't recorded.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        # The number of tests collected and completed per module, the modules with
+        # a failed test and the module currently running.
+        self.collected: Dict[str, int] = {}
+        self.completed: Dict[str, int] = {}
+        self.failed: Set[str] = set()
+        self.module: Optional[str] = None
+        self.renders: Dict[str, Dict[str, Set[str]]] = {}
+        self._lock = Lock()
+
+    def record(self, chart_path: Path, templates: Optional[Set[str]]) -> None:
+        module = self.module
+        if module is None:
+            return
+        try:
+            chart = chart_path.resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return
+
+        if templates is None:
+            nodes = {ALL_TEMPLATES}
+        else:
+            graph = template_graph(chart_path)
+            nodes = set()
+            for template in templates:
+                for node in graph.reachable(template):
+                    nodes.add(node)
+                    # Also depend on the file that currently defines each named
+                    # template so that removing the definition is noticed.
+                    if node in graph.defined_in:
+                        nodes.add(graph.defined_in[node])
+        with self._lock:
+            self.renders.setdefault(module, {}).setdefault(chart, set()).update(nodes)
+
+    def module_record(self, module: str, support_digest: str) -> ModuleRecord:
+        renders = self.renders.get(module)
+        all_charts = not renders
+        if not renders:
+            renders = {chart: {ALL_TEMPLATES} for chart in chart_directories(self.root)}
+        return {
+            "all_charts": all_charts,
+            "charts": {
+                chart: {
+                    "files": chart_file_digests(self.root.joinpath(chart)),
+                    "templates": sorted(templates),
+                }
+                for chart, templates in sorted(renders.items())
+            },
+            "module": file_digest(self.root.joinpath(module)),
+            "support": support_digest,
+        }
+
+
+def chart_directories(root: Path) -> List[str]:
+    """
+    Return the paths, relative to root, of the charts under root, not including the
+    dependencies vendored in a chart's charts directory.
+    """
+    charts = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        if "Chart.yaml" in file_names:
+            charts.append(Path(dir_path).relative_to(root).as_posix())
+            dir_names[:] = []
+            continue
+        dir_names[:] = sorted(
+            dir_name
+            for dir_name in dir_names
+            if not dir_name.startswith(".") and dir_name not in _IGNORED_DIRECTORIES
+        )
+    return sorted(charts)
+
+
+def chart_file_digests(chart_path: Path) -> Dict[str, str]:
+    """
+    Return the digest of every file in the given chart directory, keyed by its path
+    relative to the chart.
+    """
+    digests = {}
+    for dir_path, _, file_names in os.walk(chart_path, followlinks=True):
+        for file_name in file_names:
+            file_path = Path(dir_path).joinpath(file_name)
+            digests[file_path.relative_to(chart_path).as_posix()] = file_digest(
+                file_path
+            )
+    return digests
+
+
+def support_digest(root: Path, test_modules: Iterable[str]) -> str:
+    """
+    Compute a digest of every Python file under root other than the given test
+    modules (paths relative to root), e.g. conftest.py files, test helpers and the
+    code under test, none of which is tracked at a finer grain.
+    """
+    _test_modules = set(test_modules)
+    python_files = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [
+            dir_name
+            for dir_name in dir_names
+            if not dir_name.startswith(".") and dir_name not in _IGNORED_DIRECTORIES
+        ]
+        for file_name in file_names:
+            file_path = Path(dir_path).joinpath(file_name)
+            python_file = file_path.relative_to(root).as_posix()
+            if file_name.endswith(".py") and python_file not in _test_modules:
+                python_files.append(python_file)
+
+    digest = hashlib.sha256()
+    for python_file in sorted(python_files):
+        digest.update(python_file.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(file_digest(root.joinpath(python_file)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_affected(
+    root: Path,
+    module: str,
+    record: Optional[ModuleRecord],
+    support: str,
+) -> bool:
+    """
+    Return whether the given test module may be affected by the changes made since
+    its record was taken, given the current support digest.
+    """
+    if (
+        record is None
+        or record["support"] != support
+        or not root.joinpath(module).is_file()
+        or record["module"] != file_digest(root.joinpath(module))
+        or record.get("all_charts")
+        and set(chart_directories(root)) != set(record["charts"])
+    ):
+        return True
+    return any(
+        _is_chart_change_relevant(root.joinpath(chart), chart_record)
+        for chart, chart_record in record["charts"].items()
+    )
+
+
+def _is_chart_change_relevant(chart_path: Path, chart_record: Dict) -> bool:
+    if not chart_path.is_dir():
+        return True
+    files = chart_file_digests(chart_path)
+    recorded_files: Dict[str, str] = chart_record["files"]
+    changed_files = {
+        file
+        for file in files.keys() | recorded_files.keys()
+        if files.get(file) != recorded_files.get(file)
+    }
+    if not changed_files:
+        return False
+
+    templates = set(chart_record["templates"])
+    if ALL_TEMPLATES in templates:
+        return True
+    graph = template_graph(chart_path)
+    for changed_file in changed_files:
+        # Adding or removing a template can change what renders a resource of a
+        # given kind, so only edits to existing templates are tracked precisely.
+        if (
+            not changed_file.startswith("templates/")
+            or changed_file not in files
+            or changed_file not in recorded_files
+        ):
+            return True
+        if templates & ({changed_file} | graph.defined_by(changed_file)):
+            return True
+    return False
@@ -0,0 +1,241 @@
+"""
+Lint every chart: `helm lint` it and, for application charts, lint the output of
+`helm template` with yamllint. Both are given the chart's values.yaml and
+random-required-values.yaml, if present, since charts with required values can't
+be rendered without them. Charts are linted in parallel, and charts that haven't
+changed since they last passed are skipped.
+
+Usage: python -m helm_charts_dev.lint [--force] [--jobs N] [CHART ...]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict, List, Optional, Sequence
+
+import yaml
+from yamllint import linter
+from yamllint.config import YamlLintConfig
+
+from helm_charts_dev.render_cache import RenderCache, chart_digest
+
+# Relative to the repository root, like the charts directory and .yamllint.
+DEFAULT_STATE_PATH = ".helm-lint-state.json"
+
+_DEFAULT_YAMLLINT_CONFIG = "extends: default"
+
+_VALUES_FILE_NAMES = ["values.yaml", "random-required-values.yaml"]
+
+
+@dataclass
+class LintResult:
+    chart: str
+    digest: str
+    output: str
+    passed: bool
+    skipped: bool = False
+
+
+class LintState:
+    """
+    The digest each chart had when it last passed, persisted as JSON. A chart whose
+    digest is unchanged doesn't need to be linted again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.digests: Dict[str, str] = {}
+        try:
+            with open(path, encoding="utf-8") as file:
+                self.digests = json.load(file)["charts"]
+        except (FileNotFoundError, KeyError, TypeError, ValueError):
+            # Missing or unreadable state just means every chart is linted.
+            pass
+
+    def save(self) -> None:
+        with NamedTemporaryFile(
+            delete=False,
+            dir=self.path.parent,
+            encoding="utf-8",
+            mode="w",
+            suffix=".tmp",
+        ) as temp_file:
+            json.dump({"charts": self.digests}, temp_file, indent=2, sort_keys=True)
+        os.replace(temp_file.name, self.path)
+
+
+def lint_charts(
+    chart_paths: Sequence[Path],
+    root: Path,
+    force: bool = False,
+    jobs: Optional[int] = None,
+    state_path: Optional[Path] = None,
+) -> List[LintResult]:
+    """
+    Lint the given charts, skipping those unchanged since they last passed unless
+    force is given. Results are returned in the order of chart_paths and the state
+    file is updated with the charts that passed.
+    """
+    yamllint_config = _yamllint_config(root)
+    # Linting again is also needed when helm or the yamllint rules change.
+    environment_digest = RenderCache.key(_helm_version(), yamllint_config)
+    state = LintState(state_path or root.joinpath(DEFAULT_STATE_PATH))
+
+    results: Dict[Path, LintResult] = {}
+    arguments = []
+    for chart_path in chart_paths:
+        chart = _chart_name(chart_path, root)
+        digest = RenderCache.key(chart_digest(chart_path), environment_digest)
+        if not force and state.digests.get(chart) == digest:
+            results[chart_path] = LintResult(
+                chart=chart,
+                digest=digest,
+                output="",
+                passed=True,
+                skipped=True,
+            )
+        else:
+            arguments.append((chart_path, chart, digest, yamllint_config))
+
+    stale_chart_paths = [chart_path for chart_path, *_ in arguments]
+    if len(arguments) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            stale_results = list(executor.map(_lint_chart, *zip(*arguments)))
+    else:
+        stale_results = [_lint_chart(*chart_arguments) for chart_arguments in arguments]
+    results.update(zip(stale_chart_paths, stale_results))
+
+    for result in stale_results:
+        if result.passed:
+            state.digests[result.chart] = result.digest
+        else:
+            state.digests.pop(result.chart, None)
+    if stale_results:
+        state.save()
+    return [results[chart_path] for chart_path in chart_paths]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m helm_charts_dev.lint",
+        description="Lint charts, skipping those unchanged since they last passed.",
+    )
+    parser.add_argument(
+        "charts",
+        help="The chart directories to lint. Defaults to every chart in charts/.",
+        metavar="CHART",
+        nargs="*",
+        type=Path,
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Lint every chart, even those unchanged since they last passed.",
+    )
+    parser.add_argument(
+        "--jobs",
+        help="The number of charts to lint in parallel. Defaults to the CPU count.",
+        type=int,
+    )
+    parser.add_argument(
+        "--root",
+        default=Path.cwd(),
+        help="The repository root, holding charts/, .yamllint and the lint state.",
+        type=Path,
+    )
+    args = parser.parse_args(argv)
+
+    root = args.root.resolve()
+    chart_paths = [chart_path.resolve() for chart_path in args.charts] or sorted(
+        path for path in root.joinpath("charts").iterdir() if path.is_dir()
+    )
+    results = lint_charts(chart_paths, root=root, force=args.force, jobs=args.jobs)
+    for result in results:
+        if result.skipped:
+            print(f"{result.chart}: unchanged since it last passed, skipped")
+        elif result.passed:
+            print(f"{result.chart}: passed")
+        else:
+            print(f"{result.chart}: failed\n{result.output}", file=sys.stderr)
+    return 0 if all(result.passed for result in results) else 1
+
+
+def _chart_name(chart_path: Path, root: Path) -> str:
+    try:
+        return chart_path.relative_to(root).as_posix()
+    except ValueError:
+        return chart_path.as_posix()
+
+
+def _helm_version() -> str:
+    return _run(["helm", "version", "--short"]).stdout
+
+
+def _lint_chart(
+    chart_path: Path,
+    chart: str,
+    digest: str,
+    yamllint_config: str,
+) -> LintResult:
+    values_arguments = []
+    for values_file_name in _VALUES_FILE_NAMES:
+        values_path = chart_path.joinpath(values_file_name)
+        # Not all charts have values, e.g. library charts.
+        if values_path.is_file() and values_path.stat().st_size:
+            values_arguments += ["--values", str(values_path)]
+
+    outputs = []
+    lint_process = _run(["helm", "lint", str(chart_path), *values_arguments])
+    outputs.append(lint_process.stdout + lint_process.stderr)
+    passed = lint_process.returncode == 0
+
+    with open(chart_path.joinpath("Chart.yaml"), encoding="utf-8") as file:
+        chart_type = (yaml.safe_load(file) or {}).get("type", "application")
+    # Only template application charts; library charts can't be rendered.
+    if passed and chart_type == "application":
+        template_process = _run(
+            ["helm", "template", str(chart_path), *values_arguments]
+        )
+        if template_process.returncode:
+            outputs.append(template_process.stderr)
+            passed = False
+        else:
+            problems = list(
+                linter.run(
+                    template_process.stdout,
+                    YamlLintConfig(yamllint_config),
+                )
+            )
+            outputs += [
+                f"helm template:{problem.line}:{problem.column}: [{problem.level}]"
+                f" {problem.desc} ({problem.rule})"
+                for problem in problems
+            ]
+            passed = not any(problem.level == "error" for problem in problems)
+    return LintResult(
+        chart=chart,
+        digest=digest,
+        output="\n".join(output.rstrip() for output in outputs if output),
+        passed=passed,
+    )
+
+
+def _run(arguments: List[str]) -> "subprocess.CompletedProcess[str]":
+    return subprocess.run(arguments, capture_output=True, check=False, text=True)
+
+
+def _yamllint_config(root: Path) -> str:
+    try:
+        return root.joinpath(".yamllint").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return _DEFAULT_YAMLLINT_CONFIG
+
+
+if __name__ == "__main__":
+    sys.exit(main())
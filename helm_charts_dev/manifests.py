@@ -0,0 +1,63 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, cast
+
+import yaml
+
+# libyaml is an order of magnitude faster than the pure Python loader, but is an
+# optional part of PyYAML.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# A `---` at the start of a line always starts a new document: even inside a block
+# scalar, a `---` that isn't indented ends the scalar.
+_DOCUMENT_SEPARATOR_PATTERN = re.compile(r"^---(?=[ \t]|$)", re.MULTILINE)
+_KIND_PATTERN = re.compile(r"^kind:[ \t]*(?P<kind>[A-Za-z0-9]+)[ \t]*$", re.MULTILINE)
+_NOT_PARSED = object()
+
+
+def load_yaml(text: str) -> Any:
+    return yaml.load(text, Loader=SafeLoader)  # noqa: DUO109
+
+
+def split_documents(text: str) -> List[str]:
+    """
+    Split a multi-document YAML stream into the raw text of each document. Nothing
+    before the first separator is a document unless it has content.
+    """
+    documents = _DOCUMENT_SEPARATOR_PATTERN.split(text)
+    if not documents[0].strip():
+        documents.pop(0)
+    return documents
+
+
+class Manifests:
+    """
+    The manifests of a multi-document YAML stream, e.g. the output of `helm template`.
+    The stream is split into documents up front, but each document is only parsed
+    when it is first accessed, and its raw text is kept, e.g. for hashing.
+    """
+
+    __slots__ = ("documents", "_parsed")
+
+    def __init__(self, text: str) -> None:
+        self.documents = split_documents(text)
+        self._parsed: List[Any] = [_NOT_PARSED] * len(self.documents)
+
+    def __getitem__(self, index: int) -> Optional[Dict]:
+        if self._parsed[index] is _NOT_PARSED:
+            self._parsed[index] = load_yaml(self.documents[index])
+        return cast(Optional[Dict], self._parsed[index])
+
+    def __iter__(self) -> Iterator[Optional[Dict]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def kind(self, index: int) -> Optional[str]:
+        """
+        Return the kind of the given document without parsing it, if the document
+        declares its kind at the top level, as rendered manifests do.
+        """
+        kind_match = _KIND_PATTERN.search(self.documents[index])
+        return kind_match["kind"] if kind_match else None
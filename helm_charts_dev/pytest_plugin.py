@@ -0,0 +1,468 @@
+"""
+A pytest plugin that lets tests declare the helm renders they need as data, via the
+helm_render marker, so that every render of a session can be deduplicated and
+rendered up front, in parallel, before any test runs. Tests then read their
+manifests from the helm_render fixture.
+
+It also records which templates each test module renders so that, given
+--helm-affected, only the test modules affected by changes made since they last
+passed are run (see helm_charts_dev.impact).
+
+Register it from a conftest.py with:
+
+    pytest_plugins = ["helm_charts_dev.pytest_plugin"]
+"""
+
+import copy
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import pytest
+
+from helm_charts_dev.helm_runner import (
+    HelmRunner,
+    add_render_listener,
+    add_render_profiler,
+    remove_render_listener,
+    remove_render_profiler,
+)
+from helm_charts_dev.impact import ImpactRecorder, is_affected, support_digest
+from helm_charts_dev.render_cache import DEFAULT_MAX_BYTES, RenderCache
+from helm_charts_dev.render_pool import RenderPool
+from helm_charts_dev.render_profile import NO_NODE_ID, RenderProfiler
+from helm_charts_dev.types import RenderRequest
+
+DEFAULT_RELEASE_NAME = "release-name"
+
+_IMPACT_CACHE_KEY = "helm/impact"
+_IMPACT_RECORDER_KEY = pytest.StashKey[ImpactRecorder]()
+_PRERENDERER_KEY = pytest.StashKey["Prerenderer"]()
+_RENDER_CACHE_KEY = pytest.StashKey[Optional[RenderCache]]()
+_RENDER_PROFILER_KEY = pytest.StashKey[RenderProfiler]()
+
+Rendered = Union[List[Dict], Exception]
+
+
+class Prerenderer:
+    """
+    Collects the render requests declared by helm_render markers, renders each
+    distinct request once and serves the results to the tests that declared them.
+    """
+
+    def __init__(self, config: pytest.Config) -> None:
+        self._config = config
+        self._helm_runner: Optional[HelmRunner] = None
+        self._rendered: Dict[str, Rendered] = {}
+
+    @property
+    def helm_runner(self) -> HelmRunner:
+        if self._helm_runner is None:
+            self._helm_runner = HelmRunner(
+                cwd=str(get_charts_path(self._config)),
+                render_cache=get_render_cache(self._config),
+            )
+        return self._helm_runner
+
+    def close(self) -> None:
+        if self._helm_runner is not None:
+            self._helm_runner.close()
+
+    def manifests(self, item: pytest.Item) -> List[Dict]:
+        key, render_request = self._keyed_request(item)
+        impact_recorder = self._config.stash.get(_IMPACT_RECORDER_KEY, None)
+        if impact_recorder is not None:
+            # Pre-rendered requests are rendered before the test's module runs.
+            impact_recorder.record(
+                chart_path=get_charts_path(self._config).joinpath(render_request.chart),
+                templates=set(render_request.show_only or []) or None,
+            )
+        if key not in self._rendered:
+            self._update_dependencies([render_request])
+            try:
+                self._rendered[key] = self.helm_runner.render(render_request)
+            except Exception as error:
+                self._rendered[key] = error
+        rendered = self._rendered[key]
+        if isinstance(rendered, Exception):
+            raise rendered
+        # Requests are shared between tests, so hand each test its own copy.
+        return copy.deepcopy(rendered)
+
+    def prerender(self, items: Sequence[pytest.Item]) -> None:
+        render_requests = dict(
+            self._keyed_request(item)
+            for item in items
+            if item.get_closest_marker("helm_render")
+        )
+        for key in self._rendered:
+            render_requests.pop(key, None)
+        if not render_requests:
+            return
+
+        self._update_dependencies(render_requests.values())
+        workers = get_render_workers(self._config) or os.cpu_count() or 1
+        with RenderPool(render=self.helm_runner.render, workers=workers) as pool:
+            futures = {
+                key: pool.submit(render_request)
+                for key, render_request in render_requests.items()
+            }
+            for key, future in futures.items():
+                try:
+                    self._rendered[key] = future.result()
+                except Exception as error:
+                    # Surface the failure in the tests that declared the render
+                    # rather than aborting the session.
+                    self._rendered[key] = error
+
+    def _keyed_request(self, item: pytest.Item) -> Tuple[str, RenderRequest]:
+        marker = item.get_closest_marker("helm_render")
+        if marker is None:
+            raise pytest.UsageError(
+                f"{item.nodeid} uses the helm_render fixture without a helm_render"
+                " marker."
+            )
+
+        params = getattr(getattr(item, "callspec", None), "params", {})
+        render_request = render_request_from_marker(marker, params)
+        key = json.dumps(
+            [
+                render_request.chart,
+                render_request.name,
+                render_request.namespace,
+                render_request.show_only,
+                render_request.values,
+            ],
+            default=str,
+            sort_keys=True,
+        )
+        return key, render_request
+
+    def _update_dependencies(self, render_requests: Iterable[RenderRequest]) -> None:
+        for chart in sorted({request.chart for request in render_requests}):
+            self.helm_runner.dependency_update_if_missing(chart=chart)
+
+
+def render_request_from_marker(
+    marker: pytest.Mark,
+    params: Dict[str, Any],
+) -> RenderRequest:
+    """
+    Build a RenderRequest from the arguments of a helm_render marker. Values may be
+    given as a callable, in which case it is called with the test's parametrized
+    arguments that it accepts by name (or all of them if it accepts **kwargs).
+    """
+    kwargs = dict(marker.kwargs)
+    if marker.args:
+        kwargs["chart"] = marker.args[0]
+
+    values = kwargs.get("values")
+    if callable(values):
+        parameters = inspect.signature(values).parameters.values()
+        if any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters):
+            values = values(**params)
+        else:
+            values = values(
+                **{
+                    parameter.name: params[parameter.name]
+                    for parameter in parameters
+                    if parameter.name in params
+                }
+            )
+    if isinstance(values, dict):
+        values = [values]
+
+    return RenderRequest(
+        chart=kwargs["chart"],
+        name=kwargs.get("name") or DEFAULT_RELEASE_NAME,
+        namespace=kwargs.get("namespace"),
+        show_only=kwargs.get("show_only"),
+        values=values,
+    )
+
+
+def get_charts_path(config: pytest.Config) -> Path:
+    return config.rootpath.joinpath(config.getini("helm_charts_path"))
+
+
+def get_render_cache(config: pytest.Config) -> Optional[RenderCache]:
+    if _RENDER_CACHE_KEY in config.stash:
+        return config.stash[_RENDER_CACHE_KEY]
+
+    _render_cache = None
+    if config.getoption("helm_render_cache"):
+        if config.cache is None:
+            raise pytest.UsageError(
+                "--helm-render-cache requires the cacheprovider plugin to be enabled."
+            )
+        _render_cache = RenderCache(
+            directory=config.cache.mkdir("helm-render-cache"),
+            max_bytes=config.getoption("helm_render_cache_max_bytes"),
+        )
+    config.stash[_RENDER_CACHE_KEY] = _render_cache
+    return _render_cache
+
+
+def get_render_workers(config: pytest.Config) -> int:
+    _render_workers = config.getoption("helm_render_workers")
+    if _render_workers == "auto":
+        return os.cpu_count() or 1
+    return int(_render_workers)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("helm")
+    group.addoption(
+        "--helm-affected",
+        action="store_true",
+        default=False,
+        help=(
+            "Only run the test modules that may be affected by the changes made to"
+            " Python files or charts since they last passed."
+        ),
+    )
+    group.addoption(
+        "--helm-render-cache",
+        action="store_true",
+        default=False,
+        help=(
+            "Reuse helm template output across runs when the chart contents, helm"
+            " version, release name and values of a render are unchanged."
+        ),
+    )
+    group.addoption(
+        "--helm-render-cache-max-bytes",
+        default=DEFAULT_MAX_BYTES,
+        help="The size beyond which least recently used renders are evicted.",
+        type=int,
+    )
+    group.addoption(
+        "--helm-profile",
+        default=None,
+        help=(
+            "Record the command, wall time, output size, parse time and cache hit or"
+            " miss of every helm render, along with the test that made it, to this"
+            " JSON file, and summarize the tests that spent the most time rendering."
+            " Renders made by xdist workers aren't recorded."
+        ),
+        metavar="PATH",
+    )
+    group.addoption(
+        "--helm-profile-top",
+        default=10,
+        help="The number of tests to list in the --helm-profile summary.",
+        type=int,
+    )
+    group.addoption(
+        "--helm-render-workers",
+        default="0",
+        help=(
+            "The number of workers declared renders are pre-rendered with, or"
+            " 'auto' for one per CPU. Defaults to 0, which is also one per CPU."
+        ),
+    )
+    group.addoption(
+        "--no-helm-prerender",
+        action="store_false",
+        default=True,
+        dest="helm_prerender",
+        help=(
+            "Render the helm_render requests of each test when the test runs instead"
+            " of all at once before the first test."
+        ),
+    )
+    parser.addini(
+        "helm_charts_path",
+        default="charts",
+        help="The directory, relative to the rootdir, that contains the charts.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "helm_render(chart, name=None, namespace=None, show_only=None, values=None):"
+        " declare the helm render whose manifests the helm_render fixture provides.",
+    )
+    config.stash[_PRERENDERER_KEY] = Prerenderer(config)
+    # Renders happen in other processes under xdist, so they can't be attributed.
+    if (
+        getattr(config, "cache", None) is not None
+        and not hasattr(config, "workerinput")
+        and getattr(config.option, "dist", "no") == "no"
+    ):
+        impact_recorder = ImpactRecorder(config.rootpath)
+        add_render_listener(impact_recorder.record)
+        config.stash[_IMPACT_RECORDER_KEY] = impact_recorder
+    if config.getoption("helm_profile") and not hasattr(config, "workerinput"):
+        render_profiler = RenderProfiler()
+        add_render_profiler(render_profiler)
+        config.stash[_RENDER_PROFILER_KEY] = render_profiler
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    if _PRERENDERER_KEY in config.stash:
+        config.stash[_PRERENDERER_KEY].close()
+    if _IMPACT_RECORDER_KEY in config.stash:
+        remove_render_listener(config.stash[_IMPACT_RECORDER_KEY].record)
+    if _RENDER_PROFILER_KEY in config.stash:
+        remove_render_profiler(config.stash[_RENDER_PROFILER_KEY])
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(
+    config: pytest.Config,
+    items: List[pytest.Item],
+) -> None:
+    impact_recorder = config.stash.get(_IMPACT_RECORDER_KEY, None)
+    if impact_recorder is None:
+        if config.getoption("helm_affected"):
+            raise pytest.UsageError(
+                "--helm-affected requires the cacheprovider plugin to be enabled and"
+                " can't be combined with xdist."
+            )
+        return
+
+    for item in items:
+        module = _module_of(item.nodeid)
+        impact_recorder.collected[module] = impact_recorder.collected.get(module, 0) + 1
+    if not config.getoption("helm_affected"):
+        return
+
+    assert config.cache is not None
+    records = config.cache.get(_IMPACT_CACHE_KEY, {})
+    support = support_digest(
+        config.rootpath,
+        impact_recorder.collected.keys() | records.keys(),
+    )
+    affected_modules = {
+        module
+        for module in impact_recorder.collected
+        if is_affected(config.rootpath, module, records.get(module), support)
+    }
+    selected = []
+    deselected = []
+    for item in items:
+        if _module_of(item.nodeid) in affected_modules:
+            selected.append(item)
+        else:
+            deselected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item: pytest.Item) -> Generator[None, None, None]:
+    impact_recorder = item.config.stash.get(_IMPACT_RECORDER_KEY, None)
+    render_profiler = item.config.stash.get(_RENDER_PROFILER_KEY, None)
+    module = _module_of(item.nodeid)
+    if impact_recorder is not None:
+        impact_recorder.module = module
+    if render_profiler is not None:
+        render_profiler.node_id = item.nodeid
+    try:
+        yield
+    finally:
+        if impact_recorder is not None:
+            impact_recorder.module = None
+            impact_recorder.completed[module] = (
+                impact_recorder.completed.get(module, 0) + 1
+            )
+        if render_profiler is not None:
+            render_profiler.node_id = NO_NODE_ID
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: pytest.Item) -> Generator[None, Any, None]:
+    outcome = yield
+    impact_recorder = item.config.stash.get(_IMPACT_RECORDER_KEY, None)
+    if impact_recorder is not None and outcome.get_result().failed:
+        impact_recorder.failed.add(_module_of(item.nodeid))
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    config = session.config
+    if _RENDER_PROFILER_KEY in config.stash:
+        config.stash[_RENDER_PROFILER_KEY].dump(config.getoption("helm_profile"))
+    _save_impact_records(config)
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter,
+    config: pytest.Config,
+) -> None:
+    if _RENDER_PROFILER_KEY not in config.stash:
+        return
+    terminalreporter.write_sep("=", "helm render profile")
+    for line in config.stash[_RENDER_PROFILER_KEY].summary(
+        top=config.getoption("helm_profile_top")
+    ):
+        terminalreporter.write_line(line)
+    terminalreporter.write_line(
+        f"Every render was written to {config.getoption('helm_profile')}"
+    )
+
+
+def _save_impact_records(config: pytest.Config) -> None:
+    impact_recorder = config.stash.get(_IMPACT_RECORDER_KEY, None)
+    # A module only selected in part, by node id, may not have rendered everything
+    # its other tests depend on.
+    if impact_recorder is None or any("::" in arg for arg in config.args):
+        return
+
+    assert config.cache is not None
+    records = config.cache.get(_IMPACT_CACHE_KEY, {})
+    support = support_digest(
+        config.rootpath,
+        impact_recorder.collected.keys() | records.keys(),
+    )
+    for module, completed in impact_recorder.completed.items():
+        if module in impact_recorder.failed:
+            records.pop(module, None)
+        elif completed == impact_recorder.collected.get(module):
+            records[module] = impact_recorder.module_record(module, support)
+    config.cache.set(_IMPACT_CACHE_KEY, records)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session: pytest.Session) -> None:
+    config = session.config
+    # xdist workers only run a share of the collected items, so they render on
+    # demand rather than rendering every item up front.
+    if (
+        config.option.collectonly
+        or not config.getoption("helm_prerender")
+        or hasattr(config, "workerinput")
+    ):
+        return
+    config.stash[_PRERENDERER_KEY].prerender(session.items)
+
+
+def _module_of(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
+
+
+@pytest.fixture(scope="session")
+def render_cache(pytestconfig: pytest.Config) -> Optional[RenderCache]:
+    return get_render_cache(pytestconfig)
+
+
+@pytest.fixture
+def helm_render(request: pytest.FixtureRequest) -> List[Dict]:
+    """
+    The manifests rendered for the helm_render marker of the requesting test.
+    """
+    return request.config.stash[_PRERENDERER_KEY].manifests(request.node)
@@ -0,0 +1,151 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import List, Optional, Tuple, Union
+
+# Large enough to hold the output of every render in a typical chart test suite.
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".yaml"
+
+# The most file digests memoized. Plenty for the charts under test, while bounding
+# long watch sessions, where every batch render hashes files under a new temporary
+# umbrella chart.
+MAX_FILE_DIGESTS = 4096
+
+# Maps a file's (path, mtime_ns, size) to its digest so that unchanged chart files
+# aren't re-read on every render, least recently used first.
+_file_digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_file_digests_lock = Lock()
+
+
+class RenderCache:
+    """
+    A content-addressed, size-bounded, on-disk cache of raw `helm template` output.
+    Keys are expected to be derived from everything that can influence a render, so
+    entries never need to be invalidated, only evicted. Once the cache grows beyond
+    max_bytes, the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry_path = self._entry_path(key)
+        try:
+            output = entry_path.read_text(encoding="utf-8")
+            # Bump the modification time so eviction treats the entry as recently
+            # used.
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return output
+
+    def put(self, key: str, output: str) -> None:
+        encoded_output = output.encode("utf-8")
+        try:
+            replaced_size = self._entry_path(key).stat().st_size
+        except FileNotFoundError:
+            replaced_size = 0
+        with NamedTemporaryFile(
+            delete=False,
+            dir=self.directory,
+            mode="wb",
+            suffix=".tmp",
+        ) as temp_file:
+            temp_file.write(encoded_output)
+        # Replacing is atomic, so concurrent readers never see a partial entry.
+        os.replace(temp_file.name, self._entry_path(key))
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(encoded_output) - replaced_size
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, entry_path in self._entries():
+                entry_path.unlink(missing_ok=True)
+            self._size = 0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory.joinpath(f"{key}{_ENTRY_SUFFIX}")
+
+    def _entries(self) -> List[Tuple[int, int, Path]]:
+        entries = []
+        for entry_path in self.directory.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                # Evicted by another process since the glob.
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+        return entries
+
+    def _evict(self) -> int:
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_path in entries:
+            if size <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            size -= entry_size
+        return size
+
+
+def chart_digest(chart_path: Union[str, Path]) -> str:
+    """
+    Compute a digest of the name and content of every file in the given chart
+    directory, including templates and vendored (or symlinked) dependencies.
+    """
+    root = Path(chart_path)
+    digest = hashlib.sha256()
+    for dir_path, dir_names, file_names in os.walk(root, followlinks=True):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            file_path = Path(dir_path).joinpath(file_name)
+            digest.update(str(file_path.relative_to(root)).encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(file_digest(file_path).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def file_digest(file_path: Union[str, Path]) -> str:
+    _file_path = str(file_path)
+    stat = os.stat(_file_path)
+    memo_key = (_file_path, stat.st_mtime_ns, stat.st_size)
+    with _file_digests_lock:
+        digest = _file_digests.get(memo_key)
+        if digest is not None:
+            _file_digests.move_to_end(memo_key)
+            return digest
+
+    with open(_file_path, mode="rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    with _file_digests_lock:
+        _file_digests[memo_key] = digest
+        while len(_file_digests) > MAX_FILE_DIGESTS:
+            _file_digests.popitem(last=False)
+    return digest
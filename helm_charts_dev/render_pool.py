@@ -0,0 +1,52 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from helm_charts_dev.types import RenderRequest
+
+
+class RenderPool:
+    """
+    A pool of long-lived workers that render the requests submitted to them
+    concurrently. Rendering is dominated by waiting on helm subprocesses, so workers
+    are threads; they are started once and reused for every request rather than
+    being created per batch.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[RenderRequest], List[Dict]],
+        workers: int,
+        warm_up: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"A render pool needs at least one worker, got {workers}")
+
+        if warm_up:
+            warm_up()
+
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="helm-render",
+        )
+        self._render = render
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True, wait=True)
+
+    def map(self, requests: Sequence[RenderRequest]) -> List[List[Dict]]:
+        """
+        Render all of the given requests, returning their manifests in the same order
+        as the requests. The first error encountered is raised.
+        """
+        futures = [self.submit(request) for request in requests]
+        return [future.result() for future in futures]
+
+    def submit(self, request: RenderRequest) -> "Future[List[Dict]]":
+        return self._executor.submit(self._render, request)
@@ -0,0 +1,83 @@
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Union
+
+# Recorded as the node id of renders made outside of any test, e.g. pre-renders.
+NO_NODE_ID = "<no test>"
+
+
+@dataclass
+class RenderSample:
+    """
+    The cost of a single render: the helm command it ran (None if it was served from
+    the render cache), the time spent in it (or reading the cache), the size of its
+    output and the time spent parsing that output into manifests.
+    """
+
+    chart: str
+    cache: Optional[str] = None
+    command: Optional[List[str]] = None
+    failed: bool = False
+    node_id: str = NO_NODE_ID
+    output_bytes: int = 0
+    parse_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.wall_seconds + self.parse_seconds
+
+
+class RenderProfiler:
+    """
+    Collects a RenderSample for every render of every HelmRunner while registered
+    with add_render_profiler, attributing each to the node id set at the time.
+    """
+
+    def __init__(self) -> None:
+        self.node_id = NO_NODE_ID
+        self.samples: List[RenderSample] = []
+        self._lock = Lock()
+
+    def add(self, sample: RenderSample) -> None:
+        sample.node_id = self.node_id
+        with self._lock:
+            self.samples.append(sample)
+
+    def dump(self, path: Union[str, Path]) -> None:
+        with open(path, encoding="utf-8", mode="w") as file:
+            json.dump([asdict(sample) for sample in self.samples], file, indent=2)
+
+    def summary(self, top: int) -> List[str]:
+        """
+        Summarize the samples as lines of text: the totals, followed by the top
+        test node ids by the total time spent rendering and parsing.
+        """
+        samples = list(self.samples)
+        hits = sum(sample.cache == "hit" for sample in samples)
+        lines = [
+            f"{len(samples)} renders ({hits} cache hits):"
+            f" {sum(sample.wall_seconds for sample in samples):.2f}s in helm or the"
+            f" cache, {sum(sample.parse_seconds for sample in samples):.2f}s parsing,"
+            f" {sum(sample.output_bytes for sample in samples)} bytes of output",
+        ]
+
+        samples_by_node_id: Dict[str, List[RenderSample]] = {}
+        for sample in samples:
+            samples_by_node_id.setdefault(sample.node_id, []).append(sample)
+        slowest = sorted(
+            samples_by_node_id.items(),
+            key=lambda item: sum(sample.total_seconds for sample in item[1]),
+            reverse=True,
+        )
+        for node_id, node_samples in slowest[:top]:
+            lines.append(
+                f"{sum(sample.wall_seconds for sample in node_samples):8.3f}s helm"
+                f" {sum(sample.parse_seconds for sample in node_samples):8.3f}s parse"
+                f" {len(node_samples):4d} renders"
+                f" {sum(sample.output_bytes for sample in node_samples):9d} bytes"
+                f"  {node_id}"
+            )
+        return lines
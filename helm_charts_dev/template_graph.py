@@ -0,0 +1,152 @@
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from helm_charts_dev.render_cache import chart_digest
+
+# Matches, in order of appearance, the start of a named template, a reference to a
+# named template, a top-level `kind:` line, which in a chart's templates is the
+# kind of the resource being rendered (nested kinds, e.g. of a targetRef, are
+# indented), and the actions that open and close blocks, so the end of each named
+# template can be found.
+_TOKEN_PATTERN = re.compile(
+    r'{{-?\s*(?P<definer>define|block)\s+"(?P<define>[^"]+)"'
+    r'|\b(?:include|template)\s+"(?P<include>[^"]+)"'
+    r"|^kind:\s*(?P<kind>[A-Za-z0-9]+)\s*$"
+    r"|{{-?\s*(?P<open>if|range|with)\b"
+    r"|{{-?\s*(?P<end>end)\b",
+    re.MULTILINE,
+)
+
+# Maps a chart path to its digest and the graph of the chart at that time, so that
+# the templates of an unchanged chart are only scanned once. Only the latest graph
+# of each chart is kept.
+_template_graphs: Dict[str, Tuple[str, "TemplateGraph"]] = {}
+_template_graphs_lock = Lock()
+
+
+@dataclass
+class TemplateGraph:
+    """
+    The named templates each template file of a chart defines and includes, and the
+    kinds of resource each renders.
+
+    Template files are keyed by their path relative to the chart, e.g.
+    `templates/deployment.yaml`, like `helm template --show-only` expects. Kinds and
+    includes that appear inside a `define` are attributed to the named template
+    rather than to the file that defines it.
+    """
+
+    defined_in: Dict[str, str] = field(default_factory=dict)
+    includes: Dict[str, Set[str]] = field(default_factory=dict)
+    kinds: Dict[str, Set[str]] = field(default_factory=dict)
+    templates: List[str] = field(default_factory=list)
+
+    def defined_by(self, template: str) -> Set[str]:
+        """
+        Return the named templates the given template file defines.
+        """
+        return {name for name, path in self.defined_in.items() if path == template}
+
+    def template_kinds(self, template: str) -> Set[str]:
+        """
+        Return the kinds of resource the given template file renders, directly or
+        through the named templates it (transitively) includes.
+        """
+        kinds: Set[str] = set()
+        for node in self.reachable(template):
+            kinds |= self.kinds.get(node, set())
+        return kinds
+
+    def reachable(self, node: str) -> Set[str]:
+        """
+        Return the given template file or named template along with every named
+        template it transitively includes.
+        """
+        reached = {node}
+        pending = [node]
+        while pending:
+            for included in self.includes.get(pending.pop(), set()):
+                if included not in reached:
+                    reached.add(included)
+                    pending.append(included)
+        return reached
+
+    def templates_for_kinds(self, kinds: Iterable[str]) -> List[str]:
+        """
+        Return the rendered (i.e. not partial) template files that can render a
+        resource of any of the given kinds. Fails if no template renders one of them.
+        """
+        templates_by_kind: Dict[str, List[str]] = {}
+        for template in self.templates:
+            for kind in self.template_kinds(template):
+                templates_by_kind.setdefault(kind, []).append(template)
+
+        templates: Dict[str, None] = {}
+        for kind in kinds:
+            if kind not in templates_by_kind:
+                raise ValueError(f"No template renders resources of kind {kind}")
+            templates.update(dict.fromkeys(templates_by_kind[kind]))
+        return list(templates)
+
+
+def referenced_templates(content: str) -> Set[str]:
+    """
+    Return the named templates the given template content includes directly.
+    """
+    return {
+        token["include"]
+        for token in _TOKEN_PATTERN.finditer(content)
+        if token["include"]
+    }
+
+
+def template_graph(chart_path: Union[str, Path]) -> TemplateGraph:
+    root = Path(chart_path)
+    graph_path, digest = str(root.resolve()), chart_digest(root)
+    with _template_graphs_lock:
+        graph_digest, graph = _template_graphs.get(graph_path, ("", None))
+        if graph is None or graph_digest != digest:
+            graph = _scan_templates(root)
+            _template_graphs[graph_path] = (digest, graph)
+    return graph
+
+
+def _scan_templates(chart_path: Path) -> TemplateGraph:
+    graph = TemplateGraph()
+    for template_path in sorted(chart_path.joinpath("templates").rglob("*")):
+        if not template_path.is_file():
+            continue
+        template = str(template_path.relative_to(chart_path))
+        # Helm renders every template file except partials and the release notes.
+        if not template_path.name.startswith("_") and template_path.name != (
+            "NOTES.txt"
+        ):
+            graph.templates.append(template)
+
+        # The owner of each open block, so that the file owns whatever follows the
+        # end of a named template again.
+        owners: List[str] = []
+        owner = template
+        content = template_path.read_text(encoding="utf-8")
+        for token in _TOKEN_PATTERN.finditer(content):
+            if token["define"]:
+                if token["definer"] == "block":
+                    # A block is also rendered in place, like an include.
+                    graph.includes.setdefault(owner, set()).add(token["define"])
+                owners.append(token["define"])
+                owner = token["define"]
+                graph.defined_in[owner] = template
+            elif token["open"]:
+                owners.append(owner)
+            elif token["end"]:
+                if owners:
+                    owners.pop()
+                owner = owners[-1] if owners else template
+            elif token["include"]:
+                graph.includes.setdefault(owner, set()).add(token["include"])
+            else:
+                graph.kinds.setdefault(owner, set()).add(token["kind"])
+    return graph
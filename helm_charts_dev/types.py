@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+Values = List[Union[Dict[str, Any], str]]
+
+
+@dataclass
+class RenderRequest:
+    """
+    The inputs of a single `helm template` invocation.
+    """
+
+    chart: str
+    name: str
+    namespace: Optional[str] = None
+    show_only: Optional[List[str]] = None
+    values: Optional[Values] = None
@@ -0,0 +1,112 @@
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import yaml
+
+from helm_charts_dev.manifests import load_yaml, split_documents
+from helm_charts_dev.types import Values
+
+UMBRELLA_CHART_NAME = "batch"
+
+# Helm prefixes every rendered document with the path of the template it came from,
+# e.g. `# Source: batch/charts/batch-0/templates/service.yaml`.
+_SOURCE_PATTERN = re.compile(
+    r"^# Source: [^/]+/charts/(?P<alias>[^/]+)/(?P<path>.+)$",
+    re.MULTILINE,
+)
+
+
+def batch_aliases(count: int) -> List[str]:
+    return [f"{UMBRELLA_CHART_NAME}-{index}" for index in range(count)]
+
+
+@contextmanager
+def umbrella_chart(chart_path: Path, aliases: Sequence[str]) -> Iterator[Path]:
+    """
+    Create a throwaway umbrella chart that declares the chart at chart_path as a
+    dependency once per alias, so a single `helm template` renders the chart once
+    per alias, each with its own block of values.
+
+    Note that helm renames an aliased chart, so `.Chart.Name` (and anything derived
+    from it, like the `helm.sh/chart` label) is the alias rather than the chart name.
+    """
+    with open(chart_path.joinpath("Chart.yaml"), encoding="utf-8", mode="r") as file:
+        chart_yaml = load_yaml(file.read())
+
+    with TemporaryDirectory(prefix="helm-umbrella-") as temp_dir:
+        umbrella_path = Path(temp_dir).joinpath(UMBRELLA_CHART_NAME)
+        dependencies_path = umbrella_path.joinpath("charts")
+        dependencies_path.mkdir(parents=True)
+        dependencies_path.joinpath(chart_path.name).symlink_to(
+            chart_path.resolve(),
+            target_is_directory=True,
+        )
+        umbrella_chart_yaml = {
+            "apiVersion": "v2",
+            "dependencies": [
+                {
+                    "alias": alias,
+                    "name": chart_yaml["name"],
+                    "version": chart_yaml["version"],
+                }
+                for alias in aliases
+            ],
+            "name": UMBRELLA_CHART_NAME,
+            "type": "application",
+            "version": "0.0.0",
+        }
+        with open(
+            umbrella_path.joinpath("Chart.yaml"),
+            encoding="utf-8",
+            mode="w",
+        ) as file:
+            yaml.safe_dump(umbrella_chart_yaml, file)
+        yield umbrella_path
+
+
+def umbrella_values(
+    aliases: Sequence[str],
+    values_sets: Sequence[Optional[Values]],
+    cwd: Optional[str] = None,
+) -> Values:
+    """
+    Nest each set of values under its alias. The n-th layer of every set ends up in
+    the n-th umbrella layer, so helm merges the layers of each set in the same order
+    it would have when rendering the set on its own.
+    """
+    layers: Values = []
+    for alias, values in zip(aliases, values_sets):
+        for index, values_instance in enumerate(values or []):
+            if isinstance(values_instance, str):
+                values_path = Path(cwd or ".").joinpath(values_instance)
+                with open(values_path, encoding="utf-8", mode="r") as file:
+                    values_instance = load_yaml(file.read()) or {}
+            if len(layers) <= index:
+                layers.append({})
+            layer = layers[index]
+            assert isinstance(layer, Dict)
+            layer[alias] = values_instance
+    return layers
+
+
+def split_umbrella_output(templates_yaml: str) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Split the output of rendering an umbrella chart into the documents rendered for
+    each alias, each given as the template path relative to the aliased chart and the
+    raw YAML of the document.
+    """
+    documents_by_alias: Dict[str, List[Tuple[str, str]]] = {}
+    for document in split_documents(templates_yaml):
+        document = document.strip("\n")
+        if not document:
+            continue
+        source_match = _SOURCE_PATTERN.match(document)
+        if not source_match:
+            raise ValueError(f"Unable to determine the source of document:\n{document}")
+        documents_by_alias.setdefault(source_match["alias"], []).append(
+            (source_match["path"], document)
+        )
+    return documents_by_alias
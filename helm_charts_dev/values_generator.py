@@ -0,0 +1,256 @@
+"""
+Generate values that meet a chart's values.schema.json: the minimal values the chart
+requires, i.e. a value for every required property, and arbitrary valid variants of
+them for property-based tests.
+
+Every generated value is checked against the compiled schema, so generation fails
+loudly rather than producing invalid values. Strings are random, except where the
+schema only allows a few, e.g. `"pattern": "^(Always|IfNotPresent|Never)$"`.
+"""
+
+import re
+from pathlib import Path
+from random import Random  # noqa: DUO102
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from jsonschema.protocols import Validator
+
+from helm_charts_dev.render_cache import file_digest
+from helm_charts_dev.values_schema import schema_chart
+
+# The most items generated for arrays, and entries for patternProperties, of a
+# variant.
+MAX_VARIANT_ITEMS = 2
+
+# Matches patterns that only allow a literal or a few alternatives, e.g. `^httpGet$`
+# or `^(Always|IfNotPresent|Never)$`, capturing the alternatives.
+_ALTERNATIVES_PATTERN = re.compile(r"^\^\(?(?P<alternatives>[\w.|-]+)\)?\$$")
+
+# Maps the digest of a values.schema.json to the generator for it.
+_generators: Dict[str, "ValuesGenerator"] = {}
+_generators_lock = Lock()
+
+
+class ValuesGenerator:
+    """
+    Generates values that meet the schema of the given compiled validator, or any
+    values if there is none.
+    """
+
+    def __init__(self, validator: Optional[Validator]) -> None:
+        self._validator = validator
+
+    def required_values(self, random_string: Callable[[], str]) -> Dict[str, Any]:
+        """
+        The minimal values that meet the schema: a value for every required
+        property, recursively. Strings are taken from random_string.
+        """
+        return self._object(self._schema(), random_string, None)
+
+    def variant(self, variant_random: Random) -> Dict[str, Any]:
+        """
+        Arbitrary values that meet the schema: the required values, plus a random
+        selection of optional properties, with random values drawn
+        from variant_random.
+        """
+
+        def random_string() -> str:
+            return str(UUID(int=variant_random.getrandbits(128), version=4))
+
+        return self._object(self._schema(), random_string, variant_random)
+
+    def _schema(self) -> Dict[str, Any]:
+        if self._validator is None:
+            return {}
+        schema = self._validator.schema
+        return schema if isinstance(schema, dict) else {}
+
+    def _is_valid(self, schema: Dict[str, Any], value: Any) -> bool:
+        if self._validator is None:
+            return True
+        return self._validator.evolve(schema=schema).is_valid(value)
+
+    def _resolve(self, schema: Any) -> Dict[str, Any]:
+        # Follow local references, e.g. `{"$ref": "#/$defs/port"}`, keeping the
+        # keywords next to the reference, as draft 2019-09 does.
+        if not isinstance(schema, dict):
+            return {}
+        reference = schema.get("$ref")
+        if not isinstance(reference, str) or not reference.startswith("#"):
+            return schema
+        target: Any = self._schema()
+        for part in reference[1:].split("/")[1:]:
+            part = part.replace("~1", "/").replace("~0", "~")
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        siblings = {key: value for key, value in schema.items() if key != "$ref"}
+        return self._resolve(target) | siblings
+
+    def _value(
+        self,
+        schema: Any,
+        random_string: Callable[[], str],
+        variant_random: Optional[Random],
+    ) -> Any:
+        schema = self._resolve(schema)
+        if "const" in schema:
+            value = schema["const"]
+        elif isinstance(schema.get("enum"), list) and schema["enum"]:
+            value = (
+                variant_random.choice(schema["enum"])
+                if variant_random
+                else schema["enum"][0]
+            )
+        else:
+            value_type = _value_type(schema, variant_random)
+            if value_type == "object":
+                value = self._object(schema, random_string, variant_random)
+            elif value_type == "array":
+                value = self._array(schema, random_string, variant_random)
+            elif value_type == "boolean":
+                value = (
+                    variant_random.choice([False, True]) if variant_random else False
+                )
+            elif value_type in ("integer", "number"):
+                value = self._number(schema, value_type, variant_random)
+            elif value_type == "null":
+                value = None
+            else:
+                value = self._string(schema, random_string, variant_random)
+
+        if not self._is_valid(schema, value):
+            raise ValueError(f"Unable to generate a value for schema {schema}")
+        return value
+
+    def _object(
+        self,
+        schema: Dict[str, Any],
+        random_string: Callable[[], str],
+        variant_random: Optional[Random],
+    ) -> Dict[str, Any]:
+        properties = schema.get("properties") or {}
+        required = schema.get("required") or []
+        value = {
+            name: self._value(properties.get(name, {}), random_string, variant_random)
+            for name in required
+        }
+        if variant_random is None:
+            return value
+
+        optional_schemas = [
+            (name, property_schema)
+            for name, property_schema in properties.items()
+            if name not in required and variant_random.random() < 0.5
+        ]
+        for pattern, property_schema in (schema.get("patternProperties") or {}).items():
+            for _ in range(variant_random.randint(0, MAX_VARIANT_ITEMS)):
+                candidates = _alternatives(pattern) + [f"key-{random_string()[:8]}"]
+                for name in candidates:
+                    if re.search(pattern, name) and name not in value:
+                        optional_schemas.append((name, property_schema))
+                        break
+        for name, property_schema in optional_schemas:
+            try:
+                value[name] = self._value(
+                    property_schema, random_string, variant_random
+                )
+            except ValueError:
+                # Optional properties the generator can't satisfy are left out.
+                continue
+        return value
+
+    def _array(
+        self,
+        schema: Dict[str, Any],
+        random_string: Callable[[], str],
+        variant_random: Optional[Random],
+    ) -> List[Any]:
+        min_items = schema.get("minItems", 0)
+        max_items = schema.get("maxItems", max(min_items, MAX_VARIANT_ITEMS))
+        count = (
+            variant_random.randint(min_items, max_items)
+            if variant_random
+            else min_items
+        )
+        return [
+            self._value(schema.get("items", {}), random_string, variant_random)
+            for _ in range(count)
+        ]
+
+    def _number(
+        self,
+        schema: Dict[str, Any],
+        value_type: str,
+        variant_random: Optional[Random],
+    ) -> float:
+        minimum = schema.get("minimum", schema.get("exclusiveMinimum", -1) + 1)
+        maximum = schema.get(
+            "maximum", schema.get("exclusiveMaximum", minimum + 101) - 1
+        )
+        if variant_random is None:
+            return int(minimum) if value_type == "integer" else minimum
+        if value_type == "integer":
+            return variant_random.randint(int(minimum), int(maximum))
+        return variant_random.uniform(minimum, maximum)
+
+    def _string(
+        self,
+        schema: Dict[str, Any],
+        random_string: Callable[[], str],
+        variant_random: Optional[Random],
+    ) -> str:
+        candidate = random_string()
+        min_length = schema.get("minLength", 0)
+        candidate = (candidate * (min_length // len(candidate) + 1))[
+            : max(min_length, schema.get("maxLength", len(candidate)))
+        ]
+        alternatives = _alternatives(schema.get("pattern", ""))
+        if variant_random is not None:
+            variant_random.shuffle(alternatives)
+        candidates = [candidate] + alternatives
+        if "default" in schema:
+            candidates.append(schema["default"])
+        for candidate in candidates:
+            if isinstance(candidate, str) and self._is_valid(schema, candidate):
+                return candidate
+        raise ValueError(f"Unable to generate a string for schema {schema}")
+
+
+def values_generator(chart_path: Path) -> ValuesGenerator:
+    """
+    Return the generator for the values.schema.json of the chart at chart_path. One
+    generator is kept per schema digest, so identical schemas share one.
+    """
+    schema_path = chart_path.joinpath("values.schema.json")
+    digest = file_digest(schema_path) if schema_path.is_file() else ""
+    with _generators_lock:
+        generator = _generators.get(digest)
+    if generator is None:
+        generator = ValuesGenerator(schema_chart(chart_path).validator)
+        with _generators_lock:
+            _generators[digest] = generator
+    return generator
+
+
+def _alternatives(pattern: str) -> List[str]:
+    match = _ALTERNATIVES_PATTERN.match(pattern)
+    if not match:
+        return []
+    return [
+        alternative for alternative in match["alternatives"].split("|") if alternative
+    ]
+
+
+def _value_type(schema: Dict[str, Any], variant_random: Optional[Random]) -> str:
+    value_type = schema.get("type")
+    if isinstance(value_type, list):
+        value_types = [item for item in value_type if item != "null"] or value_type
+        return str(
+            variant_random.choice(value_types) if variant_random else value_types[0]
+        )
+    if isinstance(value_type, str):
+        return value_type
+    if {"patternProperties", "properties", "required"} & set(schema):
+        return "object"
+    return "array" if "items" in schema else "string"
@@ -0,0 +1,306 @@
+"""
+Validate values against a chart's values.schema.json, and those of its dependencies,
+in-process, so renders with invalid values fail without paying for a helm process.
+
+The values are coalesced with the chart defaults the way helm coalesces them before
+validating, and failures are reported in helm's words, e.g.:
+
+    values don't meet the specifications of the schema(s) in the following chart(s):
+    generic-api-service:
+    - replicaCount: Invalid type. Expected: integer, given: string
+
+Values that pass aren't guaranteed to pass helm's validation, so helm still has the
+final say, but values that fail would fail helm's validation as well.
+"""
+
+import ast
+import copy
+import datetime
+import json
+import re
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+from jsonschema import Draft201909Validator, ValidationError
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+
+from helm_charts_dev.render_cache import file_digest
+from helm_charts_dev.types import Values
+
+SCHEMA_ERROR_HEADER = (
+    "values don't meet the specifications of the schema(s) in the following chart(s):"
+)
+
+# Maps a chart path to the digests of its Chart.yaml, values.yaml and
+# values.schema.json and the chart compiled from them.
+_charts: Dict[str, Tuple[Tuple[str, ...], "_SchemaChart"]] = {}
+_charts_lock = Lock()
+
+
+class ValuesSchemaError(RuntimeError):
+    """
+    Raised instead of invoking helm when values don't meet the schema of the chart
+    or one of its dependencies. Like the error of a failed helm command, its message
+    includes helm's description of the failures.
+    """
+
+
+class _SchemaChart:
+    def __init__(self, chart_path: Path) -> None:
+        chart_yaml = _load_yaml_file(chart_path.joinpath("Chart.yaml"))
+        self.name: str = chart_yaml.get("name") or chart_path.name
+        self.defaults = _load_yaml_file(chart_path.joinpath("values.yaml"))
+        self.validator: Optional[Validator] = None
+        schema_path = chart_path.joinpath("values.schema.json")
+        if schema_path.is_file():
+            with open(schema_path, encoding="utf-8") as file:
+                schema = json.load(file)
+            # Use the draft the schema declares, 2019-09 unless declared otherwise.
+            validator_class = validator_for(schema, default=Draft201909Validator)
+            validator_class.check_schema(schema)
+            self.validator = validator_class(schema)
+
+        # Dependencies that are conditional, or not vendored as a directory, can't be
+        # validated in-process and are left to helm.
+        self.dependencies: List[Tuple[str, _SchemaChart]] = []
+        for dependency in chart_yaml.get("dependencies") or []:
+            if dependency.get("condition") or dependency.get("tags"):
+                continue
+            dependency_path = chart_path.joinpath("charts", dependency["name"])
+            if dependency_path.joinpath("Chart.yaml").is_file():
+                self.dependencies.append(
+                    (
+                        dependency.get("alias") or dependency["name"],
+                        schema_chart(dependency_path),
+                    )
+                )
+
+
+def schema_chart(chart_path: Path) -> _SchemaChart:
+    """
+    Return the chart at the given path with its schema compiled. Charts are only
+    compiled again once their Chart.yaml, values.yaml or values.schema.json change.
+    """
+    resolved_path = chart_path.resolve()
+    digests = tuple(
+        file_digest(file_path) if file_path.is_file() else ""
+        for file_path in (
+            resolved_path.joinpath("Chart.yaml"),
+            resolved_path.joinpath("values.schema.json"),
+            resolved_path.joinpath("values.yaml"),
+        )
+    )
+    with _charts_lock:
+        memoized = _charts.get(str(resolved_path))
+    if memoized and memoized[0] == digests:
+        return memoized[1]
+
+    compiled = _SchemaChart(resolved_path)
+    with _charts_lock:
+        _charts[str(resolved_path)] = (digests, compiled)
+    return compiled
+
+
+def validate_values(
+    chart_path: Path,
+    values: Optional[Values],
+    cwd: Optional[str] = None,
+) -> None:
+    """
+    Raise a ValuesSchemaError if the given values, merged like helm merges values
+    files and coalesced with the chart defaults, don't meet the schema of the chart
+    at chart_path or of one of its dependencies. Values files are resolved relative
+    to cwd.
+    """
+    merged_values: Dict[str, Any] = {}
+    for values_instance in values or []:
+        if isinstance(values_instance, str):
+            values_instance = _load_yaml_file(
+                Path(cwd or ".").joinpath(values_instance)
+            )
+        merged_values = _merge_maps(merged_values, _jsonable(values_instance))
+
+    chart = schema_chart(chart_path)
+    coalesced_values = _coalesce(chart, merged_values)
+    failures = "".join(_chart_failures(chart, chart.name, coalesced_values))
+    if failures:
+        raise ValuesSchemaError(f"Error: {SCHEMA_ERROR_HEADER}\n{failures}")
+
+
+def _chart_failures(
+    chart: _SchemaChart,
+    name: str,
+    values: Dict[str, Any],
+) -> Iterator[str]:
+    if chart.validator is not None:
+        descriptions = sorted(
+            description
+            for error in chart.validator.iter_errors(values)
+            for description in _describe(error)
+        )
+        if descriptions:
+            yield f"{name}:\n"
+            for field, description in descriptions:
+                yield f"- {field}: {description}\n"
+    for alias, dependency in chart.dependencies:
+        dependency_values = values.get(alias)
+        if isinstance(dependency_values, dict):
+            yield from _chart_failures(dependency, alias, dependency_values)
+
+
+def _coalesce(chart: _SchemaChart, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Coalesce the values with the defaults of the chart and its dependencies like
+    helm does: values override defaults, tables are coalesced recursively and a null
+    value removes the default it overrides. Dependencies get the globals of their
+    parent.
+    """
+    coalesced = _coalesce_tables(values, copy.deepcopy(chart.defaults))
+    for alias, dependency in chart.dependencies:
+        dependency_values = coalesced.setdefault(alias, {})
+        if not isinstance(dependency_values, dict):
+            continue
+        parent_globals = coalesced.get("global")
+        dependency_globals = dependency_values.get("global")
+        dependency_values["global"] = _merge_maps(
+            dependency_globals if isinstance(dependency_globals, dict) else {},
+            parent_globals if isinstance(parent_globals, dict) else {},
+        )
+        coalesced[alias] = _coalesce(dependency, dependency_values)
+    return coalesced
+
+
+def _coalesce_tables(
+    values: Dict[str, Any], defaults: Dict[str, Any]
+) -> Dict[str, Any]:
+    for key, default in defaults.items():
+        if key not in values:
+            values[key] = default
+        elif values[key] is None:
+            del values[key]
+        elif isinstance(values[key], dict) and isinstance(default, dict):
+            values[key] = _coalesce_tables(values[key], default)
+    return values
+
+
+def _merge_maps(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    # Like helm merges values files: later files win and tables are merged.
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_maps(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _describe(error: ValidationError) -> List[Tuple[str, str]]:
+    """
+    Describe a validation failure as the field it applies to and the description
+    helm (by way of gojsonschema) gives it, once per additional property for
+    additionalProperties failures.
+    """
+    field = ".".join(str(part) for part in error.absolute_path) or "(root)"
+    value = error.validator_value
+    descriptions = {
+        "const": f"{field} does not match: {_json(value)}",
+        "enum": (
+            f"{field} must be one of the following: "
+            + ", ".join(_json(allowed) for allowed in value)
+            if isinstance(value, list)
+            else ""
+        ),
+        "exclusiveMaximum": f"Must be less than {_json(value)}",
+        "exclusiveMinimum": f"Must be greater than {_json(value)}",
+        "format": f"Does not match format '{value}'",
+        "maxItems": f"Array must have at most {value} items",
+        "maxLength": f"String length must be less than or equal to {value}",
+        "maxProperties": f"Must have at most {value} properties",
+        "maximum": f"Must be less than or equal to {_json(value)}",
+        "minItems": f"Array must have at least {value} items",
+        "minLength": f"String length must be greater than or equal to {value}",
+        "minProperties": f"Must have at least {value} properties",
+        "minimum": f"Must be greater than or equal to {_json(value)}",
+        "multipleOf": f"Must be a multiple of {_json(value)}",
+        "pattern": f"Does not match pattern '{value}'",
+        "allOf": "Must validate all the schemas (allOf)",
+        "anyOf": "Must validate at least one schema (anyOf)",
+        "not": "Must not validate the schema (not)",
+        "oneOf": "Must validate one and only one schema (oneOf)",
+    }
+    if error.validator == "type":
+        expected = ",".join(value) if isinstance(value, list) else value
+        given = _type_name(error.instance)
+        return [(field, f"Invalid type. Expected: {expected}, given: {given}")]
+    if error.validator == "required":
+        # e.g. "'name' is a required property"
+        quoted_property, _, _ = error.message.partition(" is a required property")
+        return [(field, f"{ast.literal_eval(quoted_property)} is required")]
+    if error.validator == "additionalProperties" and isinstance(error.instance, dict):
+        return [
+            (field, f"Additional property {key} is not allowed")
+            for key in _additional_properties(
+                error.instance,
+                error.schema if isinstance(error.schema, dict) else {},
+            )
+        ]
+    return [(field, descriptions.get(str(error.validator)) or error.message)]
+
+
+def _additional_properties(
+    instance: Dict[str, Any],
+    schema: Dict[str, Any],
+) -> Iterator[str]:
+    properties = schema.get("properties") or {}
+    patterns = list(schema.get("patternProperties") or {})
+    for key in instance:
+        if key not in properties and not any(
+            re.search(pattern, key) for pattern in patterns
+        ):
+            yield key
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _jsonable(value: Any) -> Any:
+    """
+    Convert loaded YAML to what helm sees: helm converts YAML to JSON, so keys are
+    strings and timestamps are plain strings.
+    """
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load_yaml_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            loaded = yaml.safe_load(file)
+    except FileNotFoundError:
+        return {}
+    return _jsonable(loaded) if isinstance(loaded, dict) else {}
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int) or isinstance(value, float) and value.is_integer():
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
@@ -1,6 +1,6 @@
 from typing import Any, Dict
 
-from tests.test_helpers import random_string
+from tests.test_helpers import get_chart_required_values
 
 CHART_NAME = "generic-api-service"
 EXAMPLE_APP_NAME = "app-name"
@@ -12,12 +12,4 @@ def random_required_values() -> Dict[str, Any]:
     Return a dictionary that includes all required values, but with values that
     are random and can't be relied upon for testing.
     """
-    return {
-        "appName": random_string(),
-        "container": {
-            "image": {
-                "repository": random_string(),
-                "tag": random_string(),
-            },
-        },
-    }
+    return get_chart_required_values(CHART_NAME)
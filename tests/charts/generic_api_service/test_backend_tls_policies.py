@@ -1,8 +1,6 @@
-from typing import Dict, List, Optional, cast
-
-import yaml
-from pytest_helm_templates import HelmRunner
+from typing import Dict, Optional, cast
 
+from helm_charts_dev import HelmRunner, load_yaml
 from tests.charts.generic_api_service import (
     CHART_NAME,
     EXAMPLE_APP_NAME,
@@ -11,6 +9,7 @@ from tests.charts.generic_api_service import (
 )
 from tests.test_helpers import HelperRenderer, random_string
 from tests.test_helpers.test_constants import EXAMPLE_MAPPING, EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
 
 
 def test_backend_tls_policy_resource_is_omitted_by_default(
@@ -62,25 +61,17 @@ def test_static_values_and_defaults(
 
     assert subject["kind"] == "BackendTLSPolicy"
 
-    default_api_version = helper_renderer.render(
-        helper_name="backend-tls-policy-api-version",
+    helpers = helper_renderer.render_many(
+        ["backend-tls-policy-api-version", "full-name", "labels"],
         name=release_name,
         values=values,
     )
+    default_api_version = helpers["backend-tls-policy-api-version"]
     assert subject["apiVersion"] == default_api_version
 
-    default_full_name = helper_renderer.render(
-        "full-name",
-        name=release_name,
-        values=values,
-    )
-
-    default_labels_yaml = helper_renderer.render(
-        "labels",
-        name=release_name,
-        values=values,
-    )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_full_name = helpers["full-name"]
+    default_labels_yaml = helpers["labels"]
+    default_labels = load_yaml(default_labels_yaml)
 
     metadata = subject["metadata"]
     assert metadata["labels"] == default_labels
@@ -219,7 +210,7 @@ def render_subjects(
     helm_runner: HelmRunner,
     name: Optional[str] = None,
     values: Optional[Dict] = None,
-) -> List[Dict]:
+) -> ManifestSet:
     _name = name or random_string()
     _values = random_required_values() | (values or {})
 
@@ -241,10 +232,10 @@ def render_subjects(
         for key, policy_values in policies_values.items()
     }
 
-    manifests = helm_runner.template(
+    manifests = helm_runner.render_templates(
         chart=CHART_NAME,
+        kinds=["BackendTLSPolicy"],
         name=_name,
-        show_only=["templates/backend_tls_policies.yaml"],
         values=[_values],
     )
-    return manifests
+    return ManifestSet(manifests)
@@ -1,9 +1,8 @@
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 import pytest
-import yaml
-from pytest_helm_templates import HelmRunner
 
+from helm_charts_dev import HelmRunner, load_yaml
 from tests.charts.generic_api_service import (
     CHART_NAME,
     EXAMPLE_APP_NAME,
@@ -12,6 +11,30 @@ from tests.charts.generic_api_service import (
 )
 from tests.test_helpers import HelperRenderer, random_string
 from tests.test_helpers.test_constants import EXAMPLE_MAPPING, EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
+
+# Pod values that are passed through to the pod template verbatim, each paired with
+# the values to render it with. Every case is rendered up front in a single helm
+# invocation by the pod_passthrough_subjects fixture.
+POD_PASSTHROUGH_CASES: List[Tuple[str, Optional[Dict[str, Any]]]] = [
+    (key, value)
+    for key in ["affinity", "annotations", "nodeSelector", "securityContext"]
+    for value in [None, EXAMPLE_MAPPING]
+]
+
+
+# Required values for renders declared with the helm_render marker. Declared renders
+# are pre-rendered before the test runs, so their values must be the same every time
+# the marker is evaluated.
+REQUIRED_VALUES = random_required_values()
+
+
+@pytest.fixture(scope="module")
+def pod_passthrough_subjects(helm_runner: HelmRunner) -> List[Dict]:
+    return render_subjects_batch(
+        helm_runner=helm_runner,
+        values_sets=[{"pod": {key: value}} for key, value in POD_PASSTHROUGH_CASES],
+    )
 
 
 def test_static_values_and_defaults(
@@ -32,18 +55,14 @@ def test_static_values_and_defaults(
     assert subject["apiVersion"] == "apps/v1"
     assert subject["kind"] == "Deployment"
 
-    default_full_name = helper_renderer.render(
-        "full-name",
-        name=release_name,
-        values=values,
-    )
-
-    default_labels_yaml = helper_renderer.render(
-        "labels",
+    helpers = helper_renderer.render_many(
+        ["full-name", "labels", "selector-labels", "service-account-name"],
         name=release_name,
         values=values,
     )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_full_name = helpers["full-name"]
+    default_labels_yaml = helpers["labels"]
+    default_labels = load_yaml(default_labels_yaml)
 
     metadata = subject["metadata"]
     assert metadata["labels"] == default_labels
@@ -56,12 +75,8 @@ def test_static_values_and_defaults(
     # strategy is omitted by default, leaving the Kubernetes default.
     assert "strategy" not in spec
 
-    default_selector_labels_yaml = helper_renderer.render(
-        "selector-labels",
-        name=release_name,
-        values=values,
-    )
-    default_selector_labels = yaml.safe_load(default_selector_labels_yaml)
+    default_selector_labels_yaml = helpers["selector-labels"]
+    default_selector_labels = load_yaml(default_selector_labels_yaml)
 
     selector = spec["selector"]
     assert selector["matchLabels"] == default_selector_labels
@@ -118,11 +133,7 @@ def test_static_values_and_defaults(
     assert "imagePullSecrets" not in template_spec
     assert "nodeSelector" not in template_spec
 
-    default_service_account_name = helper_renderer.render(
-        "service-account-name",
-        name=release_name,
-        values=values,
-    )
+    default_service_account_name = helpers["service-account-name"]
     assert template_spec["serviceAccountName"] == default_service_account_name
 
     assert "securityContext" not in template_spec
@@ -144,6 +155,26 @@ def test_replicas_can_be_customized_by_setting_appropriate_value(
     assert subject["spec"]["replicas"] == replica_count
 
 
+@pytest.mark.parametrize(
+    "autoscaling_values",
+    [
+        {"autoscaling": {"create": True}},
+        {"keda": {"create": True, "triggers": {"cpu": {"type": "cpu"}}}},
+    ],
+    ids=["autoscaling", "keda"],
+)
+def test_replicas_are_left_to_the_autoscaler_when_autoscaling(
+    autoscaling_values: Dict,
+    helm_runner: HelmRunner,
+) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values=autoscaling_values | {"replicaCount": 42},
+    )
+
+    assert "replicas" not in subject["spec"]
+
+
 def test_revision_history_limit_can_be_customized_by_setting_appropriate_value(
     chart_values: Dict,
     helm_runner: HelmRunner,
@@ -173,13 +204,12 @@ def test_strategy_can_be_set_with_the_strategy_value(helm_runner: HelmRunner) ->
 
 @pytest.mark.parametrize("expected_annotations", [None, EXAMPLE_MAPPING])
 def test_pod_annotations_can_be_customized_or_omitted_by_setting_appropriate_value(
-    helm_runner: HelmRunner,
+    pod_passthrough_subjects: List[Dict],
     expected_annotations: Optional[Dict[str, Any]],
 ) -> None:
-    subject = render_subject(
-        helm_runner=helm_runner,
-        values={"pod": {"annotations": expected_annotations}},
-    )
+    subject = pod_passthrough_subjects[
+        POD_PASSTHROUGH_CASES.index(("annotations", expected_annotations))
+    ]
 
     annotations = subject["spec"]["template"]["metadata"].get("annotations")
     assert annotations == expected_annotations
@@ -210,7 +240,7 @@ def test_additional_pod_labels_can_be_customized_by_setting_appropriate_value(
         name=release_name,
         values=values,
     )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_labels = load_yaml(default_labels_yaml)
     expected_labels = default_labels | expected_extra_labels
 
     pod_labels = subject["spec"]["template"]["metadata"]["labels"]
@@ -219,16 +249,87 @@ def test_additional_pod_labels_can_be_customized_by_setting_appropriate_value(
 
 @pytest.mark.parametrize("expected_affinity", [None, EXAMPLE_MAPPING])
 def test_affinity_can_be_customized_or_omitted_by_setting_appropriate_value(
-    helm_runner: HelmRunner,
+    pod_passthrough_subjects: List[Dict],
     expected_affinity: Optional[Dict[str, Any]],
 ) -> None:
+    subject = pod_passthrough_subjects[
+        POD_PASSTHROUGH_CASES.index(("affinity", expected_affinity))
+    ]
+
+    affinity = subject["spec"]["template"]["spec"].get("affinity")
+    assert affinity == expected_affinity
+
+
+@pytest.mark.parametrize(
+    "preset, terms_key, weighted",
+    [
+        ("hard", "requiredDuringSchedulingIgnoredDuringExecution", False),
+        ("soft", "preferredDuringSchedulingIgnoredDuringExecution", True),
+    ],
+)
+def test_anti_affinity_presets_are_merged_into_the_affinity_value(
+    helm_runner: HelmRunner,
+    helper_renderer: HelperRenderer,
+    preset: str,
+    terms_key: str,
+    weighted: bool,
+) -> None:
+    values = {"appName": EXAMPLE_APP_NAME}
+    user_term = {"podAffinityTerm": EXAMPLE_MAPPING, "weight": 1}
+    affinity = {
+        "nodeAffinity": EXAMPLE_MAPPING,
+        "podAntiAffinity": {
+            "preferredDuringSchedulingIgnoredDuringExecution": [user_term],
+        },
+    }
     subject = render_subject(
         helm_runner=helm_runner,
-        values={"pod": {"affinity": expected_affinity}},
+        name=EXAMPLE_RELEASE_NAME,
+        values=values
+        | {
+            "pod": {
+                "affinity": affinity,
+                "antiAffinityPreset": preset,
+                "antiAffinityTopologyKey": "topology.kubernetes.io/zone",
+            },
+        },
     )
+    selector_labels = load_yaml(
+        helper_renderer.render(
+            "selector-labels",
+            name=EXAMPLE_RELEASE_NAME,
+            values=values,
+        )
+    )
+    preset_term: Dict[str, Any] = {
+        "labelSelector": {"matchLabels": selector_labels},
+        "topologyKey": "topology.kubernetes.io/zone",
+    }
+    if weighted:
+        preset_term = {"podAffinityTerm": preset_term, "weight": 100}
 
-    affinity = subject["spec"]["template"]["spec"].get("affinity")
-    assert affinity == expected_affinity
+    affinity = subject["spec"]["template"]["spec"]["affinity"]
+    assert affinity["nodeAffinity"] == EXAMPLE_MAPPING
+    pod_anti_affinity = affinity["podAntiAffinity"]
+    assert pod_anti_affinity[terms_key][-1] == preset_term
+    preferred_terms = pod_anti_affinity[
+        "preferredDuringSchedulingIgnoredDuringExecution"
+    ]
+    assert preferred_terms[0] == user_term
+
+
+def test_anti_affinity_presets_do_not_need_the_affinity_value(
+    helm_runner: HelmRunner,
+) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={"pod": {"antiAffinityPreset": "soft"}},
+    )
+    affinity = subject["spec"]["template"]["spec"]["affinity"]
+    assert list(affinity) == ["podAntiAffinity"]
+    assert list(affinity["podAntiAffinity"]) == [
+        "preferredDuringSchedulingIgnoredDuringExecution"
+    ]
 
 
 @pytest.mark.parametrize("expected_env", [None, EXAMPLE_MAPPING])
@@ -242,9 +343,9 @@ def test_container_env_can_be_customized_or_omitted_by_setting_appropriate_value
     values["appName"] = app_name
     _env = {"env-id": expected_env} if expected_env else None
     values["container"]["env"] = _env
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = render_manifests(helm_runner=helm_runner, values=values).container(
+        app_name
+    )
     env = container.get("env")
 
     if env:
@@ -265,9 +366,9 @@ def test_image_repository_can_be_customized_by_setting_appropriate_value(
     values["appName"] = app_name
     values["container"]["image"]["repository"] = image_repository
     values["container"]["image"]["tag"] = image_tag
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = render_manifests(helm_runner=helm_runner, values=values).container(
+        app_name
+    )
     assert container["image"] == f"{image_repository}:{image_tag}"
 
 
@@ -281,9 +382,9 @@ def test_image_tag_can_be_customized_by_setting_appropriate_value(
     values["appName"] = app_name
     values["container"]["image"]["repository"] = image_repository
     values["container"]["image"]["tag"] = image_tag
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = render_manifests(helm_runner=helm_runner, values=values).container(
+        app_name
+    )
     assert container["image"] == f"{image_repository}:{image_tag}"
 
 
@@ -296,12 +397,10 @@ def test_image_pull_policy_can_be_customized_by_setting_appropriate_value(
     values = random_required_values
     values["appName"] = app_name
     values["container"]["image"]["pullPolicy"] = image_pull_policy
-    subject = render_subject(
+    container = render_manifests(
         helm_runner=helm_runner,
         values=values,
-    )
-
-    container = get_container_by_name(app_name, subject)
+    ).container(app_name)
     assert container["imagePullPolicy"] == image_pull_policy
 
 
@@ -318,9 +417,9 @@ def test_liveness_probe_can_be_customized_or_omitted_by_setting_appropriate_valu
     )
     values["appName"] = app_name
     values["container"]["livenessProbe"] = _liveness_probe
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = render_manifests(helm_runner=helm_runner, values=values).container(
+        app_name
+    )
     assert container.get("livenessProbe") == expected_liveness_probe
 
 
@@ -338,12 +437,10 @@ def test_ports_can_be_customized_by_setting_appropriate_value(
         "new": new_port,
         "http": None,
     }
-    subject = render_subject(
+    container = render_manifests(
         helm_runner=helm_runner,
         values={"appName": app_name, "ports": ports},
-    )
-
-    container = get_container_by_name(app_name, subject)
+    ).container(app_name)
     container_ports_by_name = {port["name"]: port for port in container["ports"]}
     assert "http" not in container_ports_by_name
 
@@ -358,12 +455,10 @@ def test_ports_can_be_omitted(
     helm_runner: HelmRunner,
 ) -> None:
     app_name = EXAMPLE_APP_NAME
-    subject = render_subject(
+    container = render_manifests(
         helm_runner=helm_runner,
         values={"appName": app_name, "ports": None},
-    )
-
-    container = get_container_by_name(app_name, subject)
+    ).container(app_name)
     assert "ports" not in container
 
 
@@ -382,60 +477,68 @@ def test_readiness_probe_can_be_customized_or_omitted_by_setting_appropriate_val
     )
     values["appName"] = EXAMPLE_APP_NAME
     values["container"]["readinessProbe"] = _readiness_probe
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = render_manifests(helm_runner=helm_runner, values=values).container(
+        app_name
+    )
     assert container.get("readinessProbe") == expected_readiness_probe
 
 
 @pytest.mark.parametrize("expected_resources", [None, EXAMPLE_MAPPING])
+@pytest.mark.helm_render(
+    CHART_NAME,
+    show_only=["templates/deployment.yaml"],
+    values=lambda expected_resources: [
+        REQUIRED_VALUES,
+        {"appName": EXAMPLE_APP_NAME, "container": {"resources": expected_resources}},
+    ],
+)
 def test_resources_can_be_customized_or_omitted_by_setting_appropriate_value(
-    helm_runner: HelmRunner,
-    random_required_values: Dict[str, Any],
+    helm_render: List[Dict],
     expected_resources: Optional[Dict[str, Any]],
 ) -> None:
-    app_name = EXAMPLE_APP_NAME
-    values = random_required_values
-    values["appName"] = app_name
-    values["container"]["resources"] = expected_resources
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = ManifestSet(helm_render).container(EXAMPLE_APP_NAME)
     assert container.get("resources") == expected_resources
 
 
 @pytest.mark.parametrize("expected_security_context", [None, EXAMPLE_MAPPING])
+@pytest.mark.helm_render(
+    CHART_NAME,
+    show_only=["templates/deployment.yaml"],
+    values=lambda expected_security_context: [
+        REQUIRED_VALUES,
+        {
+            "appName": EXAMPLE_APP_NAME,
+            "container": {"securityContext": expected_security_context},
+        },
+    ],
+)
 def test_container_security_context_can_be_customized_or_omitted_by_setting_appropriate_value(  # noqa: E501
-    helm_runner: HelmRunner,
-    random_required_values: Dict[str, Any],
+    helm_render: List[Dict],
     expected_security_context: Optional[Dict[str, Any]],
 ) -> None:
-    values = random_required_values
-    app_name = EXAMPLE_APP_NAME
-    values["container"]["securityContext"] = expected_security_context
-    values["appName"] = app_name
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = ManifestSet(helm_render).container(EXAMPLE_APP_NAME)
     assert container.get("securityContext") == expected_security_context
 
 
 @pytest.mark.parametrize(
     "expected_startup_probe", [None, {"httpGet": {"grpc": {"port": 2379}}}]
 )
+@pytest.mark.helm_render(
+    CHART_NAME,
+    show_only=["templates/deployment.yaml"],
+    values=lambda expected_startup_probe: [
+        REQUIRED_VALUES,
+        {
+            "appName": EXAMPLE_APP_NAME,
+            "container": {"startupProbe": expected_startup_probe},
+        },
+    ],
+)
 def test_startup_probe_can_be_customized_or_omitted_by_setting_appropriate_value(
-    helm_runner: HelmRunner,
-    random_required_values: Dict[str, Any],
+    helm_render: List[Dict],
     expected_startup_probe: Optional[Dict[str, Any]],
 ) -> None:
-    app_name = EXAMPLE_APP_NAME
-    values = random_required_values
-    _startup_probe = expected_startup_probe if expected_startup_probe else None
-    values["appName"] = EXAMPLE_APP_NAME
-    values["container"]["startupProbe"] = _startup_probe
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = ManifestSet(helm_render).container(EXAMPLE_APP_NAME)
     assert container.get("startupProbe") == expected_startup_probe
 
 
@@ -451,9 +554,9 @@ def test_volume_mounts_can_be_customized_or_omitted_by_setting_appropriate_value
     values["container"]["volumeMounts"] = (
         {"volume-mount-id": expected_volume_mount} if expected_volume_mount else None
     )
-    subject = render_subject(helm_runner=helm_runner, values=values)
-
-    container = get_container_by_name(app_name, subject)
+    container = render_manifests(helm_runner=helm_runner, values=values).container(
+        app_name
+    )
     volume_mounts = container.get("volumeMounts")
 
     if expected_volume_mount:
@@ -491,13 +594,12 @@ def test_image_pull_secrets_can_be_customized_or_omitted_by_setting_appropriate_
 
 @pytest.mark.parametrize("expected_node_selector", [None, EXAMPLE_MAPPING])
 def test_node_selector_can_be_customized_or_omitted_by_setting_appropriate_value(
-    helm_runner: HelmRunner,
+    pod_passthrough_subjects: List[Dict],
     expected_node_selector: Optional[Dict[str, Any]],
 ) -> None:
-    subject = render_subject(
-        helm_runner=helm_runner,
-        values={"pod": {"nodeSelector": expected_node_selector}},
-    )
+    subject = pod_passthrough_subjects[
+        POD_PASSTHROUGH_CASES.index(("nodeSelector", expected_node_selector))
+    ]
 
     node_selector = subject["spec"]["template"]["spec"].get("nodeSelector")
     assert node_selector == expected_node_selector
@@ -505,13 +607,12 @@ def test_node_selector_can_be_customized_or_omitted_by_setting_appropriate_value
 
 @pytest.mark.parametrize("expected_security_context", [None, EXAMPLE_MAPPING])
 def test_security_context_can_be_customized_or_omitted_by_setting_appropriate_value(
-    helm_runner: HelmRunner,
+    pod_passthrough_subjects: List[Dict],
     expected_security_context: Optional[Dict[str, Any]],
 ) -> None:
-    subject = render_subject(
-        helm_runner=helm_runner,
-        values={"pod": {"securityContext": expected_security_context}},
-    )
+    subject = pod_passthrough_subjects[
+        POD_PASSTHROUGH_CASES.index(("securityContext", expected_security_context))
+    ]
 
     security_context = subject["spec"]["template"]["spec"].get("securityContext")
     assert security_context == expected_security_context
@@ -538,6 +639,77 @@ def test_tolerations_can_be_customized_or_omitted_by_setting_appropriate_value(
         assert tolerations is None
 
 
+def test_topology_spread_constraints_are_omitted_by_default(
+    helm_runner: HelmRunner,
+) -> None:
+    subject = render_subject(helm_runner=helm_runner)
+    assert "topologySpreadConstraints" not in subject["spec"]["template"]["spec"]
+
+
+@pytest.mark.parametrize(
+    "preset, topology_key",
+    [("hostname", "kubernetes.io/hostname"), ("zone", "topology.kubernetes.io/zone")],
+)
+def test_topology_spread_constraint_presets_default_to_selector_labels(
+    helm_runner: HelmRunner,
+    helper_renderer: HelperRenderer,
+    preset: str,
+    topology_key: str,
+) -> None:
+    values = {"appName": EXAMPLE_APP_NAME}
+    subject = render_subject(
+        helm_runner=helm_runner,
+        name=EXAMPLE_RELEASE_NAME,
+        values=values
+        | {"pod": {"topologySpreadConstraints": {"spread": {"preset": preset}}}},
+    )
+    selector_labels = load_yaml(
+        helper_renderer.render(
+            "selector-labels",
+            name=EXAMPLE_RELEASE_NAME,
+            values=values,
+        )
+    )
+
+    assert subject["spec"]["template"]["spec"]["topologySpreadConstraints"] == [
+        {
+            "labelSelector": {"matchLabels": selector_labels},
+            "matchLabelKeys": ["pod-template-hash"],
+            "maxSkew": 1,
+            "topologyKey": topology_key,
+            "whenUnsatisfiable": "ScheduleAnyway",
+        },
+    ]
+
+
+def test_topology_spread_constraints_can_override_presets_and_defaults(
+    helm_runner: HelmRunner,
+) -> None:
+    custom_constraint = {
+        "labelSelector": {"matchLabels": EXAMPLE_MAPPING},
+        "matchLabelKeys": [],
+        "maxSkew": 2,
+        "topologyKey": "example.com/rack",
+        "whenUnsatisfiable": "DoNotSchedule",
+    }
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "pod": {
+                "topologySpreadConstraints": {
+                    "racks": custom_constraint,
+                    "zones": custom_constraint | {"preset": "zone"},
+                },
+            },
+        },
+    )
+
+    assert subject["spec"]["template"]["spec"]["topologySpreadConstraints"] == [
+        custom_constraint,
+        custom_constraint,
+    ]
+
+
 @pytest.mark.parametrize("expected_volume", [None, EXAMPLE_MAPPING])
 def test_volumes_can_be_customized_or_omitted_by_setting_appropriate_value(
     helm_runner: HelmRunner,
@@ -558,16 +730,20 @@ def test_volumes_can_be_customized_or_omitted_by_setting_appropriate_value(
         assert volumes is None
 
 
-def get_container_by_name(
-    container_name: str,
-    manifest: Dict[str, Any],
-) -> Dict[str, Any]:
-    containers = manifest["spec"]["template"]["spec"]["containers"]
-    for container in containers:
-        if container["name"] == container_name and isinstance(container, Dict):
-            return container
-
-    raise RuntimeError(f"Could not find container with name {container_name}")
+def render_manifests(
+    helm_runner: HelmRunner,
+    name: Optional[str] = None,
+    values: Dict = {},
+) -> ManifestSet:
+    _name = name or random_string()
+    return ManifestSet(
+        helm_runner.render_templates(
+            chart=CHART_NAME,
+            kinds=["Deployment"],
+            name=_name,
+            values=[random_required_values() | values],
+        )
+    )
 
 
 def render_subject(
@@ -575,13 +751,24 @@ def render_subject(
     name: Optional[str] = None,
     values: Dict = {},
 ) -> Dict:
-    _name = name or random_string()
-    manifests = helm_runner.template(
+    return render_manifests(helm_runner=helm_runner, name=name, values=values).one(
+        "Deployment"
+    )
+
+
+def render_subjects_batch(
+    helm_runner: HelmRunner,
+    values_sets: List[Dict],
+    name: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Like render_subject, but renders a Deployment for each of the given sets of
+    values in a single helm invocation. Every set shares the release name.
+    """
+    batches = helm_runner.template_batch(
         chart=CHART_NAME,
-        name=_name,
+        name=name or random_string(),
         show_only=["templates/deployment.yaml"],
-        values=[random_required_values() | values],
+        values=[[random_required_values() | values] for values in values_sets],
     )
-    subject = manifests[0]
-    assert subject["kind"] == "Deployment"
-    return subject
+    return [ManifestSet(manifests).one("Deployment") for manifests in batches]
@@ -1,7 +1,6 @@
 from typing import Any, Dict
 
-import yaml
-
+from helm_charts_dev import HelmRunner, load_yaml
 from tests.charts.generic_api_service import (
     CHART_NAME,
     EXAMPLE_APP_NAME,
@@ -182,7 +181,7 @@ def test_labels_includes_expected_labels(
         name=release_name,
         values={"appName": app_name, "appVersion": app_version},
     )
-    labels = yaml.safe_load(labels_yaml)
+    labels = load_yaml(labels_yaml)
     assert len(labels) == 5
     assert labels["app.kubernetes.io/instance"] == release_name
     assert labels["app.kubernetes.io/managed-by"] == "Helm"
@@ -201,7 +200,7 @@ def test_selector_labels_includes_expected_labels(
         name=release_name,
         values={"appName": app_name},
     )
-    selector_labels = yaml.safe_load(selector_labels_yaml)
+    selector_labels = load_yaml(selector_labels_yaml)
     assert len(selector_labels) == 2
     assert selector_labels["app.kubernetes.io/instance"] == release_name
     assert selector_labels["app.kubernetes.io/name"] == app_name
@@ -380,3 +379,76 @@ def test_backend_traffic_policy_api_version_can_be_set_with_global_gateway_api_v
         },
     )
     assert api_version == expected_api_version
+
+
+def test_render_many_matches_rendering_each_helper_individually(
+    helper_renderer: HelperRenderer,
+) -> None:
+    helper_names = ["full-name", "labels", "selector-labels", "service-account-name"]
+    values = {"appName": EXAMPLE_APP_NAME, "appVersion": EXAMPLE_APP_VERSION}
+    rendered = helper_renderer.render_many(
+        helper_names,
+        name=EXAMPLE_RELEASE_NAME,
+        values=values,
+    )
+    assert list(rendered) == helper_names
+    for helper_name in helper_names:
+        assert rendered[helper_name] == helper_renderer.render(
+            helper_name,
+            name=EXAMPLE_RELEASE_NAME,
+            values=values,
+        )
+
+
+def test_context_matches_the_helpers_it_memoizes(
+    helm_runner: HelmRunner,
+    helper_renderer: HelperRenderer,
+    random_required_values: Dict[str, Any],
+) -> None:
+    values = {
+        "appName": EXAMPLE_APP_NAME,
+        "ports": {
+            "http": {
+                "containerPort": 8080,
+                "name": "http",
+                "protocol": "TCP",
+                "servicePort": 80,
+            },
+        },
+    }
+    rendered = helm_runner.adhoc_template(
+        chart=CHART_NAME,
+        content=(
+            '{{- include "generic-api-service.context" . -}}\n'
+            '{{- include "generic-api-service.context" . -}}\n'
+            "context: {{ .genericApiServiceContext | toJson }}\n"
+            "port: {{"
+            ' include "generic-api-service.service-port-number" (list $ "http")'
+            " }}\n"
+        ),
+        name=EXAMPLE_RELEASE_NAME,
+        values=[random_required_values | values],
+    )
+    helpers = helper_renderer.render_many(
+        [
+            "backend-tls-policy-api-version",
+            "backend-traffic-policy-api-version",
+            "full-name",
+            "http-route-api-version",
+            "labels",
+            "service-name",
+        ],
+        name=EXAMPLE_RELEASE_NAME,
+        values=values,
+    )
+
+    assert rendered["context"] == {
+        "backendTlsPolicyApiVersion": helpers["backend-tls-policy-api-version"],
+        "backendTrafficPolicyApiVersion": helpers["backend-traffic-policy-api-version"],
+        "fullName": helpers["full-name"],
+        "httpRouteApiVersion": helpers["http-route-api-version"],
+        "labels": helpers["labels"],
+        "serviceName": helpers["service-name"],
+        "servicePorts": {"http": 80},
+    }
+    assert rendered["port"] == 80
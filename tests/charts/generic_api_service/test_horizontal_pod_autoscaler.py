@@ -0,0 +1,187 @@
+from typing import Dict, Optional
+
+import pytest
+
+from helm_charts_dev import HelmRunner, load_yaml
+from tests.charts.generic_api_service import (
+    CHART_NAME,
+    EXAMPLE_APP_NAME,
+    EXAMPLE_APP_VERSION,
+    random_required_values,
+)
+from tests.test_helpers import HelperRenderer, random_string
+from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
+
+EXTERNAL_METRIC = {
+    "type": "External",
+    "external": {
+        "metric": {"name": "queue_messages_ready"},
+        "target": {"type": "AverageValue", "averageValue": "30"},
+    },
+}
+
+
+def test_horizontal_pod_autoscaler_is_omitted_by_default(
+    helm_runner: HelmRunner,
+) -> None:
+    resources = helm_runner.template(
+        chart=CHART_NAME,
+        name="any-name",
+        values=[random_required_values()],
+    )
+    assert len(resources) > 0
+    assert all(
+        resource.get("kind") != "HorizontalPodAutoscaler" for resource in resources
+    )
+
+
+def test_static_values_and_defaults(
+    chart_values: Dict,
+    helm_runner: HelmRunner,
+    helper_renderer: HelperRenderer,
+) -> None:
+    release_name = EXAMPLE_RELEASE_NAME
+    values = {
+        "appName": EXAMPLE_APP_NAME,
+        "appVersion": EXAMPLE_APP_VERSION,
+    }
+    subject = render_subject(helm_runner=helm_runner, name=release_name, values=values)
+
+    assert subject["apiVersion"] == "autoscaling/v2"
+    assert subject["kind"] == "HorizontalPodAutoscaler"
+
+    helpers = helper_renderer.render_many(
+        ["full-name", "labels"],
+        name=release_name,
+        values=values,
+    )
+    default_full_name = helpers["full-name"]
+    default_labels = load_yaml(helpers["labels"])
+
+    metadata = subject["metadata"]
+    assert metadata["labels"] == default_labels
+    assert metadata["name"] == default_full_name
+
+    autoscaling_values = chart_values["autoscaling"]
+    spec = subject["spec"]
+    assert "behavior" not in spec
+    assert spec["maxReplicas"] == autoscaling_values["maxReplicas"]
+    assert spec["minReplicas"] == autoscaling_values["minReplicas"]
+    assert spec["metrics"] == [
+        resource_metric("cpu", autoscaling_values["targetCPUUtilizationPercentage"]),
+    ]
+    assert spec["scaleTargetRef"] == {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "name": default_full_name,
+    }
+
+
+def test_replica_limits_can_be_customized(helm_runner: HelmRunner) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={"autoscaling": {"maxReplicas": 20, "minReplicas": 4}},
+    )
+    assert subject["spec"]["maxReplicas"] == 20
+    assert subject["spec"]["minReplicas"] == 4
+
+
+def test_min_replicas_must_not_exceed_max_replicas(helm_runner: HelmRunner) -> None:
+    with pytest.raises(RuntimeError, match="must not exceed autoscaling.maxReplicas"):
+        render_subject(
+            helm_runner=helm_runner,
+            values={"autoscaling": {"maxReplicas": 2, "minReplicas": 3}},
+        )
+
+
+def test_utilization_targets_and_metrics_can_be_customized(
+    helm_runner: HelmRunner,
+) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "autoscaling": {
+                "metrics": {"queue_depth": EXTERNAL_METRIC},
+                "targetCPUUtilizationPercentage": 60,
+                "targetMemoryUtilizationPercentage": 75,
+            },
+        },
+    )
+    assert subject["spec"]["metrics"] == [
+        resource_metric("cpu", 60),
+        resource_metric("memory", 75),
+        EXTERNAL_METRIC,
+    ]
+
+
+def test_utilization_targets_can_be_omitted(helm_runner: HelmRunner) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "autoscaling": {
+                "metrics": {"queue_depth": EXTERNAL_METRIC},
+                "targetCPUUtilizationPercentage": None,
+            },
+        },
+    )
+    assert subject["spec"]["metrics"] == [EXTERNAL_METRIC]
+
+
+def test_metrics_set_to_null_are_ignored(helm_runner: HelmRunner) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "autoscaling": {
+                "metrics": {"gone": None, "queue_depth": EXTERNAL_METRIC},
+                "targetCPUUtilizationPercentage": None,
+            },
+        },
+    )
+    assert subject["spec"]["metrics"] == [EXTERNAL_METRIC]
+
+
+def test_behavior_is_passed_through(helm_runner: HelmRunner) -> None:
+    behavior = {
+        "scaleDown": {
+            "policies": [{"periodSeconds": 60, "type": "Percent", "value": 50}],
+            "stabilizationWindowSeconds": 300,
+        },
+        "scaleUp": {
+            "policies": [{"periodSeconds": 15, "type": "Pods", "value": 4}],
+        },
+    }
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={"autoscaling": {"behavior": behavior}},
+    )
+    assert subject["spec"]["behavior"] == behavior
+
+
+def render_subject(
+    helm_runner: HelmRunner,
+    name: Optional[str] = None,
+    values: Optional[Dict] = None,
+) -> Dict:
+    _values = random_required_values() | (values or {})
+    _values["autoscaling"] = {"create": True} | _values.get("autoscaling", {})
+    manifests = helm_runner.render_templates(
+        chart=CHART_NAME,
+        kinds=["HorizontalPodAutoscaler"],
+        name=name or random_string(),
+        values=[_values],
+    )
+    return ManifestSet(manifests).one("HorizontalPodAutoscaler")
+
+
+def resource_metric(resource: str, average_utilization: int) -> Dict:
+    return {
+        "type": "Resource",
+        "resource": {
+            "name": resource,
+            "target": {
+                "averageUtilization": average_utilization,
+                "type": "Utilization",
+            },
+        },
+    }
@@ -1,10 +1,10 @@
 from typing import Dict, Optional
 
-from pytest_helm_templates import HelmRunner
-
+from helm_charts_dev import HelmRunner
 from tests.charts.generic_api_service import CHART_NAME, random_required_values
 from tests.test_helpers import HelperRenderer, random_string
 from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
 
 
 def test_static_values_and_defaults(
@@ -83,12 +83,12 @@ def render_subject(
     _values = random_required_values() | values
     namespace_values = _values.get("namespace", {})
     _values["namespace"] = default_namespace_values | namespace_values
-    manifests = helm_runner.template(
-        chart=CHART_NAME,
-        name=_name,
-        show_only=["templates/namespace.yaml"],
-        values=[_values],
+    manifests = ManifestSet(
+        helm_runner.render_templates(
+            chart=CHART_NAME,
+            kinds=["Namespace"],
+            name=_name,
+            values=[_values],
+        )
     )
-    subject = manifests[0]
-    assert subject["kind"] == "Namespace"
-    return subject
+    return manifests.one("Namespace")
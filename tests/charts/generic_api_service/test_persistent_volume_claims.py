@@ -1,8 +1,6 @@
-from typing import Dict, List, Optional, cast
-
-import yaml
-from pytest_helm_templates import HelmRunner
+from typing import Dict, Optional, cast
 
+from helm_charts_dev import HelmRunner, load_yaml
 from tests.charts.generic_api_service import (
     CHART_NAME,
     EXAMPLE_APP_NAME,
@@ -11,6 +9,7 @@ from tests.charts.generic_api_service import (
 )
 from tests.test_helpers import HelperRenderer, random_string
 from tests.test_helpers.test_constants import EXAMPLE_MAPPING, EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
 
 
 def test_persistent_volume_claim_is_omitted_by_default(helm_runner: HelmRunner) -> None:
@@ -61,18 +60,14 @@ def test_static_values_and_defaults(
     assert subject["apiVersion"] == "v1"
     assert subject["kind"] == "PersistentVolumeClaim"
 
-    default_full_name = helper_renderer.render(
-        "full-name",
-        name=release_name,
-        values=values,
-    )
-
-    default_labels_yaml = helper_renderer.render(
-        "labels",
+    helpers = helper_renderer.render_many(
+        ["full-name", "labels"],
         name=release_name,
         values=values,
     )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_full_name = helpers["full-name"]
+    default_labels_yaml = helpers["labels"]
+    default_labels = load_yaml(default_labels_yaml)
 
     metadata = subject["metadata"]
     assert metadata["labels"] == default_labels
@@ -134,7 +129,7 @@ def render_subjects(
     helm_runner: HelmRunner,
     name: Optional[str] = None,
     values: Optional[Dict] = None,
-) -> List[Dict]:
+) -> ManifestSet:
     _name = name or random_string()
     _values = random_required_values() | (values or {})
 
@@ -152,10 +147,10 @@ def render_subjects(
         key: (default_pvc_values | pvc) for key, pvc in pvc_values.items()
     }
 
-    manifests = helm_runner.template(
+    manifests = helm_runner.render_templates(
         chart=CHART_NAME,
+        kinds=["PersistentVolumeClaim"],
         name=_name,
-        show_only=["templates/persistent_volume_claims.yaml"],
         values=[_values],
     )
-    return manifests
+    return ManifestSet(manifests)
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional
+
+import pytest
+
+from helm_charts_dev import HelmRunner, load_yaml
+from tests.charts.generic_api_service import (
+    CHART_NAME,
+    EXAMPLE_APP_NAME,
+    EXAMPLE_APP_VERSION,
+    random_required_values,
+)
+from tests.test_helpers import HelperRenderer, random_string
+from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
+
+KEDA_VALUES = {"create": True, "triggers": {"cpu": {"type": "cpu"}}}
+
+
+@pytest.mark.parametrize(
+    "values, expected_count",
+    [
+        ({}, 0),
+        ({"replicaCount": 2}, 1),
+        ({"autoscaling": {"create": True}}, 1),
+        ({"keda": KEDA_VALUES}, 1),
+        ({"podDisruptionBudget": {"create": True}}, 1),
+        ({"podDisruptionBudget": {"create": False}, "replicaCount": 2}, 0),
+    ],
+    ids=[
+        "single_replica",
+        "multiple_replicas",
+        "autoscaling",
+        "keda",
+        "created_explicitly",
+        "omitted_explicitly",
+    ],
+)
+def test_pod_disruption_budget_is_created_when_running_multiple_replicas(
+    helm_runner: HelmRunner,
+    values: Dict,
+    expected_count: int,
+) -> None:
+    assert (
+        len(render_subjects(helm_runner=helm_runner, values=values)) == expected_count
+    )
+
+
+def test_static_values_and_defaults(
+    chart_values: Dict,
+    helm_runner: HelmRunner,
+    helper_renderer: HelperRenderer,
+) -> None:
+    release_name = EXAMPLE_RELEASE_NAME
+    values = {
+        "appName": EXAMPLE_APP_NAME,
+        "appVersion": EXAMPLE_APP_VERSION,
+        "replicaCount": 2,
+    }
+    subject = render_subjects(
+        helm_runner=helm_runner,
+        name=release_name,
+        values=values,
+    )[0]
+
+    assert subject["apiVersion"] == "policy/v1"
+    assert subject["kind"] == "PodDisruptionBudget"
+
+    helpers = helper_renderer.render_many(
+        ["full-name", "labels", "selector-labels"],
+        name=release_name,
+        values=values,
+    )
+    metadata = subject["metadata"]
+    assert metadata["labels"] == load_yaml(helpers["labels"])
+    assert metadata["name"] == helpers["full-name"]
+
+    spec = subject["spec"]
+    assert "minAvailable" not in spec
+    assert "unhealthyPodEvictionPolicy" not in spec
+    assert (
+        spec["maxUnavailable"] == chart_values["podDisruptionBudget"]["maxUnavailable"]
+    )
+    assert spec["selector"] == {"matchLabels": load_yaml(helpers["selector-labels"])}
+
+
+@pytest.mark.parametrize(
+    "budget_values, expected_budget",
+    [
+        ({"maxUnavailable": 2}, {"maxUnavailable": 2}),
+        ({"maxUnavailable": "25%"}, {"maxUnavailable": "25%"}),
+        ({"minAvailable": 1}, {"minAvailable": 1}),
+        ({"minAvailable": "50%"}, {"minAvailable": "50%"}),
+        ({"maxUnavailable": 2, "minAvailable": 1}, {"minAvailable": 1}),
+        ({"maxUnavailable": None}, {}),
+    ],
+    ids=[
+        "max_unavailable",
+        "max_unavailable_percentage",
+        "min_available",
+        "min_available_percentage",
+        "min_available_takes_precedence",
+        "neither",
+    ],
+)
+def test_budget_can_be_a_number_or_percentage(
+    helm_runner: HelmRunner,
+    budget_values: Dict,
+    expected_budget: Dict,
+) -> None:
+    spec = render_subjects(
+        helm_runner=helm_runner,
+        values={"podDisruptionBudget": {"create": True} | budget_values},
+    )[0]["spec"]
+    assert {
+        key: spec[key] for key in ["maxUnavailable", "minAvailable"] if key in spec
+    } == expected_budget
+
+
+def test_unhealthy_pod_eviction_policy_can_be_customized(
+    helm_runner: HelmRunner,
+) -> None:
+    subject = render_subjects(
+        helm_runner=helm_runner,
+        values={
+            "podDisruptionBudget": {
+                "create": True,
+                "unhealthyPodEvictionPolicy": "AlwaysAllow",
+            },
+        },
+    )[0]
+    assert subject["spec"]["unhealthyPodEvictionPolicy"] == "AlwaysAllow"
+
+
+def render_subjects(
+    helm_runner: HelmRunner,
+    name: Optional[str] = None,
+    values: Optional[Dict] = None,
+) -> List[Dict]:
+    manifests = helm_runner.render_templates(
+        chart=CHART_NAME,
+        kinds=["PodDisruptionBudget"],
+        name=name or random_string(),
+        values=[random_required_values() | (values or {})],
+    )
+    return list(ManifestSet(manifests))
@@ -0,0 +1,225 @@
+"""
+Benchmarks of how the time to render the chart grows with the size of its values.
+They are slow and timing sensitive, so they are excluded by default; run them with
+`pytest -m benchmark`.
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+import pytest
+import yaml
+
+from helm_charts_dev import HelmRunner
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import deep_merge, make_helm_runner
+from tests.test_helpers.test_benchmarks import (
+    MAX_GROWTH_EXPONENT,
+    growth_exponent,
+    measure_helm_process,
+    time_renders,
+)
+
+pytestmark = pytest.mark.benchmark
+
+# How many times each lookup idiom's helm process is run, and by how much longer
+# than the copy, in seconds, AsMap's median may take. Starting helm varies by tens
+# of milliseconds, so a relative margin on a single process fails at random.
+LOOKUP_REPEATS = 9
+LOOKUP_SLACK_SECONDS = 0.1
+
+
+def ports(count: int) -> Dict[str, Dict]:
+    return {
+        f"port-{index}": {
+            "containerPort": 1024 + index,
+            "name": f"port-{index}",
+            "protocol": "TCP",
+            "servicePort": 1024 + index,
+        }
+        for index in range(count)
+    }
+
+
+def http_routes(count: int, port_count: int) -> Dict[str, Dict]:
+    return {
+        f"route-{index}": {
+            "create": True,
+            "name": f"route-{index}",
+            "parentRefs": {"gateway": {"name": "gateway-name"}},
+            "rules": {
+                "root": {
+                    "backendRefs": {
+                        "service": {"portName": f"port-{index % port_count}"},
+                    },
+                    "matches": {
+                        "root": {"path": {"type": "PathPrefix", "value": "/"}},
+                    },
+                },
+            },
+        }
+        for index in range(count)
+    }
+
+
+SCALING_CASES: Dict[str, Any] = {
+    "backend_traffic_policies": (
+        "templates/backend_traffic_policies.yaml",
+        lambda size: {
+            "backendTrafficPolicies": {
+                f"policy-{index}": {
+                    "create": True,
+                    "name": f"policy-{index}",
+                    "spec": {"timeout": {"http": {"requestTimeout": "300s"}}},
+                    "targetRefs": {"route": {"name": f"route-{index}"}},
+                }
+                for index in range(size)
+            },
+        },
+    ),
+    "container_env": (
+        "templates/deployment.yaml",
+        lambda size: {
+            "container": {
+                "env": {
+                    f"VARIABLE_{index}": {"name": f"VARIABLE_{index}", "value": "x"}
+                    for index in range(size)
+                },
+            },
+        },
+    ),
+    "http_routes": (
+        "templates/http_routes.yaml",
+        lambda size: {"httpRoutes": http_routes(size, port_count=1), "ports": ports(1)},
+    ),
+    "persistent_volume_claims": (
+        "templates/persistent_volume_claims.yaml",
+        lambda size: {
+            "persistentVolumeClaims": {
+                f"claim-{index}": {
+                    "create": True,
+                    "spec": {
+                        "accessModes": ["ReadWriteOnce"],
+                        "resources": {"requests": {"storage": "1Gi"}},
+                    },
+                }
+                for index in range(size)
+            },
+        },
+    ),
+    "ports": ("templates/deployment.yaml", lambda size: {"ports": ports(size)}),
+    "http_routes_and_ports": (
+        "templates/http_routes.yaml",
+        lambda size: {"httpRoutes": http_routes(size, size), "ports": ports(size)},
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def uncached_helm_runner() -> Iterator[HelmRunner]:
+    # Benchmarks must never be served from the render cache.
+    helm_runner = make_helm_runner()
+    helm_runner.dependency_update_if_missing(chart=CHART_NAME)
+    yield helm_runner
+    helm_runner.close()
+
+
+@pytest.mark.parametrize(
+    "template,values_for_size",
+    list(SCALING_CASES.values()),
+    ids=list(SCALING_CASES),
+)
+def test_render_time_grows_linearly(
+    record_property: Callable[[str, object], None],
+    template: str,
+    tmp_path: Path,
+    uncached_helm_runner: HelmRunner,
+    values_for_size: Callable[[int], Dict[str, Any]],
+) -> None:
+    required_values = random_required_values()
+    timings = time_renders(
+        helm_runner=uncached_helm_runner,
+        chart=CHART_NAME,
+        template=template,
+        values_for_size=lambda size: deep_merge(
+            required_values,
+            values_for_size(size),
+        ),
+        values_dir=tmp_path,
+    )
+    exponent = growth_exponent(
+        [timing.size for timing in timings],
+        [timing.seconds for timing in timings],
+    )
+    for timing in timings:
+        record_property(f"seconds[{timing.size}]", round(timing.seconds, 4))
+        record_property(f"output_bytes[{timing.size}]", timing.output_bytes)
+    record_property("growth_exponent", exponent)
+
+    timings_description = "".join(
+        f"\n  {timing.size}: {timing.seconds:.3f}s, {timing.output_bytes} bytes"
+        for timing in timings
+    )
+    assert (
+        exponent <= MAX_GROWTH_EXPONENT
+    ), f"Render time grows like size ** {exponent}:{timings_description}"
+
+
+def test_values_lookups_do_not_copy_values(
+    record_property: Callable[[str, object], None],
+    tmp_path: Path,
+) -> None:
+    """
+    Compare the dig-able view of the values the chart's helpers use,
+    `.Values.AsMap`, to the `.Values | merge (dict)` idiom it replaced, by doing a
+    thousand lookups with each against the values of a large release.
+    """
+    lookups_path = tmp_path.joinpath("lookups")
+    lookups_path.joinpath("templates").mkdir(parents=True)
+    lookups_path.joinpath("Chart.yaml").write_text(
+        "apiVersion: v2\nname: lookups\nversion: 0.0.0\n",
+        encoding="utf-8",
+    )
+    idioms = {"as_map": "$.Values.AsMap", "merge": "$.Values | merge (dict)"}
+    for idiom, expression in idioms.items():
+        lookups_path.joinpath("templates", f"{idiom}.yaml").write_text(
+            "{{- range until 1000 }}\n"
+            f'lookup-{{{{ . }}}}: {{{{ {expression} | dig "service" "name" "" }}}}\n'
+            "{{- end }}\n",
+            encoding="utf-8",
+        )
+    values_path = tmp_path.joinpath("values.yaml")
+    with open(values_path, encoding="utf-8", mode="w") as file:
+        yaml.safe_dump(
+            deep_merge(
+                SCALING_CASES["container_env"][1](1000),
+                {"httpRoutes": http_routes(1000, 1000), "ports": ports(1000)},
+            ),
+            file,
+        )
+
+    measurements = {
+        idiom: measure_helm_process(
+            [
+                "helm",
+                "template",
+                "benchmark",
+                str(lookups_path),
+                "--show-only",
+                f"templates/{idiom}.yaml",
+                "--values",
+                str(values_path),
+            ],
+            repeats=LOOKUP_REPEATS,
+        )
+        for idiom in idioms
+    }
+    for idiom, (seconds, max_rss) in measurements.items():
+        record_property(f"seconds[{idiom}]", round(seconds, 4))
+        record_property(f"max_rss_kilobytes[{idiom}]", max_rss)
+
+    # Allow for noise: the point is that AsMap never costs more than the copy did.
+    as_map_seconds, as_map_max_rss = measurements["as_map"]
+    merge_seconds, merge_max_rss = measurements["merge"]
+    assert as_map_seconds <= merge_seconds + LOOKUP_SLACK_SECONDS
+    assert as_map_max_rss <= merge_max_rss * 1.25
@@ -0,0 +1,196 @@
+from typing import Dict, Optional
+
+import pytest
+
+from helm_charts_dev import HelmRunner, load_yaml
+from tests.charts.generic_api_service import (
+    CHART_NAME,
+    EXAMPLE_APP_NAME,
+    EXAMPLE_APP_VERSION,
+    random_required_values,
+)
+from tests.test_helpers import HelperRenderer, random_string
+from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
+
+CRON_TRIGGER = {
+    "type": "cron",
+    "metadata": {
+        "desiredReplicas": "4",
+        "end": "0 18 * * 1-5",
+        "start": "0 8 * * 1-5",
+        "timezone": "Etc/UTC",
+    },
+}
+PROMETHEUS_TRIGGER = {
+    "type": "prometheus",
+    "metadata": {
+        "query": "sum(rate(http_requests_total[2m]))",
+        "serverAddress": "http://prometheus.monitoring:9090",
+        "threshold": "100",
+    },
+}
+
+
+def test_scaled_object_is_omitted_by_default(helm_runner: HelmRunner) -> None:
+    resources = helm_runner.template(
+        chart=CHART_NAME,
+        name="any-name",
+        values=[random_required_values()],
+    )
+    assert len(resources) > 0
+    assert all(resource.get("kind") != "ScaledObject" for resource in resources)
+
+
+def test_static_values_and_defaults(
+    chart_values: Dict,
+    helm_runner: HelmRunner,
+    helper_renderer: HelperRenderer,
+) -> None:
+    release_name = EXAMPLE_RELEASE_NAME
+    values = {
+        "appName": EXAMPLE_APP_NAME,
+        "appVersion": EXAMPLE_APP_VERSION,
+    }
+    subject = render_subject(helm_runner=helm_runner, name=release_name, values=values)
+
+    assert subject["apiVersion"] == "keda.sh/v1alpha1"
+    assert subject["kind"] == "ScaledObject"
+
+    helpers = helper_renderer.render_many(
+        ["full-name", "labels"],
+        name=release_name,
+        values=values,
+    )
+    default_full_name = helpers["full-name"]
+    default_labels = load_yaml(helpers["labels"])
+
+    metadata = subject["metadata"]
+    assert metadata["labels"] == default_labels
+    assert metadata["name"] == default_full_name
+
+    keda_values = chart_values["keda"]
+    spec = subject["spec"]
+    assert "advanced" not in spec
+    assert "fallback" not in spec
+    assert spec["cooldownPeriod"] == keda_values["cooldownPeriod"]
+    assert spec["maxReplicaCount"] == keda_values["maxReplicaCount"]
+    assert spec["minReplicaCount"] == keda_values["minReplicaCount"]
+    assert spec["pollingInterval"] == keda_values["pollingInterval"]
+    assert spec["scaleTargetRef"] == {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "name": default_full_name,
+    }
+    assert spec["triggers"] == [CRON_TRIGGER]
+
+
+def test_replica_counts_and_timings_can_be_customized(
+    helm_runner: HelmRunner,
+) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "keda": {
+                "cooldownPeriod": 60,
+                "maxReplicaCount": 20,
+                "minReplicaCount": 0,
+                "pollingInterval": 15,
+            },
+        },
+    )
+    spec = subject["spec"]
+    assert spec["cooldownPeriod"] == 60
+    assert spec["maxReplicaCount"] == 20
+    assert spec["minReplicaCount"] == 0
+    assert spec["pollingInterval"] == 15
+
+
+def test_triggers_advanced_and_fallback_are_passed_through(
+    helm_runner: HelmRunner,
+) -> None:
+    advanced = {"restoreToOriginalReplicaCount": True}
+    fallback = {"failureThreshold": 3, "replicas": 6}
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "keda": {
+                "advanced": advanced,
+                "fallback": fallback,
+                "triggers": {
+                    "cron": CRON_TRIGGER,
+                    "requests": PROMETHEUS_TRIGGER,
+                },
+            },
+        },
+    )
+    spec = subject["spec"]
+    assert spec["advanced"] == advanced
+    assert spec["fallback"] == fallback
+    assert spec["triggers"] == [CRON_TRIGGER, PROMETHEUS_TRIGGER]
+
+
+def test_triggers_set_to_null_are_ignored(helm_runner: HelmRunner) -> None:
+    subject = render_subject(
+        helm_runner=helm_runner,
+        values={
+            "keda": {
+                "triggers": {"cron": CRON_TRIGGER, "requests": None},
+            },
+        },
+    )
+    assert subject["spec"]["triggers"] == [CRON_TRIGGER]
+
+
+@pytest.mark.parametrize(
+    "invalid_values, message",
+    [
+        (
+            {"autoscaling": {"create": True}},
+            "keda.create and autoscaling.create can't both be true",
+        ),
+        (
+            {"keda": {"maxReplicaCount": 2, "minReplicaCount": 3}},
+            "must not exceed keda.maxReplicaCount",
+        ),
+        (
+            {"keda": {"triggers": {}}},
+            "At least one .Values.keda.triggers entry is required",
+        ),
+        (
+            {"keda": {"triggers": {"cron": None}}},
+            "At least one .Values.keda.triggers entry is required",
+        ),
+    ],
+    ids=[
+        "with_autoscaling",
+        "unordered_replica_counts",
+        "without_triggers",
+        "with_only_null_triggers",
+    ],
+)
+def test_invalid_configurations_are_refused(
+    helm_runner: HelmRunner,
+    invalid_values: Dict,
+    message: str,
+) -> None:
+    with pytest.raises(RuntimeError, match=message):
+        render_subject(helm_runner=helm_runner, values=invalid_values)
+
+
+def render_subject(
+    helm_runner: HelmRunner,
+    name: Optional[str] = None,
+    values: Optional[Dict] = None,
+) -> Dict:
+    _values = random_required_values() | (values or {})
+    _values["keda"] = {"create": True, "triggers": {"cron": CRON_TRIGGER}} | (
+        _values.get("keda", {})
+    )
+    manifests = helm_runner.render_templates(
+        chart=CHART_NAME,
+        kinds=["ScaledObject"],
+        name=name or random_string(),
+        values=[_values],
+    )
+    return ManifestSet(manifests).one("ScaledObject")
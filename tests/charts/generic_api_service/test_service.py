@@ -1,17 +1,15 @@
 from typing import Dict, Optional
-from uuid import uuid4
-
-import yaml
-from pytest_helm_templates import HelmRunner
 
+from helm_charts_dev import HelmRunner, load_yaml
 from tests.charts.generic_api_service import (
     CHART_NAME,
     EXAMPLE_APP_NAME,
     EXAMPLE_APP_VERSION,
     random_required_values,
 )
-from tests.test_helpers import HelperRenderer
+from tests.test_helpers import HelperRenderer, random_string
 from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
 
 
 def test_static_values_and_defaults(
@@ -32,12 +30,13 @@ def test_static_values_and_defaults(
 
     metadata = subject["metadata"]
 
-    default_labels_yaml = helper_renderer.render(
-        "labels",
+    helpers = helper_renderer.render_many(
+        ["labels", "selector-labels"],
         name=release_name,
         values=values,
     )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_labels_yaml = helpers["labels"]
+    default_labels = load_yaml(default_labels_yaml)
     assert metadata["labels"] == default_labels
 
     # Name is expected to be there, but it takes a random value for this test.
@@ -60,12 +59,8 @@ def test_static_values_and_defaults(
     }
     assert service_ports_by_name == default_ports_by_name
 
-    default_selector_labels_yaml = helper_renderer.render(
-        "selector-labels",
-        name=release_name,
-        values=values,
-    )
-    default_selector_labels = yaml.safe_load(default_selector_labels_yaml)
+    default_selector_labels_yaml = helpers["selector-labels"]
+    default_selector_labels = load_yaml(default_selector_labels_yaml)
     assert spec["selector"] == default_selector_labels
 
     assert spec["type"] == chart_values["service"]["type"]
@@ -129,7 +124,7 @@ def test_type_can_be_customized_with_service_type_value(
     service_type = "NodePort"
     subject = render_subject(
         helm_runner=helm_runner,
-        values={"service": {"name": str(uuid4()), "type": service_type}},
+        values={"service": {"name": random_string(), "type": service_type}},
     )
 
     assert subject["spec"]["type"] == service_type
@@ -140,13 +135,13 @@ def render_subject(
     name: Optional[str] = None,
     values: Dict = {},
 ) -> Dict:
-    _name = name or str(uuid4())
-    manifests = helm_runner.template(
-        chart=CHART_NAME,
-        name=_name,
-        show_only=["templates/service.yaml"],
-        values=[random_required_values() | values],
+    _name = name or random_string()
+    manifests = ManifestSet(
+        helm_runner.render_templates(
+            chart=CHART_NAME,
+            kinds=["Service"],
+            name=_name,
+            values=[random_required_values() | values],
+        )
     )
-    subject = manifests[0]
-    assert subject["kind"] == "Service"
-    return subject
+    return manifests.one("Service")
@@ -1,8 +1,6 @@
 from typing import Dict, Optional
 
-import yaml
-from pytest_helm_templates import HelmRunner
-
+from helm_charts_dev import HelmRunner, load_yaml
 from tests.charts.generic_api_service import (
     CHART_NAME,
     EXAMPLE_APP_NAME,
@@ -11,6 +9,7 @@ from tests.charts.generic_api_service import (
 )
 from tests.test_helpers import HelperRenderer, random_string
 from tests.test_helpers.test_constants import EXAMPLE_MAPPING, EXAMPLE_RELEASE_NAME
+from tests.test_helpers.test_manifest_set import ManifestSet
 
 
 def test_service_account_resource_can_be_omitted(helm_runner: HelmRunner) -> None:
@@ -47,19 +46,16 @@ def test_static_values_and_defaults(
     assert "annotations" not in metadata
     assert "namespace" not in metadata
 
-    default_labels_yaml = helper_renderer.render(
-        "labels",
+    helpers = helper_renderer.render_many(
+        ["labels", "service-account-name"],
         name=release_name,
         values=values,
     )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_labels_yaml = helpers["labels"]
+    default_labels = load_yaml(default_labels_yaml)
     assert metadata["labels"] == default_labels
 
-    default_service_account_name = helper_renderer.render(
-        "service-account-name",
-        name=release_name,
-        values=values,
-    )
+    default_service_account_name = helpers["service-account-name"]
     assert metadata["name"] == default_service_account_name
 
 
@@ -116,7 +112,7 @@ def test_labels_can_be_added_with_service_account_labels_value(
         name=release_name,
         values=values,
     )
-    default_labels = yaml.safe_load(default_labels_yaml)
+    default_labels = load_yaml(default_labels_yaml)
     expected_labels = default_labels | labels
 
     assert subject["metadata"]["labels"] == expected_labels
@@ -128,12 +124,12 @@ def render_subject(
     values: Dict = {},
 ) -> Dict:
     _name = name or random_string()
-    manifests = helm_runner.template(
-        chart=CHART_NAME,
-        name=_name,
-        show_only=["templates/service_account.yaml"],
-        values=[random_required_values() | values],
+    manifests = ManifestSet(
+        helm_runner.render_templates(
+            chart=CHART_NAME,
+            kinds=["ServiceAccount"],
+            name=_name,
+            values=[random_required_values() | values],
+        )
     )
-    subject = manifests[0]
-    assert subject["kind"] == "ServiceAccount"
-    return subject
+    return manifests.one("ServiceAccount")
@@ -0,0 +1,123 @@
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from helm_charts_dev import HelmRunner
+from helm_charts_dev.values_generator import values_generator
+from helm_charts_dev.values_schema import validate_values
+from tests.charts.generic_api_service import CHART_NAME
+from tests.test_helpers import chart_path, deep_merge, get_chart_values
+from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+
+# The number of variants rendered, all in a single helm invocation.
+VARIANT_COUNT = 20
+
+# The seed variants are generated from when --random-seed isn't given, so runs
+# without it always check the same variants.
+DEFAULT_VARIANT_SEED = "values-variants"
+
+
+def meet_template_constraints(variant: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adjust a variant to meet the constraints the templates enforce but the schema
+    doesn't express, e.g. that replica limits are ordered.
+    """
+    for block, minimum, maximum in [
+        ("autoscaling", "minReplicas", "maxReplicas"),
+        ("keda", "minReplicaCount", "maxReplicaCount"),
+    ]:
+        block_values = variant.get(block) or {}
+        if minimum in block_values:
+            block_values[maximum] = max(
+                block_values[minimum],
+                block_values.get(maximum, 1),
+            )
+    keda_values = variant.get("keda") or {}
+    if keda_values.get("create"):
+        keda_values.setdefault("triggers", {})
+        keda_values["triggers"].setdefault("cpu", {"type": "cpu"})
+        variant.get("autoscaling", {}).pop("create", None)
+    return variant
+
+
+def manifest_failures(values: Dict[str, Any], manifests: List[Dict]) -> List[str]:
+    """
+    Describe where the rendered manifests disagree with the values, merged over the
+    chart's defaults, they were rendered from.
+    """
+    failures = []
+    kinds = [manifest.get("kind") for manifest in manifests]
+    for manifest in manifests:
+        if not manifest.get("apiVersion") or not manifest["metadata"].get("name"):
+            failures.append(f"{manifest.get('kind')} lacks an apiVersion or name")
+
+    autoscaling = bool(values["autoscaling"].get("create"))
+    keda = bool(values["keda"].get("create"))
+    budget_create = values["podDisruptionBudget"].get("create")
+    if not isinstance(budget_create, bool):
+        budget_create = values["replicaCount"] > 1 or autoscaling or keda
+    for kind, expected in [
+        ("HorizontalPodAutoscaler", autoscaling),
+        ("PodDisruptionBudget", budget_create),
+        ("ScaledObject", keda),
+    ]:
+        if (kind in kinds) != expected:
+            failures.append(f"{kind} {'missing' if expected else 'unexpected'}")
+
+    deployments = [
+        manifest for manifest in manifests if manifest["kind"] == "Deployment"
+    ]
+    if len(deployments) != 1:
+        return failures + [f"{len(deployments)} Deployments rendered"]
+    deployment_spec = deployments[0]["spec"]
+    replicas = None if autoscaling or keda else values["replicaCount"]
+    if deployment_spec.get("replicas") != replicas:
+        failures.append(f"replicas {deployment_spec.get('replicas')} != {replicas}")
+
+    container = deployment_spec["template"]["spec"]["containers"][0]
+    image_values = values["container"]["image"]
+    image = f"{image_values['repository']}:{image_values['tag']}"
+    if container["image"] != image:
+        failures.append(f"image {container['image']} != {image}")
+    ports = [
+        {key: port[key] for key in ["containerPort", "name", "protocol"]}
+        for _, port in sorted(values["ports"].items())
+    ]
+    if container.get("ports", []) != ports:
+        failures.append(f"ports {container.get('ports')} != {ports}")
+    return failures
+
+
+def test_valid_variants_render(
+    helm_runner: HelmRunner,
+    pytestconfig: pytest.Config,
+) -> None:
+    _chart_path = Path(chart_path(CHART_NAME))
+    generator = values_generator(_chart_path)
+    seed = pytestconfig.getoption("random_seed") or DEFAULT_VARIANT_SEED
+    # Each variant has a seed of its own, so one can be regenerated alone.
+    variants = [
+        meet_template_constraints(
+            generator.variant(random.Random(f"{seed}:{index}"))  # noqa: DUO102
+        )
+        for index in range(VARIANT_COUNT)
+    ]
+    for variant in variants:
+        validate_values(_chart_path, [variant])
+
+    manifest_sets = helm_runner.template_batch(
+        chart=CHART_NAME,
+        name=EXAMPLE_RELEASE_NAME,
+        values=[[variant] for variant in variants],
+    )
+
+    chart_values = get_chart_values(CHART_NAME)
+    for index, (variant, manifests) in enumerate(zip(variants, manifest_sets)):
+        failures = manifest_failures(deep_merge(chart_values, variant), manifests)
+        assert not failures, (
+            f"Variant {index} of seed {seed!r} rendered unexpectedly: {failures}"
+            f"\n{json.dumps(variant, indent=2, sort_keys=True)}"
+        )
@@ -1,9 +1,87 @@
+import secrets
+from typing import Any, Iterator, Optional
+
 import pytest
-from pytest_helm_templates import HelmRunner
 
-from tests.test_helpers import make_helm_runner
+from helm_charts_dev import HelmRunner, RenderCache
+from tests.test_helpers import (
+    make_helm_runner,
+    seed_random_strings,
+    seeded_random_strings,
+)
+
+pytest_plugins = ["helm_charts_dev.pytest_plugin", "pytester"]
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--random-seed",
+        default=None,
+        help=(
+            "Derive the random strings, values and release names of each test from"
+            " this seed and the test's node id, so renders repeat exactly across"
+            " runs (and can be cached). Use 'auto' to pick a seed and report it."
+        ),
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("random_seed") == "auto":
+        # xdist workers are handed the controller's options, so they share its seed.
+        config.option.random_seed = secrets.token_hex(8)
+    random_seed = config.getoption("random_seed")
+    # Anything generated outside of collection and tests is derived from the seed
+    # alone.
+    seed_random_strings(None if random_seed is None else f"{random_seed}:")
+
+
+def pytest_report_header(config: pytest.Config) -> Optional[str]:
+    random_seed = config.getoption("random_seed")
+    return None if random_seed is None else f"random seed: {random_seed}"
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item: pytest.Item) -> Iterator[None]:
+    random_seed = item.config.getoption("random_seed")
+    if random_seed is not None:
+        # Seed per test so each test's values are independent of which other tests
+        # run, covering fixture setup as well as the test itself.
+        seed_random_strings(f"{random_seed}:{item.nodeid}")
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_make_collect_report(collector: pytest.Collector) -> Iterator[None]:
+    random_seed = collector.config.getoption("random_seed")
+    if random_seed is None:
+        yield
+        return
+    # Seed per collector so anything generated at collection time, e.g. module
+    # constants, is independent of which other modules are collected.
+    with seeded_random_strings(f"{random_seed}:{collector.nodeid}"):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(
+    fixturedef: pytest.FixtureDef[Any],
+    request: pytest.FixtureRequest,
+) -> Iterator[None]:
+    random_seed = request.config.getoption("random_seed")
+    if random_seed is None or fixturedef.scope == "function":
+        yield
+        return
+    # Fixtures shared between tests are set up by whichever test needs them first,
+    # so they're seeded by their own id rather than that test's, and leave the
+    # test's sequence as it was.
+    with seeded_random_strings(
+        f"{random_seed}:{fixturedef.baseid}:{fixturedef.argname}"
+    ):
+        yield
 
 
 @pytest.fixture(scope="package")
-def helm_runner() -> HelmRunner:
-    return make_helm_runner()
+def helm_runner(render_cache: Optional[RenderCache]) -> Iterator[HelmRunner]:
+    helm_runner = make_helm_runner(render_cache=render_cache)
+    yield helm_runner
+    helm_runner.close()
@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+
+from helm_charts_dev.docs import generate_readme, update_readmes, value_rows
+from tests.charts.generic_api_service import CHART_NAME
+from tests.test_helpers import chart_path
+
+VALUES_YAML = """\
+# -- A documented object.
+# @default -- See below
+documented:
+  # -- A nested value.
+  nested: 1
+  undocumented: true
+
+# -- (int) The number of replicas,
+# or nothing.
+replicas: null
+
+hosts:
+  - example.com
+
+# -- HTML <characters> & such.
+html: "<b>"
+
+undocumented:
+  leaf: 1.0
+schemaDocumented: x
+"""
+
+
+def make_chart(path: Path, name: str) -> Path:
+    path.mkdir(parents=True)
+    path.joinpath("Chart.yaml").write_text(
+        f"apiVersion: v2\nname: {name}\nversion: 1.2.3\n",
+        encoding="utf-8",
+    )
+    path.joinpath("README.md.gotmpl").write_text(
+        '{{ template "chart.header" . }}\n\n\nVersion {{ .Version }}\n\n'
+        '{{ template "chart.valuesSection" . }}\n',
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_the_committed_readme_is_up_to_date() -> None:
+    readme_path = Path(chart_path(CHART_NAME)).joinpath("README.md")
+    assert generate_readme(readme_path.parent) == readme_path.read_text(
+        encoding="utf-8"
+    )
+
+
+def test_values_are_documented_like_helm_docs_does(tmp_path: Path) -> None:
+    path = make_chart(tmp_path.joinpath("chart"), "chart")
+    path.joinpath("values.yaml").write_text(VALUES_YAML, encoding="utf-8")
+    path.joinpath("values.schema.json").write_text(
+        json.dumps(
+            {
+                "properties": {
+                    "documented": {"description": "Overridden by the comment."},
+                    "schemaDocumented": {"description": "From the schema."},
+                },
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    assert generate_readme(path) == (
+        "# chart\n"
+        "\n"
+        "Version 1.2.3\n"
+        "\n"
+        "## Values\n"
+        "\n"
+        "| Key | Type | Default | Description |\n"
+        "|-----|------|---------|-------------|\n"
+        "| documented | object | See below | A documented object. |\n"
+        "| documented.nested | int | `1` | A nested value. |\n"
+        '| hosts[0] | string | `"example.com"` |  |\n'
+        '| html | string | `"\\u003cb\\u003e"` | HTML <characters> & such. |\n'
+        "| replicas | int | `nil` | The number of replicas, or nothing. |\n"
+        '| schemaDocumented | string | `"x"` | From the schema. |\n'
+        "| undocumented.leaf | float | `1` |  |\n"
+        "\n"
+    )
+
+
+def test_values_of_vendored_dependencies_are_documented(tmp_path: Path) -> None:
+    path = make_chart(tmp_path.joinpath("chart"), "chart")
+    with open(path.joinpath("Chart.yaml"), encoding="utf-8", mode="a") as file:
+        file.write("dependencies:\n  - alias: sub\n    name: dependency\n")
+    path.joinpath("values.yaml").write_text(
+        "sub:\n  # -- Overridden by the parent.\n  shared: 1\n",
+        encoding="utf-8",
+    )
+    dependency_path = make_chart(path.joinpath("charts", "dependency"), "dependency")
+    dependency_path.joinpath("values.yaml").write_text(
+        "# -- Only in the dependency.\nown: 1\n# -- Shared.\nshared: 2\n",
+        encoding="utf-8",
+    )
+
+    assert [(row.key, row.default, row.description) for row in value_rows(path)] == [
+        ("sub.own", "`1`", "Only in the dependency."),
+        ("sub.shared", "`1`", "Overridden by the parent."),
+    ]
+
+
+def test_only_changed_readmes_are_written(tmp_path: Path) -> None:
+    path = make_chart(tmp_path.joinpath("chart"), "chart")
+    readme_path = path.joinpath("README.md")
+
+    assert update_readmes([path], check=True) == [readme_path]
+    assert not readme_path.exists()
+    assert update_readmes([path]) == [readme_path]
+    assert readme_path.read_text(encoding="utf-8") == "# chart\n\nVersion 1.2.3\n\n"
+    assert update_readmes([path]) == []
+
+    path.joinpath("values.yaml").write_text("# -- A value.\nvalue: 1\n")
+    assert update_readmes([path]) == [readme_path]
+    assert "| value | int | `1` | A value. |" in readme_path.read_text()
@@ -0,0 +1,144 @@
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from helm_charts_dev import HelmRunner, Values
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import chart_path, make_helm_runner
+
+
+def test_adhoc_templates_are_not_written_to_the_chart(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    helm_runner = make_helm_runner()
+    templates_path = Path(chart_path(CHART_NAME)).joinpath("templates")
+    template_names = sorted(entry.name for entry in templates_path.iterdir())
+    run_template = helm_runner._run_template
+    template_names_during_render: List[List[str]] = []
+
+    def _run_template(**kwargs: Any) -> str:
+        template_names_during_render.append(
+            sorted(entry.name for entry in templates_path.iterdir())
+        )
+        return run_template(**kwargs)
+
+    monkeypatch.setattr(helm_runner, "_run_template", _run_template)
+    rendered = helm_runner.adhoc_template(
+        chart=CHART_NAME,
+        content='---\nname: {{ include "generic-api-service.app-name" . }}\n',
+        name="release-name",
+        values=[random_required_values() | {"appName": "app-name"}],
+    )
+    helm_runner.close()
+
+    assert rendered == {"name": "app-name"}
+    assert template_names_during_render == [template_names]
+
+
+def test_concurrent_adhoc_and_full_renders_do_not_interfere() -> None:
+    helm_runner = make_helm_runner()
+    values: Values = [random_required_values()]
+
+    def render_adhoc(index: int) -> Dict:
+        return helm_runner.adhoc_template(
+            chart=CHART_NAME,
+            content=f"---\nindex: {index}\n",
+            name="release-name",
+            values=values,
+        )
+
+    def render_kinds(_: int) -> List[str]:
+        manifests = helm_runner.template(
+            chart=CHART_NAME,
+            name="release-name",
+            values=values,
+        )
+        return sorted(manifest["kind"] for manifest in manifests)
+
+    expected_kinds = render_kinds(0)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        adhoc_futures = [executor.submit(render_adhoc, index) for index in range(8)]
+        kinds_futures = [executor.submit(render_kinds, index) for index in range(8)]
+        assert [future.result() for future in adhoc_futures] == [
+            {"index": index} for index in range(8)
+        ]
+        assert [future.result() for future in kinds_futures] == [expected_kinds] * 8
+    helm_runner.close()
+
+
+def test_scratch_chart_follows_templates_being_added_and_removed(
+    tmp_path: Path,
+) -> None:
+    shutil.copytree(chart_path(CHART_NAME), tmp_path.joinpath(CHART_NAME))
+    helm_runner = make_helm_runner(charts_path_override=str(tmp_path))
+    templates_path = tmp_path.joinpath(CHART_NAME, "templates")
+    values: Values = [random_required_values()]
+
+    def render_added(content: str) -> Dict:
+        return helm_runner.adhoc_template(
+            chart=CHART_NAME,
+            content=content,
+            name="release-name",
+            values=values,
+        )
+
+    templates_path.joinpath("_added.tpl").write_text(
+        '{{- define "added" -}}added{{- end -}}',
+        encoding="utf-8",
+    )
+    assert render_added('---\nadded: {{ include "added" . }}\n') == {"added": "added"}
+
+    templates_path.joinpath("_added.tpl").unlink()
+    assert render_added("---\nremoved: true\n") == {"removed": True}
+    helm_runner.close()
+
+
+def test_close_removes_the_scratch_chart() -> None:
+    helm_runner: HelmRunner = make_helm_runner()
+    scratch_chart_path = helm_runner._scratch_chart_path(CHART_NAME)
+    assert scratch_chart_path.joinpath("Chart.yaml").is_file()
+
+    helm_runner.close()
+
+    assert not scratch_chart_path.exists()
+
+
+def test_render_templates_renders_only_the_templates_of_the_given_kinds() -> None:
+    helm_runner = make_helm_runner()
+
+    manifests = helm_runner.render_templates(
+        chart=CHART_NAME,
+        kinds=["Service", "ServiceAccount"],
+        name="release-name",
+        values=[random_required_values()],
+    )
+
+    assert sorted(manifest["kind"] for manifest in manifests) == [
+        "Service",
+        "ServiceAccount",
+    ]
+
+
+def test_render_templates_skips_templates_that_render_nothing() -> None:
+    helm_runner = make_helm_runner()
+
+    manifests = helm_runner.render_templates(
+        chart=CHART_NAME,
+        kinds=["Namespace", "PersistentVolumeClaim", "Service"],
+        name="release-name",
+        values=[random_required_values()],
+    )
+
+    assert [manifest["kind"] for manifest in manifests] == ["Service"]
+    assert (
+        helm_runner.render_templates(
+            chart=CHART_NAME,
+            kinds=["Namespace"],
+            name="release-name",
+            values=[random_required_values()],
+        )
+        == []
+    )
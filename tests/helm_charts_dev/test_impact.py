@@ -0,0 +1,167 @@
+import shutil
+from pathlib import Path
+
+from helm_charts_dev.impact import ImpactRecorder, is_affected, support_digest
+from tests.charts.generic_api_service import CHART_NAME
+from tests.test_helpers import chart_path
+
+DEPLOYMENT_MODULE = "tests/test_deployment.py"
+DOCS_MODULE = "tests/test_docs.py"
+TLS_MODULE = "tests/test_backend_tls_policies.py"
+TEST_MODULES = [DEPLOYMENT_MODULE, DOCS_MODULE, TLS_MODULE]
+
+
+def make_root(tmp_path: Path) -> Path:
+    shutil.copytree(chart_path(CHART_NAME), tmp_path.joinpath(CHART_NAME))
+    tmp_path.joinpath("tests").mkdir()
+    for module in TEST_MODULES:
+        tmp_path.joinpath(module).write_text("def test(): pass\n", encoding="utf-8")
+    return tmp_path
+
+
+def record(root: Path, module: str, *templates: str) -> ImpactRecorder:
+    impact_recorder = ImpactRecorder(root)
+    impact_recorder.module = module
+    impact_recorder.record(root.joinpath(CHART_NAME), set(templates) or None)
+    return impact_recorder
+
+
+def test_editing_a_partial_only_affects_the_modules_that_include_it(
+    tmp_path: Path,
+) -> None:
+    root = make_root(tmp_path)
+    support = support_digest(root, TEST_MODULES)
+    deployment_record = record(
+        root, DEPLOYMENT_MODULE, "templates/deployment.yaml"
+    ).module_record(DEPLOYMENT_MODULE, support)
+    tls_record = record(
+        root, TLS_MODULE, "templates/backend_tls_policies.yaml"
+    ).module_record(TLS_MODULE, support)
+    assert not is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
+    assert not is_affected(root, TLS_MODULE, tls_record, support)
+
+    with open(
+        root.joinpath(CHART_NAME, "templates", "_backend_tls_policy.tpl"),
+        encoding="utf-8",
+        mode="a",
+    ) as file:
+        file.write("{{/* edited */}}\n")
+
+    assert not is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
+    assert is_affected(root, TLS_MODULE, tls_record, support)
+
+
+def test_editing_shared_helpers_affects_every_module_that_uses_them(
+    tmp_path: Path,
+) -> None:
+    root = make_root(tmp_path)
+    support = support_digest(root, TEST_MODULES)
+    records = {
+        module: record(root, module, template).module_record(module, support)
+        for module, template in [
+            (DEPLOYMENT_MODULE, "templates/deployment.yaml"),
+            (TLS_MODULE, "templates/backend_tls_policies.yaml"),
+        ]
+    }
+
+    with open(
+        root.joinpath(CHART_NAME, "templates", "_helpers.tpl"),
+        encoding="utf-8",
+        mode="a",
+    ) as file:
+        file.write("{{/* edited */}}\n")
+
+    assert all(
+        is_affected(root, module, module_record, support)
+        for module, module_record in records.items()
+    )
+
+
+def test_non_template_and_new_template_files_affect_every_module(
+    tmp_path: Path,
+) -> None:
+    root = make_root(tmp_path)
+    support = support_digest(root, TEST_MODULES)
+    deployment_record = record(
+        root, DEPLOYMENT_MODULE, "templates/deployment.yaml"
+    ).module_record(DEPLOYMENT_MODULE, support)
+
+    new_template_path = root.joinpath(CHART_NAME, "templates", "config_map.yaml")
+    new_template_path.write_text("kind: ConfigMap\n", encoding="utf-8")
+    assert is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
+
+    new_template_path.unlink()
+    assert not is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
+
+    with open(
+        root.joinpath(CHART_NAME, "values.yaml"),
+        encoding="utf-8",
+        mode="a",
+    ) as file:
+        file.write("# edited\n")
+    assert is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
+
+
+def test_python_changes_affect_modules(tmp_path: Path) -> None:
+    root = make_root(tmp_path)
+    support = support_digest(root, TEST_MODULES)
+    deployment_record = record(root, DEPLOYMENT_MODULE).module_record(
+        DEPLOYMENT_MODULE, support
+    )
+    tls_record = record(root, TLS_MODULE).module_record(TLS_MODULE, support)
+
+    root.joinpath(TLS_MODULE).write_text("def test(): 1\n", encoding="utf-8")
+    assert not is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
+    assert is_affected(root, TLS_MODULE, tls_record, support)
+    assert is_affected(root, DEPLOYMENT_MODULE, None, support)
+
+    root.joinpath("tests", "conftest.py").write_text("", encoding="utf-8")
+    changed_support = support_digest(root, TEST_MODULES)
+    assert is_affected(root, DEPLOYMENT_MODULE, deployment_record, changed_support)
+
+
+def test_renders_outside_of_the_root_or_module_are_not_recorded(
+    tmp_path: Path,
+) -> None:
+    root = make_root(tmp_path.joinpath("root"))
+    impact_recorder = ImpactRecorder(root)
+    impact_recorder.record(root.joinpath(CHART_NAME), None)
+    impact_recorder.module = DEPLOYMENT_MODULE
+    impact_recorder.record(Path(chart_path(CHART_NAME)), None)
+
+    assert impact_recorder.renders == {}
+
+
+def test_modules_that_render_no_chart_depend_on_every_chart(tmp_path: Path) -> None:
+    # e.g. a module that reads values.yaml or the README without rendering.
+    root = make_root(tmp_path)
+    support = support_digest(root, TEST_MODULES)
+    docs_record = ImpactRecorder(root).module_record(DOCS_MODULE, support)
+    assert not is_affected(root, DOCS_MODULE, docs_record, support)
+
+    values_path = root.joinpath(CHART_NAME, "values.yaml")
+    values = values_path.read_text(encoding="utf-8")
+    values_path.write_text(f"# edited\n{values}", encoding="utf-8")
+    assert is_affected(root, DOCS_MODULE, docs_record, support)
+
+    values_path.write_text(values, encoding="utf-8")
+    assert not is_affected(root, DOCS_MODULE, docs_record, support)
+
+    template_path = root.joinpath(CHART_NAME, "templates", "_helpers.tpl")
+    with open(template_path, encoding="utf-8", mode="a") as file:
+        file.write("{{/* edited */}}\n")
+    assert is_affected(root, DOCS_MODULE, docs_record, support)
+
+
+def test_new_charts_affect_modules_that_render_no_chart(tmp_path: Path) -> None:
+    root = make_root(tmp_path)
+    support = support_digest(root, TEST_MODULES)
+    docs_record = ImpactRecorder(root).module_record(DOCS_MODULE, support)
+    deployment_record = record(root, DEPLOYMENT_MODULE).module_record(
+        DEPLOYMENT_MODULE, support
+    )
+
+    shutil.copytree(root.joinpath(CHART_NAME), root.joinpath("other-chart"))
+
+    assert is_affected(root, DOCS_MODULE, docs_record, support)
+    assert not is_affected(root, DEPLOYMENT_MODULE, deployment_record, support)
@@ -0,0 +1,70 @@
+import json
+import shutil
+from pathlib import Path
+
+from helm_charts_dev.lint import DEFAULT_STATE_PATH, lint_charts
+from tests.charts.generic_api_service import CHART_NAME
+from tests.test_helpers import chart_path, charts_path
+
+
+def make_chart(root: Path, name: str, config_map_yaml: str) -> Path:
+    path = root.joinpath("charts", name)
+    path.joinpath("templates").mkdir(parents=True)
+    path.joinpath("Chart.yaml").write_text(
+        f"apiVersion: v2\nname: {name}\ntype: application\nversion: 0.0.0\n",
+        encoding="utf-8",
+    )
+    path.joinpath("templates", "config_map.yaml").write_text(
+        config_map_yaml,
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_charts_are_only_linted_again_once_changed(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("charts", CHART_NAME)
+    shutil.copytree(chart_path(CHART_NAME), path)
+    shutil.copy(Path(charts_path()).parent.joinpath(".yamllint"), tmp_path)
+
+    (result,) = lint_charts([path], root=tmp_path)
+    assert result.chart == f"charts/{CHART_NAME}"
+    assert result.passed and not result.skipped, result.output
+    state = json.loads(tmp_path.joinpath(DEFAULT_STATE_PATH).read_text())
+    assert state["charts"] == {result.chart: result.digest}
+
+    (result,) = lint_charts([path], root=tmp_path)
+    assert result.passed and result.skipped
+    (result,) = lint_charts([path], force=True, root=tmp_path)
+    assert result.passed and not result.skipped
+
+    with open(path.joinpath("random-required-values.yaml"), mode="a") as file:
+        file.write("# edited\n")
+    (result,) = lint_charts([path], root=tmp_path)
+    assert result.passed and not result.skipped
+
+
+def test_failing_charts_are_reported_and_not_recorded(tmp_path: Path) -> None:
+    valid_path = make_chart(
+        tmp_path,
+        "valid",
+        "---\napiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: valid\n",
+    )
+    invalid_path = make_chart(
+        tmp_path,
+        "invalid",
+        "---\napiVersion: v1\nkind: ConfigMap\nmetadata:\n  name:  invalid\n",
+    )
+
+    for _ in range(2):
+        invalid_result, valid_result = lint_charts(
+            [invalid_path, valid_path],
+            jobs=2,
+            root=tmp_path,
+        )
+        assert not invalid_result.passed and not invalid_result.skipped
+        assert "too many spaces after colon (colons)" in invalid_result.output
+        assert valid_result.passed
+
+    assert valid_result.skipped
+    state = json.loads(tmp_path.joinpath(DEFAULT_STATE_PATH).read_text())
+    assert list(state["charts"]) == ["charts/valid"]
@@ -0,0 +1,56 @@
+from typing import Any, List
+
+import pytest
+import yaml
+
+from helm_charts_dev import Manifests
+from helm_charts_dev import manifests as manifests_module
+
+
+@pytest.mark.parametrize(
+    "templates_yaml",
+    [
+        "",
+        "---\n",
+        "a: 1\n---\nb: 2\n",
+        "---\na: 1\n---\n",
+        "---\n# Source: chart/templates/empty.yaml\n---\nb: 1\n",
+        "a: |-\n  x\n  ---\n  y\n---\nz: 1\n",
+        "--- {a: 1}\n--- [1]\n",
+        "a: 1\n...\n---\nb: 1\n",
+    ],
+)
+def test_manifests_match_loading_every_document_up_front(templates_yaml: str) -> None:
+    assert list(Manifests(templates_yaml)) == list(yaml.safe_load_all(templates_yaml))
+
+
+def test_documents_are_only_parsed_when_accessed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parsed: List[str] = []
+    load_yaml = manifests_module.load_yaml
+
+    def _load_yaml(text: str) -> Any:
+        parsed.append(text)
+        return load_yaml(text)
+
+    monkeypatch.setattr(manifests_module, "load_yaml", _load_yaml)
+    manifests = Manifests("---\nkind: Service\n---\nkind: Deployment\n")
+    assert parsed == []
+
+    assert manifests[1] == {"kind": "Deployment"}
+    assert manifests[1] == {"kind": "Deployment"}
+    assert parsed == ["\nkind: Deployment\n"]
+    assert manifests.documents == ["\nkind: Service\n", "\nkind: Deployment\n"]
+
+
+def test_kind_is_read_without_parsing() -> None:
+    manifests = Manifests(
+        "---\nkind: Service\n---\nspec:\n  kind: Nested\n---\nkind: 'Quoted'\n"
+    )
+
+    assert [manifests.kind(index) for index in range(len(manifests))] == [
+        "Service",
+        None,
+        None,
+    ]
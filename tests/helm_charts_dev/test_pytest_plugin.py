@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List, cast
+
+import pytest
+
+from helm_charts_dev import RenderRequest
+from helm_charts_dev.pytest_plugin import (
+    DEFAULT_RELEASE_NAME,
+    Prerenderer,
+    render_request_from_marker,
+)
+from tests.charts.generic_api_service import CHART_NAME
+
+
+def make_item(marker: pytest.MarkDecorator, **params: Any) -> pytest.Item:
+    return cast(
+        pytest.Item,
+        SimpleNamespace(
+            callspec=SimpleNamespace(params=params),
+            get_closest_marker=lambda name: marker.mark,
+            nodeid=f"test_item[{params}]",
+        ),
+    )
+
+
+def test_render_request_from_marker_defaults() -> None:
+    marker = pytest.mark.helm_render(CHART_NAME).mark
+
+    assert render_request_from_marker(marker, {}) == RenderRequest(
+        chart=CHART_NAME,
+        name=DEFAULT_RELEASE_NAME,
+    )
+
+
+def test_render_request_from_marker_wraps_a_values_dict_in_a_list() -> None:
+    marker = pytest.mark.helm_render(chart=CHART_NAME, values={"a": 1}).mark
+
+    assert render_request_from_marker(marker, {}).values == [{"a": 1}]
+
+
+def test_render_request_from_marker_calls_values_with_the_params_it_accepts() -> None:
+    marker = pytest.mark.helm_render(
+        CHART_NAME,
+        values=lambda expected: [{"expected": expected}],
+    ).mark
+
+    render_request = render_request_from_marker(marker, {"expected": 1, "other": 2})
+
+    assert render_request.values == [{"expected": 1}]
+
+
+def test_render_request_from_marker_passes_all_params_to_values_kwargs() -> None:
+    marker = pytest.mark.helm_render(
+        CHART_NAME,
+        values=lambda **params: [params],
+    ).mark
+
+    render_request = render_request_from_marker(marker, {"expected": 1, "other": 2})
+
+    assert render_request.values == [{"expected": 1, "other": 2}]
+
+
+def test_prerender_renders_each_distinct_request_once(
+    monkeypatch: pytest.MonkeyPatch,
+    pytestconfig: pytest.Config,
+) -> None:
+    rendered: List[RenderRequest] = []
+
+    def render(request: RenderRequest) -> List[Dict]:
+        rendered.append(request)
+        return [{"values": request.values}]
+
+    prerenderer = Prerenderer(pytestconfig)
+    monkeypatch.setattr(prerenderer.helm_runner, "render", render)
+    monkeypatch.setattr(
+        prerenderer.helm_runner,
+        "dependency_update_if_missing",
+        lambda chart: None,
+    )
+    marker = pytest.mark.helm_render(CHART_NAME, values=lambda value: {"v": value})
+    items = [make_item(marker, value=value) for value in [1, 2, 1, 2, 1]]
+
+    prerenderer.prerender(items)
+
+    assert len(rendered) == 2
+    assert [prerenderer.manifests(item) for item in items] == [
+        [{"values": [{"v": value}]}] for value in [1, 2, 1, 2, 1]
+    ]
+    assert len(rendered) == 2
+
+
+def test_render_errors_are_raised_by_the_tests_that_declared_them(
+    monkeypatch: pytest.MonkeyPatch,
+    pytestconfig: pytest.Config,
+) -> None:
+    def render(request: RenderRequest) -> List[Dict]:
+        raise RuntimeError("render failed")
+
+    prerenderer = Prerenderer(pytestconfig)
+    monkeypatch.setattr(prerenderer.helm_runner, "render", render)
+    monkeypatch.setattr(
+        prerenderer.helm_runner,
+        "dependency_update_if_missing",
+        lambda chart: None,
+    )
+    item = make_item(pytest.mark.helm_render(CHART_NAME))
+
+    prerenderer.prerender([item])
+
+    with pytest.raises(RuntimeError, match="render failed"):
+        prerenderer.manifests(item)
@@ -0,0 +1,137 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from helm_charts_dev import HelmRunner, RenderCache
+from helm_charts_dev import render_cache as render_cache_module
+from helm_charts_dev.render_cache import chart_digest, file_digest
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import chart_path, make_helm_runner
+
+
+def test_get_returns_none_for_unknown_keys(tmp_path: Path) -> None:
+    render_cache = RenderCache(directory=tmp_path)
+    assert render_cache.get(RenderCache.key("unknown")) is None
+
+
+def test_get_returns_what_was_put(tmp_path: Path) -> None:
+    render_cache = RenderCache(directory=tmp_path)
+    key = RenderCache.key("chart", "values")
+    render_cache.put(key, "---\nkind: Service\n")
+    assert render_cache.get(key) == "---\nkind: Service\n"
+
+
+def test_key_depends_on_every_part() -> None:
+    assert RenderCache.key("a", "bc") != RenderCache.key("ab", "c")
+    assert RenderCache.key("a", "b") == RenderCache.key("a", "b")
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes(
+    tmp_path: Path,
+) -> None:
+    render_cache = RenderCache(directory=tmp_path, max_bytes=35)
+    keys = [RenderCache.key(str(index)) for index in range(3)]
+    for age, key in enumerate(keys):
+        render_cache.put(key, "x" * 10)
+        os.utime(tmp_path.joinpath(f"{key}.yaml"), ns=(age, age))
+
+    # Reading the oldest entry makes the second entry the least recently used.
+    assert render_cache.get(keys[0]) is not None
+    render_cache.put(RenderCache.key("3"), "x" * 10)
+
+    assert render_cache.get(keys[0]) is not None
+    assert render_cache.get(keys[1]) is None
+    assert render_cache.get(keys[2]) is not None
+
+
+def test_overwritten_entries_are_not_counted_twice(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    render_cache = RenderCache(directory=tmp_path, max_bytes=25)
+    evictions: List[int] = []
+
+    def evict() -> int:
+        evictions.append(0)
+        return 0
+
+    monkeypatch.setattr(render_cache, "_evict", evict)
+    key = RenderCache.key("chart", "values")
+
+    for _ in range(3):
+        render_cache.put(key, "x" * 10)
+    render_cache.put(RenderCache.key("other"), "x" * 10)
+
+    assert evictions == []
+
+
+def test_file_digests_are_memoized_up_to_a_bound(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(render_cache_module, "MAX_FILE_DIGESTS", 2)
+    file_paths = [tmp_path.joinpath(f"{index}.yaml") for index in range(3)]
+    for file_path in file_paths:
+        file_path.write_text(file_path.name)
+        file_digest(file_path)
+
+    memoized_paths = [path for path, _, _ in render_cache_module._file_digests]
+    assert memoized_paths == [str(file_paths[1]), str(file_paths[2])]
+
+
+def test_file_digest_changes_when_a_file_changes(tmp_path: Path) -> None:
+    file_path = tmp_path.joinpath("values.yaml")
+    file_path.write_text("a: 1\n")
+    original_digest = file_digest(file_path)
+
+    file_path.write_text("a: 22\n")
+
+    assert file_digest(file_path) != original_digest
+
+
+def test_chart_digest_changes_when_a_template_changes(tmp_path: Path) -> None:
+    chart_copy_path = tmp_path.joinpath(CHART_NAME)
+    shutil.copytree(chart_path(CHART_NAME), chart_copy_path)
+    original_digest = chart_digest(chart_copy_path)
+    assert chart_digest(chart_copy_path) == original_digest
+
+    with open(chart_copy_path.joinpath("templates/service.yaml"), mode="a") as file:
+        file.write("\n")
+
+    assert chart_digest(chart_copy_path) != original_digest
+
+
+def test_helm_runner_reuses_cached_renders(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    helm_runner = make_helm_runner(render_cache=RenderCache(directory=tmp_path))
+    renders: List[Dict[str, Any]] = []
+    run_template = helm_runner._run_template
+
+    def counting_run_template(**kwargs: Any) -> str:
+        renders.append(kwargs)
+        return run_template(**kwargs)
+
+    monkeypatch.setattr(helm_runner, "_run_template", counting_run_template)
+
+    values = random_required_values()
+    first = _render_service(helm_runner, values)
+    second = _render_service(helm_runner, values)
+    assert first == second
+    assert len(renders) == 1
+
+    _render_service(helm_runner, values | {"service": {"name": "other-name"}})
+    assert len(renders) == 2
+
+
+def _render_service(helm_runner: HelmRunner, values: Dict[str, Any]) -> List[Dict]:
+    return helm_runner.template(
+        chart=CHART_NAME,
+        name="release-name",
+        show_only=["templates/service.yaml"],
+        values=[values],
+    )
@@ -0,0 +1,88 @@
+import threading
+from typing import Dict, List
+
+import pytest
+
+from helm_charts_dev import RenderPool, RenderRequest
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import make_helm_runner
+
+
+def test_map_returns_results_in_request_order() -> None:
+    def render(request: RenderRequest) -> List[Dict]:
+        return [{"name": request.name}]
+
+    requests = [RenderRequest(chart=CHART_NAME, name=str(index)) for index in range(8)]
+    with RenderPool(render=render, workers=4) as render_pool:
+        results = render_pool.map(requests)
+
+    assert results == [[{"name": str(index)}] for index in range(8)]
+
+
+def test_requests_are_rendered_concurrently() -> None:
+    workers = 3
+    barrier = threading.Barrier(workers, timeout=10)
+
+    def render(request: RenderRequest) -> List[Dict]:
+        # Only passes once every worker is rendering at the same time.
+        barrier.wait()
+        return []
+
+    requests = [RenderRequest(chart=CHART_NAME, name=str(i)) for i in range(workers)]
+    with RenderPool(render=render, workers=workers) as render_pool:
+        assert render_pool.map(requests) == [[], [], []]
+
+
+def test_warm_up_runs_before_any_render() -> None:
+    events: List[str] = []
+
+    def render(request: RenderRequest) -> List[Dict]:
+        events.append("render")
+        return []
+
+    with RenderPool(
+        render=render,
+        warm_up=lambda: events.append("warm-up"),
+        workers=1,
+    ) as render_pool:
+        render_pool.map([RenderRequest(chart=CHART_NAME, name="release-name")])
+
+    assert events == ["warm-up", "render"]
+
+
+def test_errors_are_raised_to_the_caller() -> None:
+    def render(request: RenderRequest) -> List[Dict]:
+        raise RuntimeError(request.name)
+
+    with RenderPool(render=render, workers=2) as render_pool:
+        with pytest.raises(RuntimeError, match="release-name"):
+            render_pool.map([RenderRequest(chart=CHART_NAME, name="release-name")])
+
+
+def test_at_least_one_worker_is_required() -> None:
+    with pytest.raises(ValueError):
+        RenderPool(render=lambda request: [], workers=0)
+
+
+def test_helm_runner_template_many_matches_serial_rendering() -> None:
+    requests = [
+        RenderRequest(
+            chart=CHART_NAME,
+            name=f"release-{index}",
+            show_only=["templates/service.yaml"],
+            values=[random_required_values()],
+        )
+        for index in range(4)
+    ]
+    helm_runner = make_helm_runner(render_workers=2)
+    try:
+        pooled = helm_runner.template_many(requests)
+    finally:
+        helm_runner.close()
+    serial_helm_runner = make_helm_runner()
+    try:
+        serial = serial_helm_runner.template_many(requests)
+    finally:
+        serial_helm_runner.close()
+
+    assert pooled == serial
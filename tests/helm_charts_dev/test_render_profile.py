@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from helm_charts_dev import RenderCache
+from helm_charts_dev.helm_runner import add_render_profiler, remove_render_profiler
+from helm_charts_dev.render_profile import NO_NODE_ID, RenderProfiler, RenderSample
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import make_helm_runner
+
+
+@pytest.fixture
+def render_profiler() -> Iterator[RenderProfiler]:
+    render_profiler = RenderProfiler()
+    add_render_profiler(render_profiler)
+    yield render_profiler
+    remove_render_profiler(render_profiler)
+
+
+def test_renders_are_sampled_with_their_cache_outcome(
+    render_profiler: RenderProfiler,
+    tmp_path: Path,
+) -> None:
+    helm_runner = make_helm_runner(render_cache=RenderCache(directory=tmp_path))
+    values = random_required_values()
+    render_profiler.node_id = "test_node"
+    for _ in range(2):
+        helm_runner.template(
+            chart=CHART_NAME,
+            name="release-name",
+            show_only=["templates/service.yaml"],
+            values=[values],
+        )
+
+    miss, hit = render_profiler.samples
+    assert miss.cache == "miss"
+    assert miss.command is not None and miss.command[:2] == ["helm", "template"]
+    assert hit.cache == "hit"
+    assert hit.command is None
+    for sample in (miss, hit):
+        assert sample.node_id == "test_node"
+        assert sample.output_bytes > 0
+        assert sample.parse_seconds > 0
+        assert sample.wall_seconds > 0
+
+
+def test_failed_renders_are_sampled(render_profiler: RenderProfiler) -> None:
+    helm_runner = make_helm_runner()
+    with pytest.raises(RuntimeError):
+        helm_runner.template(
+            chart=CHART_NAME,
+            name="release-name",
+            show_only=["templates/missing.yaml"],
+            values=[random_required_values()],
+        )
+
+    (sample,) = render_profiler.samples
+    assert sample.failed
+    assert sample.node_id == NO_NODE_ID
+
+
+def test_summary_lists_the_slowest_tests_first(tmp_path: Path) -> None:
+    render_profiler = RenderProfiler()
+    for node_id, wall_seconds in [("fast", 0.1), ("slow", 1.0), ("slow", 1.0)]:
+        render_profiler.node_id = node_id
+        render_profiler.add(
+            RenderSample(chart=CHART_NAME, output_bytes=10, wall_seconds=wall_seconds)
+        )
+
+    totals, slowest, fastest = render_profiler.summary(top=2)
+    assert totals.startswith("3 renders (0 cache hits): 2.10s")
+    assert slowest.endswith("  slow")
+    assert fastest.endswith("  fast")
+    assert render_profiler.summary(top=1)[1:] == [slowest]
+
+    render_profiler.dump(tmp_path.joinpath("profile.json"))
+    dumped = json.loads(tmp_path.joinpath("profile.json").read_text())
+    assert [sample["node_id"] for sample in dumped] == ["fast", "slow", "slow"]
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from helm_charts_dev import template_graph as template_graph_module
+from helm_charts_dev.template_graph import template_graph
+from tests.charts.generic_api_service import CHART_NAME
+from tests.test_helpers import chart_path
+
+
+def test_kinds_are_attributed_through_included_named_templates() -> None:
+    graph = template_graph(chart_path(CHART_NAME))
+
+    assert graph.template_kinds("templates/deployment.yaml") == {"Deployment"}
+    assert graph.template_kinds("templates/http_routes.yaml") == {"HTTPRoute"}
+    assert graph.defined_in["generic-api-service.labels"] == "templates/_helpers.tpl"
+
+
+def test_partials_are_not_rendered_templates() -> None:
+    graph = template_graph(chart_path(CHART_NAME))
+
+    assert "templates/deployment.yaml" in graph.templates
+    assert all("/_" not in template for template in graph.templates)
+
+
+def test_templates_for_kinds() -> None:
+    graph = template_graph(chart_path(CHART_NAME))
+
+    assert graph.templates_for_kinds(["Service", "PersistentVolumeClaim"]) == [
+        "templates/service.yaml",
+        "templates/persistent_volume_claims.yaml",
+    ]
+    with pytest.raises(ValueError, match="kind Unknown"):
+        graph.templates_for_kinds(["Unknown"])
+
+
+def test_named_templates_end_with_their_define(tmp_path: Path) -> None:
+    templates_path = tmp_path.joinpath("templates")
+    templates_path.mkdir()
+    templates_path.joinpath("config.yaml").write_text(
+        '{{- define "config.data" -}}\n'
+        "{{- if .Values.data }}\n"
+        '{{ include "config.value" . }}\n'
+        "{{- end }}\n"
+        "{{- end -}}\n"
+        '{{ include "config.labels" . }}\n'
+        "kind: ConfigMap\n",
+        encoding="utf-8",
+    )
+    graph = template_graph(tmp_path)
+
+    assert graph.includes == {
+        "config.data": {"config.value"},
+        "templates/config.yaml": {"config.labels"},
+    }
+    assert graph.kinds == {"templates/config.yaml": {"ConfigMap"}}
+    assert graph.templates_for_kinds(["ConfigMap"]) == ["templates/config.yaml"]
+
+
+def test_graph_is_scanned_again_when_the_chart_changes(tmp_path: Path) -> None:
+    templates_path = tmp_path.joinpath("templates")
+    templates_path.mkdir()
+    templates_path.joinpath("_config.tpl").write_text(
+        '{{- define "config" -}}\nkind: ConfigMap\n{{- end -}}\n',
+        encoding="utf-8",
+    )
+    templates_path.joinpath("config.yaml").write_text(
+        '{{ include "config" . }}\n',
+        encoding="utf-8",
+    )
+    assert template_graph(tmp_path).templates_for_kinds(["ConfigMap"]) == [
+        "templates/config.yaml"
+    ]
+
+    templates_path.joinpath("secret.yaml").write_text(
+        "kind: Secret\n",
+        encoding="utf-8",
+    )
+    assert template_graph(tmp_path).templates_for_kinds(["Secret"]) == [
+        "templates/secret.yaml"
+    ]
+    # Only the latest graph of the chart is kept.
+    _, graph = template_graph_module._template_graphs[str(tmp_path.resolve())]
+    assert graph is template_graph(tmp_path)
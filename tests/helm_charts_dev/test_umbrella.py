@@ -0,0 +1,93 @@
+from typing import Any, Dict, List
+
+from helm_charts_dev.umbrella import (
+    batch_aliases,
+    split_umbrella_output,
+    umbrella_values,
+)
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import make_helm_runner
+from tests.test_helpers.test_constants import EXAMPLE_RELEASE_NAME
+
+
+def test_umbrella_values_nests_each_layer_under_its_alias() -> None:
+    aliases = batch_aliases(3)
+    layers = umbrella_values(
+        aliases,
+        [[{"a": 1}, {"a": 2}], None, [{"b": 1}]],
+    )
+    assert layers == [
+        {aliases[0]: {"a": 1}, aliases[2]: {"b": 1}},
+        {aliases[0]: {"a": 2}},
+    ]
+
+
+def test_split_umbrella_output_groups_documents_by_alias() -> None:
+    templates_yaml = (
+        "---\n"
+        "# Source: batch/charts/batch-1/templates/service.yaml\n"
+        "kind: Service\n"
+        "---\n"
+        "# Source: batch/charts/batch-0/templates/deployment.yaml\n"
+        "kind: Deployment\n"
+        "---\n"
+        "# Source: batch/charts/batch-1/templates/deployment.yaml\n"
+        "kind: Deployment\n"
+    )
+    documents_by_alias = split_umbrella_output(templates_yaml)
+    assert {
+        alias: [template_path for template_path, _ in documents]
+        for alias, documents in documents_by_alias.items()
+    } == {
+        "batch-0": ["templates/deployment.yaml"],
+        "batch-1": ["templates/service.yaml", "templates/deployment.yaml"],
+    }
+
+
+def test_template_batch_matches_rendering_each_set_of_values() -> None:
+    helm_runner = make_helm_runner()
+    values_sets: List[Dict[str, Any]] = [
+        random_required_values(),
+        random_required_values() | {"replicaCount": 3},
+        random_required_values() | {"service": {"create": False}},
+    ]
+    batches = helm_runner.template_batch(
+        chart=CHART_NAME,
+        name=EXAMPLE_RELEASE_NAME,
+        values=[[values] for values in values_sets],
+    )
+
+    assert len(batches) == len(values_sets)
+    for batch, values in zip(batches, values_sets):
+        expected = helm_runner.template(
+            chart=CHART_NAME,
+            name=EXAMPLE_RELEASE_NAME,
+            values=[values],
+        )
+        assert _without_chart_label(batch) == _without_chart_label(expected)
+
+
+def test_template_batch_can_show_only_some_templates() -> None:
+    batches = make_helm_runner().template_batch(
+        chart=CHART_NAME,
+        name=EXAMPLE_RELEASE_NAME,
+        show_only=["templates/service.yaml"],
+        values=[[random_required_values()], [random_required_values()]],
+    )
+    assert [[manifest["kind"] for manifest in batch] for batch in batches] == [
+        ["Service"],
+        ["Service"],
+    ]
+
+
+def _without_chart_label(manifests: List[Dict]) -> List[Dict]:
+    """
+    Aliased charts are renamed, so the chart label of batch renders names the alias.
+    """
+    for manifest in manifests:
+        for metadata in [
+            manifest["metadata"],
+            manifest.get("spec", {}).get("template", {}).get("metadata", {}),
+        ]:
+            metadata.get("labels", {}).pop("helm.sh/chart", None)
+    return sorted(manifests, key=lambda manifest: str(manifest["kind"]))
@@ -0,0 +1,83 @@
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from helm_charts_dev.values_generator import values_generator
+from helm_charts_dev.values_schema import validate_values
+
+SCHEMA: Dict[str, Any] = {
+    "$defs": {
+        "port": {
+            "properties": {
+                "number": {"maximum": 65535, "minimum": 1, "type": "integer"},
+                "protocol": {"pattern": "^(TCP|UDP)$", "type": "string"},
+            },
+            "required": ["number", "protocol"],
+            "type": "object",
+        },
+    },
+    "properties": {
+        "name": {"maxLength": 8, "type": "string"},
+        "optional": {"type": "boolean"},
+        "ports": {"patternProperties": {"^.*$": {"$ref": "#/$defs/port"}}},
+        "tags": {"items": {"type": "string"}, "minItems": 1, "type": "array"},
+    },
+    "required": ["name", "ports", "tags"],
+    "type": "object",
+}
+
+
+def make_chart(path: Path, schema: Dict[str, Any]) -> Path:
+    path.mkdir(parents=True)
+    path.joinpath("Chart.yaml").write_text(
+        f"apiVersion: v2\nname: {path.name}\nversion: 1.2.3\n",
+        encoding="utf-8",
+    )
+    path.joinpath("values.schema.json").write_text(json.dumps(schema))
+    return path
+
+
+def test_required_values_only_include_required_properties(tmp_path: Path) -> None:
+    generator = values_generator(make_chart(tmp_path.joinpath("chart"), SCHEMA))
+
+    assert generator.required_values(lambda: "random-string") == {
+        "name": "random-s",
+        "ports": {},
+        "tags": ["random-string"],
+    }
+
+
+def test_variants_meet_the_schema(tmp_path: Path) -> None:
+    path = make_chart(tmp_path.joinpath("chart"), SCHEMA)
+    variant_random = random.Random(0)  # noqa: DUO102
+    variants = [values_generator(path).variant(variant_random) for _ in range(20)]
+
+    for variant in variants:
+        validate_values(path, [variant])
+    assert any("optional" in variant for variant in variants)
+    assert {
+        port["protocol"] for variant in variants for port in variant["ports"].values()
+    } == {"TCP", "UDP"}
+
+
+def test_generators_are_cached_per_schema_digest(tmp_path: Path) -> None:
+    generator = values_generator(make_chart(tmp_path.joinpath("chart"), SCHEMA))
+
+    assert values_generator(make_chart(tmp_path.joinpath("copy"), SCHEMA)) is generator
+    assert values_generator(make_chart(tmp_path.joinpath("other"), {})) is not generator
+
+
+def test_unsatisfiable_required_properties_raise(tmp_path: Path) -> None:
+    path = make_chart(
+        tmp_path.joinpath("chart"),
+        {
+            "properties": {"name": {"pattern": "^[0-9]+$", "type": "string"}},
+            "required": ["name"],
+        },
+    )
+
+    with pytest.raises(ValueError, match="Unable to generate a string"):
+        values_generator(path).required_values(lambda: "random-string")
@@ -0,0 +1,79 @@
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from helm_charts_dev import HelmRunner, Values, ValuesSchemaError
+from helm_charts_dev.values_schema import SCHEMA_ERROR_HEADER
+from tests.charts.generic_api_service import CHART_NAME, random_required_values
+from tests.test_helpers import make_helm_runner
+
+INVALID_VALUES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "null_removes_a_required_default": lambda values: values | {"appName": None},
+    "null_removes_a_nested_required_default": lambda values: values
+    | {"ports": {"http": {"name": None}}},
+    "wrong_types": lambda values: values
+    | {"replicaCount": "two", "service": {"create": "yes"}},
+}
+
+
+def schema_failures(error: Exception) -> List[str]:
+    """
+    The lines of the error following helm's header, sorted since helm doesn't report
+    failures in a stable order.
+    """
+    _, _, failures = str(error).partition(f"Error: {SCHEMA_ERROR_HEADER}\n")
+    assert failures, str(error)
+    return sorted(failures.strip().splitlines())
+
+
+@pytest.mark.parametrize(
+    "invalid_values",
+    list(INVALID_VALUES.values()),
+    ids=list(INVALID_VALUES),
+)
+def test_failures_are_reported_like_helm_reports_them(
+    helm_runner: HelmRunner,
+    invalid_values: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> None:
+    values: Values = [invalid_values(random_required_values())]
+    with pytest.raises(ValuesSchemaError) as in_process_error:
+        helm_runner.template(chart=CHART_NAME, name="release-name", values=values)
+    with pytest.raises(RuntimeError) as helm_error:
+        make_helm_runner(schema_validation=False).template(
+            chart=CHART_NAME,
+            name="release-name",
+            values=values,
+        )
+
+    assert not isinstance(helm_error.value, ValuesSchemaError)
+    assert schema_failures(in_process_error.value) == schema_failures(helm_error.value)
+
+
+def test_invalid_values_never_reach_helm(monkeypatch: pytest.MonkeyPatch) -> None:
+    helm_runner = make_helm_runner()
+
+    def run(helm_arguments: List[str]) -> str:
+        raise AssertionError(f"Unexpected helm command: {helm_arguments}")
+
+    monkeypatch.setattr(helm_runner, "_run", run)
+    with pytest.raises(ValuesSchemaError, match="- replicaCount: Invalid type"):
+        helm_runner.template(
+            chart=CHART_NAME,
+            name="release-name",
+            values=[random_required_values() | {"replicaCount": "two"}],
+        )
+
+
+def test_failures_of_batched_values_name_their_alias(helm_runner: HelmRunner) -> None:
+    values = random_required_values()
+    with pytest.raises(ValuesSchemaError) as error:
+        helm_runner.template_batch(
+            chart=CHART_NAME,
+            name="release-name",
+            values=[[values], [values | {"replicaCount": "two"}]],
+        )
+
+    assert schema_failures(error.value) == [
+        "- replicaCount: Invalid type. Expected: integer, given: string",
+        "batch-1:",
+    ]
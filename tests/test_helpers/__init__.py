@@ -1,13 +1,16 @@
 import json
+import random
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from os import path
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from uuid import uuid4
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID, uuid4
 
 import pytest
-import yaml
-from pytest_helm_templates import HelmRunner
+
+from helm_charts_dev import HelmRunner, RenderCache, load_yaml
+from helm_charts_dev.values_generator import values_generator
 
 
 @dataclass
@@ -22,6 +25,9 @@ class ChartDependency:
 
 ChartDependencies = Dict[str, ChartDependency]
 
+# The source of random_string values when running seeded, see seed_random_strings.
+_random: Optional[random.Random] = None  # noqa: DUO102
+
 
 class HelperRenderer:
     """
@@ -46,12 +52,30 @@ class HelperRenderer:
         helper_namespace: Optional[str] = None,
         values: Optional[Dict[str, Any]] = None,
     ) -> str:
+        return self.render_many(
+            [helper_name],
+            name=name,
+            helper_namespace=helper_namespace,
+            values=values,
+        )[helper_name]
+
+    def render_many(
+        self,
+        helper_names: List[str],
+        name: str = "",
+        helper_namespace: Optional[str] = None,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, str]:
+        """
+        Render several named templates against the same release name and values.
+        Each helper is written as its own key of a single adhoc document, so the
+        whole batch costs one helm invocation rather than one per helper.
+        """
         namespace = helper_namespace or self._chart_name
-        fully_qualified_name = f"{namespace}.{helper_name}"
-        content = (
-            "---\n"
-            "result: |-\n"
-            f'  {{{{- include "{fully_qualified_name}" . | nindent 2}}}}'
+        content = "---\n" + "\n".join(
+            f"{json.dumps(helper_name)}: |-\n"
+            f'  {{{{- include "{namespace}.{helper_name}" . | nindent 2}}}}'
+            for helper_name in dict.fromkeys(helper_names)
         )
         rendered = self._helm_runner.adhoc_template(
             chart=self._chart_name,
@@ -59,9 +83,12 @@ class HelperRenderer:
             name=name or random_string(),
             values=[self._random_required_values | (values or {})],
         )
-        result = rendered["result"]
-        assert isinstance(result, str)
-        return result
+        results = {}
+        for helper_name in helper_names:
+            result = rendered[helper_name]
+            assert isinstance(result, str)
+            results[helper_name] = result
+        return results
 
 
 def charts_path() -> str:
@@ -77,8 +104,18 @@ def chart_path(
     return f"{charts_path_override or charts_path()}/{chart_name}"
 
 
-def make_helm_runner(charts_path_override: Optional[str] = None) -> HelmRunner:
-    return HelmRunner(cwd=charts_path_override or charts_path())
+def make_helm_runner(
+    charts_path_override: Optional[str] = None,
+    render_cache: Optional[RenderCache] = None,
+    render_workers: int = 0,
+    schema_validation: bool = True,
+) -> HelmRunner:
+    return HelmRunner(
+        cwd=charts_path_override or charts_path(),
+        render_cache=render_cache,
+        render_workers=render_workers,
+        schema_validation=schema_validation,
+    )
 
 
 def get_chart_yaml(
@@ -87,7 +124,7 @@ def get_chart_yaml(
 ) -> Dict:
     chart_yaml_path = f"{chart_path(chart_name, charts_path_override)}/Chart.yaml"
     with open(chart_yaml_path, encoding="utf-8", mode="r") as file:
-        chart_yaml = yaml.safe_load(file)
+        chart_yaml = load_yaml(file.read())
     assert isinstance(chart_yaml, Dict)
     return chart_yaml
 
@@ -98,7 +135,7 @@ def get_chart_values(
 ) -> Dict:
     chart_values_path = f"{chart_path(chart_name, charts_path_override)}/values.yaml"
     with open(chart_values_path, encoding="utf-8", mode="r") as file:
-        chart_values = yaml.safe_load(file)
+        chart_values = load_yaml(file.read())
     assert isinstance(chart_values, Dict)
     return chart_values
 
@@ -115,6 +152,32 @@ def get_chart_values_schema(
     return chart_values_schema
 
 
+def get_chart_required_values(
+    chart_name: str,
+    charts_path_override: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Return the minimal values the chart's values.schema.json requires, with strings
+    from random_string, so they can't be relied upon for testing.
+    """
+    _chart_path = Path(chart_path(chart_name, charts_path_override))
+    return values_generator(_chart_path).required_values(random_string)
+
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge override into a copy of base like helm merges values: override wins and
+    maps are merged recursively.
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 def get_chart_dependencies(chart_yaml: Dict) -> ChartDependencies:
     if "dependencies" not in chart_yaml:
         return {}
@@ -215,15 +278,42 @@ def make_chart_fixtures(
     def random_required_values() -> Dict[str, Any]:
         """
         A dictionary of all values a chart requires, with random values that can't be
-        relied upon for testing.
-
-        Expected to be overridden by any package that tests a chart with required
-        values.
+        relied upon for testing, generated from the chart's values.schema.json.
         """
-        return {}
+        return get_chart_required_values(chart_dir_name, charts_path_override)
 
     conftest_globals["random_required_values"] = random_required_values
 
 
 def random_string() -> str:
-    return str(uuid4())
+    """
+    Return a random UUID string. When seeded via seed_random_strings, the sequence of
+    strings is derived from the seed, so it repeats exactly from run to run.
+    """
+    if _random is None:
+        return str(uuid4())
+    return str(UUID(int=_random.getrandbits(128), version=4))
+
+
+def seed_random_strings(seed: Optional[str]) -> None:
+    """
+    Derive the strings random_string returns from now on from the given seed, or go
+    back to truly random strings if the seed is None.
+    """
+    global _random
+    _random = None if seed is None else random.Random(seed)  # noqa: DUO102
+
+
+@contextmanager
+def seeded_random_strings(seed: Optional[str]) -> Iterator[None]:
+    """
+    Like seed_random_strings, but only within the block. Afterwards, random_string
+    continues the sequence it was returning before, as if the block never ran.
+    """
+    global _random
+    previous_random = _random
+    seed_random_strings(seed)
+    try:
+        yield
+    finally:
+        _random = previous_random
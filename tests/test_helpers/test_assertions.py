@@ -1,6 +1,8 @@
 import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from re import Pattern
-from typing import Any, Dict, List, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 
 def assert_dependency_value_override(
@@ -27,16 +29,10 @@ def assert_values_are_known_to_schemas(
     chart_values: Dict,
     chart_values_schema: Dict,
 ) -> None:
-    chart_values_paths = _get_nested_paths(chart_values)
-    chart_values_schema_paths = _get_values_schema_paths(chart_values_schema)
-
-    values_without_schema = []
-    for chart_value_path_components in chart_values_paths:
-        if not _path_matches_any_schema(
-            chart_value_path_components,
-            chart_values_schema_paths,
-        ):
-            values_without_schema.append("/".join(chart_value_path_components))
+    values_without_schema, _ = _match_values_to_schema(
+        chart_values,
+        chart_values_schema,
+    )
 
     assert (
         [] == values_without_schema
@@ -47,105 +43,192 @@ def assert_schemas_are_known_to_values(
     chart_values: Dict,
     chart_values_schema: Dict,
 ) -> None:
-    chart_values_paths = _get_nested_paths(chart_values)
-    chart_values_schema_paths = _get_values_schema_paths(chart_values_schema)
-
-    schemas_without_values = []
-    for chart_values_schema_path_patterns in chart_values_schema_paths:
-        found_match = False
-        for chart_value_path_components in chart_values_paths:
-            if _path_matches_schema(
-                chart_value_path_components,
-                chart_values_schema_path_patterns,
-            ):
-                found_match = True
-                break
-
-        if not found_match:
-            schemas_without_values.append(
-                "/".join([regex.pattern for regex in chart_values_schema_path_patterns])
-            )
+    _, schemas_without_values = _match_values_to_schema(
+        chart_values,
+        chart_values_schema,
+    )
 
     assert (
         [] == schemas_without_values
     ), "Expected all schemas to have entries in values.yaml"
 
 
-def _path_matches_any_schema(
-    chart_value_path_components: Tuple[str, ...],
-    chart_values_schema_paths: Set[Tuple[Pattern[str], ...]],
-) -> bool:
-    return any(
-        _path_matches_schema(chart_value_path_components, schema_path_patterns)
-        for schema_path_patterns in chart_values_schema_paths
-    )
-
-
-def _path_matches_schema(
-    chart_value_path_components: Tuple[str, ...],
-    chart_values_schema_path_patterns: Tuple[Pattern[str], ...],
-) -> bool:
-    if len(chart_value_path_components) != len(chart_values_schema_path_patterns):
-        return False
+@dataclass(eq=False)
+class _SchemaNode:
+    """
+    A node of the trie a values schema is compiled into, with an edge per literal
+    property, per pattern property and, for arrays of objects, to the schema of the
+    array's items. A value matches the schema if its path through the trie ends at a
+    leaf, i.e. at a node that doesn't describe an object's properties.
+    """
 
-    return all(
-        path_pattern.fullmatch(path_component)
-        for path_component, path_pattern in zip(
-            chart_value_path_components,
-            chart_values_schema_path_patterns,
-        )
+    path: str
+    items: Optional["_SchemaNode"] = None
+    leaf: bool = True
+    pattern_properties: List[Tuple[Pattern[str], "_SchemaNode"]] = field(
+        default_factory=list
     )
-
-
-def _get_values_schema_paths(
-    nested_dict: Dict,
-    current_path: Tuple[Pattern[str], ...] = (),
-    keys_are_patterns: bool = False,
-) -> Set[Tuple[Pattern[str], ...]]:
+    properties: Dict[str, "_SchemaNode"] = field(default_factory=dict)
+
+    def children(self, key: str) -> List["_SchemaNode"]:
+        # As in JSON Schema, a key can match a literal property and any number of
+        # pattern properties at once.
+        children = [self.properties[key]] if key in self.properties else []
+        for key_pattern, child in self.pattern_properties:
+            if key_pattern.search(key):
+                children.append(child)
+        return children
+
+
+# The most compiled schemas kept. Schemas come from package-scoped fixtures and
+# module constants, so the few most recently used cover every test that reuses one.
+_MAX_COMPILED_SCHEMAS = 8
+
+# Maps the id of a values schema to the schema, which keeps the id from being reused
+# while it's memoized, and the trie it compiles to, least recently used first.
+# Schemas are never mutated once loaded, so the identity of one stands for its
+# content.
+_compiled_schemas: "OrderedDict[int, Tuple[Dict, _SchemaNode]]" = OrderedDict()
+
+
+def _compile_values_schema(chart_values_schema: Dict) -> _SchemaNode:
+    schema_key = id(chart_values_schema)
+    if schema_key in _compiled_schemas:
+        _compiled_schemas.move_to_end(schema_key)
+        return _compiled_schemas[schema_key][1]
+
+    root = _SchemaCompiler(chart_values_schema).compile(
+        [chart_values_schema],
+        path="",
+    )
+    _compiled_schemas[schema_key] = (chart_values_schema, root)
+    while len(_compiled_schemas) > _MAX_COMPILED_SCHEMAS:
+        _compiled_schemas.popitem(last=False)
+    return root
+
+
+class _SchemaCompiler:
+    def __init__(self, root_schema: Dict) -> None:
+        self._root_schema = root_schema
+        # Compiled nodes by the ids of the schemas they were compiled from, so a
+        # $ref that is used in several places, or recursively, is compiled once.
+        self._compiled: Dict[Tuple[int, ...], _SchemaNode] = {}
+
+    def compile(self, schemas: List[Dict], path: str) -> _SchemaNode:
+        parts = [part for schema in schemas for part in self._all_of(schema)]
+        compiled_key = tuple(id(part) for part in parts)
+        if compiled_key in self._compiled:
+            return self._compiled[compiled_key]
+
+        node = self._compiled[compiled_key] = _SchemaNode(path=path)
+        properties: Dict[str, List[Dict]] = {}
+        pattern_properties: Dict[str, List[Dict]] = {}
+        items: List[Dict] = []
+        for part in parts:
+            for key, schema in part.get("properties", {}).items():
+                properties.setdefault(key, []).append(schema)
+            for key, schema in part.get("patternProperties", {}).items():
+                pattern_properties.setdefault(key, []).append(schema)
+            if isinstance(part.get("items"), dict):
+                items.append(part["items"])
+
+        if any(
+            self._is_object(part)
+            and ("properties" in part or "patternProperties" in part)
+            for part in parts
+        ):
+            node.leaf = False
+            node.properties = {
+                key: self.compile(schemas, path=f"{path}/{key}".lstrip("/"))
+                for key, schemas in properties.items()
+            }
+            node.pattern_properties = [
+                (
+                    re.compile(key_pattern),
+                    self.compile(schemas, path=f"{path}/{key_pattern}".lstrip("/")),
+                )
+                for key_pattern, schemas in pattern_properties.items()
+            ]
+        if items:
+            node.items = self.compile(items, path=f"{path}/[]")
+        return node
+
+    def _all_of(self, schema: Dict) -> List[Dict]:
+        schema = self._resolve(schema)
+        parts = [schema]
+        for part in schema.get("allOf", []):
+            parts.extend(self._all_of(part))
+        return parts
+
+    def _is_object(self, schema: Dict) -> bool:
+        schema_type = schema.get("type", "object")
+        if isinstance(schema_type, list):
+            return "object" in schema_type
+        return bool(schema_type == "object")
+
+    def _resolve(self, schema: Dict) -> Dict:
+        seen: Set[str] = set()
+        while "$ref" in schema:
+            ref = schema["$ref"]
+            if not ref.startswith("#") or ref in seen:
+                raise ValueError(f"Unable to resolve $ref {ref}")
+            seen.add(ref)
+            target: Any = self._root_schema
+            for token in ref.lstrip("#").split("/")[1:]:
+                target = target[token.replace("~1", "/").replace("~0", "~")]
+            schema = target
+        return schema
+
+
+def _match_values_to_schema(
+    chart_values: Dict,
+    chart_values_schema: Dict,
+) -> Tuple[List[str], List[str]]:
     """
-    Warning: There is no handling for arrays at this time.
+    Walk the values and the compiled schema together, returning the paths of values
+    the schema doesn't describe and of schema leaves no value reaches. The leaves of
+    the items of an array are only expected to be reached when the array is.
     """
-    paths: Set[Tuple[Pattern[str], ...]] = set()
-    # Skip the first layer of the schema and jump straight to properties
-    _nested_dict = nested_dict if len(current_path) > 0 else nested_dict["properties"]
-
-    for key, value in _nested_dict.items():
-        key_pattern = key if keys_are_patterns else f"^{re.escape(key)}$"
-        new_path = current_path + (re.compile(key_pattern),)
-        if value["type"] == "object" and (
-            "properties" in value or "patternProperties" in value
+    root = _compile_values_schema(chart_values_schema)
+    values_without_schema: List[str] = []
+    reached: Set[int] = set()
+
+    def walk(value: Any, nodes: List[_SchemaNode], path: Tuple[str, ...]) -> None:
+        if isinstance(value, dict) and value:
+            for key, child_value in value.items():
+                child_nodes = [child for node in nodes for child in node.children(key)]
+                walk(child_value, child_nodes, path + (key,))
+            return
+
+        item_nodes = [node.items for node in nodes if node.items is not None]
+        if (
+            isinstance(value, list)
+            and item_nodes
+            and any(isinstance(element, dict) and element for element in value)
         ):
-            if "properties" in value:
-                paths.update(
-                    _get_values_schema_paths(
-                        nested_dict=value["properties"],
-                        current_path=new_path,
-                        keys_are_patterns=False,
-                    )
-                )
-            if "patternProperties" in value:
-                paths.update(
-                    _get_values_schema_paths(
-                        nested_dict=value["patternProperties"],
-                        current_path=new_path,
-                        keys_are_patterns=True,
-                    )
-                )
-        else:
-            paths.add(new_path)
-
-    return paths
-
-
-def _get_nested_paths(
-    nested_dict: Dict,
-    current_path: Tuple[str, ...] = (),
-) -> Set[Tuple[str, ...]]:
-    paths: Set[Tuple[str, ...]] = set()
-    for key, value in nested_dict.items():
-        new_path = current_path + (key,)
-        if value and isinstance(value, dict):
-            paths.update(_get_nested_paths(value, new_path))
-        else:
-            paths.add(new_path)
-    return paths
+            reached.update(id(node) for node in nodes if node.items is not None)
+            for index, element in enumerate(value):
+                walk(element, item_nodes, path + (str(index),))
+            return
+
+        leaves = [node for node in nodes if node.leaf]
+        if not leaves:
+            values_without_schema.append("/".join(path))
+        reached.update(id(leaf) for leaf in leaves)
+
+    walk(chart_values, [root], ())
+
+    schemas_without_values = []
+    visited: Set[int] = set()
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        if node.leaf and id(node) not in reached:
+            schemas_without_values.append(node.path)
+        pending.extend(node.properties.values())
+        pending.extend(child for _, child in node.pattern_properties)
+
+    return sorted(values_without_schema), sorted(schemas_without_values)
@@ -0,0 +1,128 @@
+import os
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import yaml
+
+from helm_charts_dev import HelmRunner
+
+# The sizes every scaling benchmark renders at.
+BENCHMARK_SIZES = [10, 100, 1000]
+
+# Linear growth fits an exponent of 1. Anything steeper than this is treated as a
+# super-linear regression rather than noise.
+MAX_GROWTH_EXPONENT = 1.25
+
+# Each size is rendered at least _MIN_REPEATS times, and small sizes until
+# _MIN_SECONDS have been spent on them, and the median render is kept. Small sizes
+# need more repeats because their differences are of the same order as the noise.
+_MAX_REPEATS = 20
+_MIN_REPEATS = 3
+_MIN_SECONDS = 2.0
+
+
+@dataclass
+class RenderTiming:
+    size: int
+    seconds: float
+    output_bytes: int
+
+
+def time_renders(
+    helm_runner: HelmRunner,
+    chart: str,
+    template: str,
+    values_for_size: Callable[[int], Dict[str, Any]],
+    values_dir: Path,
+    sizes: Sequence[int] = BENCHMARK_SIZES,
+) -> List[RenderTiming]:
+    """
+    Time rendering the given template with the values generated for each size. The
+    values are written to a file up front so that only helm is timed, not the
+    serialization of large values.
+    """
+    timings = []
+    for size in sizes:
+        values_path = values_dir.joinpath(f"values-{size}.yaml")
+        with open(values_path, encoding="utf-8", mode="w") as file:
+            yaml.safe_dump(values_for_size(size), file)
+
+        samples: List[float] = []
+        while len(samples) < _MAX_REPEATS and (
+            len(samples) < _MIN_REPEATS or sum(samples) < _MIN_SECONDS
+        ):
+            start = time.perf_counter()
+            templates_yaml = helm_runner.template_output(
+                chart=chart,
+                name="benchmark",
+                show_only=[template],
+                values=[str(values_path)],
+            )
+            samples.append(time.perf_counter() - start)
+        timings.append(
+            RenderTiming(
+                size=size,
+                seconds=statistics.median(samples),
+                output_bytes=len(templates_yaml.encode("utf-8")),
+            )
+        )
+    return timings
+
+
+def measure_helm_process(
+    helm_arguments: List[str],
+    repeats: int = _MIN_REPEATS,
+) -> Tuple[float, int]:
+    """
+    Run the given helm command repeatedly and return its median wall time, in
+    seconds, and median peak resident set size, in kilobytes, the latter being the
+    best available proxy for how much helm allocated.
+    """
+    samples: List[Tuple[float, int]] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            helm_arguments,
+            stderr=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        # Let the Popen object know the process has been reaped.
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            raise RuntimeError(f"{helm_arguments} failed with {process.returncode}")
+        samples.append((time.perf_counter() - start, usage.ru_maxrss))
+    return (
+        statistics.median(seconds for seconds, _ in samples),
+        int(statistics.median(max_rss for _, max_rss in samples)),
+    )
+
+
+def growth_exponent(sizes: Sequence[float], measurements: Sequence[float]) -> float:
+    """
+    Fit measurements to `a + b * size ** k` by least squares and return k. The
+    constant term absorbs fixed costs, like starting helm, that would otherwise
+    flatten the curve at small sizes.
+    """
+    best_exponent, best_residual = 0.0, float("inf")
+    for step in range(1, 401):
+        exponent = step / 100
+        xs = [size**exponent for size in sizes]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(measurements) / len(measurements)
+        variance = sum((x - mean_x) ** 2 for x in xs)
+        slope = (
+            sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, measurements))
+            / variance
+        )
+        intercept = mean_y - slope * mean_x
+        residual = sum(
+            (y - intercept - slope * x) ** 2 for x, y in zip(xs, measurements)
+        )
+        if slope > 0 and residual < best_residual:
+            best_exponent, best_residual = exponent, residual
+    return best_exponent
@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ManifestId = Tuple[str, str, str]
+
+
+class ManifestSet:
+    """
+    The manifests of a single render, indexed once so that looking up a resource by
+    (apiVersion, kind, name), by kind, by label or a workload's container by name
+    doesn't require scanning every manifest. Empty documents are dropped.
+    """
+
+    __slots__ = ("_by_id", "_by_kind", "_by_label", "_containers", "_manifests")
+
+    def __init__(self, manifests: Iterable[Optional[Dict]]) -> None:
+        self._manifests: List[Dict] = [m for m in manifests if m is not None]
+        self._by_id: Dict[ManifestId, Dict] = {}
+        self._by_kind: Dict[str, List[Dict]] = {}
+        self._by_label: Dict[Tuple[str, str], List[Dict]] = {}
+        self._containers: Dict[Tuple[str, str], List[Dict]] = {}
+        for manifest in self._manifests:
+            kind = manifest.get("kind", "")
+            metadata = manifest.get("metadata") or {}
+            manifest_id = (
+                manifest.get("apiVersion", ""),
+                kind,
+                metadata.get("name", ""),
+            )
+            if manifest_id in self._by_id:
+                raise ValueError(f"Duplicate manifest {manifest_id}")
+            self._by_id[manifest_id] = manifest
+            self._by_kind.setdefault(kind, []).append(manifest)
+            for label in (metadata.get("labels") or {}).items():
+                self._by_label.setdefault(label, []).append(manifest)
+            pod_spec = ((manifest.get("spec") or {}).get("template") or {}).get("spec")
+            for container in (pod_spec or {}).get("containers") or []:
+                self._containers.setdefault((kind, container["name"]), []).append(
+                    container
+                )
+
+    def __getitem__(self, index: int) -> Dict:
+        return self._manifests[index]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._manifests)
+
+    def __len__(self) -> int:
+        return len(self._manifests)
+
+    def container(self, name: str, kind: str = "Deployment") -> Dict:
+        """
+        Return the container with the given name from the pod template of the only
+        workload of the given kind that has one.
+        """
+        return _only(self._containers.get((kind, name), []), f"{kind} container {name}")
+
+    def get(self, api_version: str, kind: str, name: str) -> Optional[Dict]:
+        return self._by_id.get((api_version, kind, name))
+
+    def of_kind(self, kind: str) -> List[Dict]:
+        return list(self._by_kind.get(kind, []))
+
+    def one(self, kind: str) -> Dict:
+        """
+        Return the only manifest of the given kind, failing if there are none or
+        several.
+        """
+        return _only(self._by_kind.get(kind, []), kind)
+
+    def with_label(self, key: str, value: str) -> List[Dict]:
+        return list(self._by_label.get((key, value), []))
+
+
+def _only(matches: List[Dict], description: str) -> Dict:
+    if len(matches) != 1:
+        raise LookupError(f"Expected exactly one {description}, found {len(matches)}")
+    return matches[0]
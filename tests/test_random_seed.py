@@ -0,0 +1,74 @@
+import json
+from typing import Dict, List
+
+import pytest
+
+from tests.test_helpers import seeded_random_strings
+
+CONFTEST = """
+import pytest
+
+from tests.conftest import (
+    pytest_addoption,
+    pytest_configure,
+    pytest_fixture_setup,
+    pytest_make_collect_report,
+    pytest_runtest_protocol,
+)
+from tests.test_helpers import random_string
+
+
+@pytest.fixture(scope="package")
+def shared_value():
+    return random_string()
+"""
+
+TEST_MODULE = """
+import json
+from pathlib import Path
+
+from tests.test_helpers import random_string
+
+MODULE_VALUE = random_string()
+
+
+def test_values(request, shared_value):
+    values = [MODULE_VALUE, shared_value, random_string()]
+    with open(Path(__file__).parent.joinpath("values.jsonl"), mode="a") as file:
+        file.write(json.dumps({request.node.nodeid: values}) + "\\n")
+"""
+
+
+def run_seeded(
+    pytester: pytest.Pytester, passed: int, *args: str
+) -> Dict[str, List[str]]:
+    values_path = pytester.path.joinpath("values.jsonl")
+    values_path.unlink(missing_ok=True)
+    # Leave this session's random strings as they were.
+    with seeded_random_strings(None):
+        pytester.runpytest_inprocess(
+            "--random-seed=seed", "-p", "no:cacheprovider", *args
+        ).assert_outcomes(passed=passed)
+    values: Dict[str, List[str]] = {}
+    for line in values_path.read_text().splitlines():
+        values.update(json.loads(line))
+    return values
+
+
+def test_seeded_values_are_independent_of_which_tests_run(
+    pytester: pytest.Pytester,
+) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(test_first=TEST_MODULE, test_second=TEST_MODULE)
+
+    all_values = run_seeded(pytester, 2)
+    second_values = run_seeded(pytester, 1, "test_second.py")
+
+    assert second_values == {
+        "test_second.py::test_values": all_values["test_second.py::test_values"]
+    }
+    # Modules and tests get values of their own, fixtures shared between them don't.
+    first_values = all_values["test_first.py::test_values"]
+    assert first_values[0] != second_values["test_second.py::test_values"][0]
+    assert first_values[1] == second_values["test_second.py::test_values"][1]
+    assert first_values[2] != second_values["test_second.py::test_values"][2]
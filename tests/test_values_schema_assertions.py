@@ -0,0 +1,108 @@
+import time
+from typing import Any, Dict
+
+import pytest
+
+from tests.test_helpers.test_assertions import (
+    assert_schemas_are_known_to_values,
+    assert_values_are_known_to_schemas,
+)
+
+SCHEMA: Dict[str, Any] = {
+    "$defs": {
+        "port": {
+            "properties": {"name": {"type": "string"}, "port": {"type": "integer"}},
+            "type": "object",
+        },
+    },
+    "properties": {
+        "ports": {"items": {"$ref": "#/$defs/port"}, "type": "array"},
+        "probe": {
+            "allOf": [
+                {"properties": {"path": {"type": "string"}}},
+                {"properties": {"timeout": {"type": "integer"}}},
+            ],
+            "type": "object",
+        },
+        "routes": {
+            "patternProperties": {"^.*$": {"$ref": "#/$defs/port"}},
+            "type": "object",
+        },
+        "tags": {"items": {"type": "string"}, "type": "array"},
+    },
+    "type": "object",
+}
+
+
+def test_arrays_refs_and_all_of_are_followed() -> None:
+    values = {
+        "ports": [{"name": "http", "port": 80}],
+        "probe": {"path": "/", "timeout": 1},
+        "routes": {"a": {"name": "a", "port": 1}},
+        "tags": ["a"],
+    }
+
+    assert_values_are_known_to_schemas(values, SCHEMA)
+    assert_schemas_are_known_to_values(values, SCHEMA)
+
+
+def test_array_item_leaves_are_not_required_when_the_array_is_empty() -> None:
+    values = {
+        "ports": [],
+        "probe": {"path": "/", "timeout": 1},
+        "routes": {"a": {"name": "a", "port": 1}},
+        "tags": [],
+    }
+
+    assert_values_are_known_to_schemas(values, SCHEMA)
+    assert_schemas_are_known_to_values(values, SCHEMA)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"ports": [{"unknown": 1}]},
+        {"probe": {"unknown": 1}},
+        {"routes": {"a": {"unknown": 1}}},
+        {"unknown": 1},
+    ],
+)
+def test_unknown_values_are_reported(values: Dict[str, Any]) -> None:
+    with pytest.raises(AssertionError, match="defined schema definitions"):
+        assert_values_are_known_to_schemas(values, SCHEMA)
+
+
+def test_pattern_properties_match_anywhere_in_keys() -> None:
+    # As in JSON Schema, patterns aren't implicitly anchored, so "app" matches any
+    # key containing it.
+    schema = {
+        "properties": {
+            "labels": {
+                "patternProperties": {"app": {"type": "string"}},
+                "type": "object",
+            },
+        },
+        "type": "object",
+    }
+
+    assert_values_are_known_to_schemas({"labels": {"my-app-name": "a"}}, schema)
+    with pytest.raises(AssertionError, match="defined schema definitions"):
+        assert_values_are_known_to_schemas({"labels": {"tier": "a"}}, schema)
+
+
+def test_schema_leaves_without_values_are_reported() -> None:
+    values = {"ports": [], "probe": {"path": "/"}, "routes": {}, "tags": []}
+
+    with pytest.raises(AssertionError, match="entries in values.yaml"):
+        assert_schemas_are_known_to_values(values, SCHEMA)
+
+
+@pytest.mark.benchmark
+def test_matching_scales_to_thousands_of_values() -> None:
+    values = {
+        "routes": {f"route-{index}": {"name": "a", "port": 1} for index in range(5000)}
+    }
+
+    start = time.perf_counter()
+    assert_values_are_known_to_schemas(values, SCHEMA)
+    assert time.perf_counter() - start < 1